@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Compare per-commit and batched scenes: node count, export time and GLB size.
+
+Example usage:
+  python scripts/benchmarks/bench_batching.py --commits 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from generate_enhanced_sculpture import (  # noqa: E402
+    build_chaotic_sculpture,
+    build_crystalline_sculpture,
+    build_organic_sculpture,
+    build_rhythmic_sculpture,
+    detect_patterns,
+)
+from synthetic import make_commits  # noqa: E402
+
+BUILDERS = {
+    "organic": build_organic_sculpture,
+    "crystalline": build_crystalline_sculpture,
+    "rhythmic": build_rhythmic_sculpture,
+    "chaotic": build_chaotic_sculpture,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batched geometry")
+    parser.add_argument("--commits", type=int, default=2000, help="synthetic commits")
+    args = parser.parse_args()
+
+    commits = make_commits(args.commits)
+    patterns = detect_patterns(commits)
+    print(f"{'mode':12s} {'batched':>7s} {'nodes':>7s} {'build s':>8s} {'export s':>8s} {'MiB':>8s}")
+    for name, build in BUILDERS.items():
+        for batched in (False, True):
+            start = time.perf_counter()
+            scene = build(commits, patterns, batched)
+            built = time.perf_counter()
+            data = scene.export(file_type="glb")
+            exported = time.perf_counter()
+            print(f"{name:12s} {str(batched):>7s} {len(scene.graph.nodes_geometry):7d} "
+                  f"{built - start:8.3f} {exported - built:8.3f} {len(data) / 2**20:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
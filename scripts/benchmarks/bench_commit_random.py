@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Compare per-commit reseeding with the vectorized :class:`CommitRandom`.
+
+The reference is the loop the chaotic builder used to run: two SHA-256
+digests and an ``np.random.seed`` call per commit. The script times it
+against drawing the same number of values for every commit with
+:class:`commit_random.CommitRandom`, and checks that
+
+- a sample of commits matches ``numpy.random.Philox`` with the same key;
+- a commit's values do not depend on the other commits in the history;
+- the global ``np.random`` state is left untouched.
+
+Example usage:
+  python scripts/benchmarks/bench_commit_random.py --commits 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from commit_random import CommitRandom  # noqa: E402
+from commit_table import CommitTable  # noqa: E402
+from generate_enhanced_sculpture import build_chaotic_sculpture  # noqa: E402
+from synthetic import make_commits  # noqa: E402
+
+
+def reference_loop(shas) -> np.ndarray:
+    """The original per-commit seeding and color hashing."""
+    colors = np.empty((len(shas), 4), dtype=np.uint8)
+    for i, sha in enumerate(shas):
+        stable_hash = hashlib.sha256(sha.encode("utf-8")).digest()
+        np.random.seed(int.from_bytes(stable_hash[:4], "big"))
+        color_hash = hashlib.sha256(f"{sha}:color".encode("utf-8")).digest()
+        colors[i] = [(component % 156) + 100 for component in color_hash[:3]] + [255]
+    return colors
+
+
+def check(table: CommitTable) -> None:
+    draws = CommitRandom(table.sha).random(7, dtype=np.float32)
+    for i in np.linspace(0, len(table) - 1, 20).astype(int):
+        key = CommitRandom(table.sha[i:i + 1]).keys[0]
+        expected = np.random.Generator(np.random.Philox(key=key)).random(7, dtype=np.float32)
+        if not np.array_equal(draws[i], expected):
+            sys.exit(f"commit {i}: values differ from numpy.random.Philox")
+
+    subset = np.arange(0, len(table), 3)
+    if not np.array_equal(CommitRandom(table.sha[subset]).random(7, dtype=np.float32),
+                          draws[subset]):
+        sys.exit("values depend on the rest of the history")
+
+    state = np.random.get_state()[1].copy()
+    build_chaotic_sculpture(table.take(slice(0, 1000)), {}, batched=True)
+    if not np.array_equal(np.random.get_state()[1], state):
+        sys.exit("the chaotic builder changed the global random state")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-commit random values")
+    parser.add_argument("--commits", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5, help="best of this many vectorized runs")
+    args = parser.parse_args()
+
+    table = CommitTable.from_commits(make_commits(args.commits, end=1_700_000_000))
+    shas = table.sha.tolist()
+
+    start = time.perf_counter()
+    reference_loop(shas)
+    reference = time.perf_counter() - start
+
+    vectorized = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        CommitRandom(table.sha).random(7, dtype=np.float32)
+        vectorized = min(vectorized, time.perf_counter() - start)
+
+    check(table)
+    print(f"{args.commits} commits")
+    print(f"  reseeding loop    {reference:8.3f}s")
+    print(f"  CommitRandom      {vectorized:8.3f}s  ({reference / vectorized:.0f}x)")
+    print("  Philox equivalence, independence and global state ok")
+
+
+if __name__ == "__main__":
+    main()
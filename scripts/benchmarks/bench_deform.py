@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Compare the fused deformation pipeline with the original three-step randomizer.
+
+Both variants twist, jitter and scale a point cloud of ``--vertices`` rows
+held in a ``trimesh.Trimesh``. The float64 pipeline must produce exactly the
+same vertices as the original functions; time and peak traced memory
+(``tracemalloc`` sees NumPy allocations) are reported for each variant.
+
+Example usage:
+  python scripts/benchmarks/bench_deform.py --vertices 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from commit_randomizer import randomizer_pipeline  # noqa: E402
+
+
+def reference_randomize(mesh: trimesh.Trimesh, rng: np.random.Generator) -> None:
+    """The original ``randomize_mesh``: three separate whole-array passes."""
+    twist = rng.uniform(-0.5, 0.5)
+    noise = rng.uniform(0.02, 0.1)
+    scale = rng.uniform(0.8, 1.2, size=3)
+
+    v = mesh.vertices.copy()
+    angles = v[:, 1] * twist
+    c, s = np.cos(angles), np.sin(angles)
+    x = v[:, 0] * c - v[:, 2] * s
+    z = v[:, 0] * s + v[:, 2] * c
+    v[:, 0] = x
+    v[:, 2] = z
+    mesh.vertices = v
+
+    mesh.vertices += rng.uniform(-noise, noise, mesh.vertices.shape)
+    mesh.vertices *= scale
+
+
+def measure(label: str, func) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed:7.3f}s  peak {peak / 2**20:8.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the fused deformation pipeline")
+    parser.add_argument("--vertices", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    base = np.random.default_rng(args.seed).uniform(-1, 1, (args.vertices, 3))
+    print(f"{args.vertices} vertices ({base.nbytes / 2**20:.0f} MB as float64)")
+
+    reference = trimesh.Trimesh(vertices=base.copy(), process=False)
+    measure("three passes", lambda: reference_randomize(reference, np.random.default_rng(1)))
+
+    fused = trimesh.Trimesh(vertices=base.copy(), process=False)
+    measure("fused float64", lambda: randomizer_pipeline(np.random.default_rng(1)).apply_to_mesh(fused))
+    if not np.array_equal(reference.vertices, fused.vertices):
+        sys.exit("fused float64 result differs from the three-pass reference")
+    del reference, fused
+
+    double = base.copy()
+    measure("fused float64 in-place",
+            lambda: randomizer_pipeline(np.random.default_rng(1)).run(double, out=double))
+
+    single = base.astype(np.float32)
+    measure("fused float32 in-place",
+            lambda: randomizer_pipeline(np.random.default_rng(1), np.float32).run(single, out=single))
+    print("fused float64 result is identical to the reference")
+
+
+if __name__ == "__main__":
+    main()
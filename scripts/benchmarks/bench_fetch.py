@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare sequential page fetching with ``GitHubFetcher`` on a local stub API.
+
+The stub adds a fixed latency to every response. Three runs are timed: the
+original one-request-per-page loop, the parallel fetcher with a cold ETag
+cache and the same fetcher again with a warm cache. A final run against a
+rate-limited stub checks that the fetcher waits for the reset and still
+returns every commit.
+
+Example usage:
+  python scripts/benchmarks/bench_fetch.py --commits 5000 --latency 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from github_fetch import GitHubFetcher  # noqa: E402
+from stub_github import StubGitHub, make_api_commits  # noqa: E402
+
+
+def sequential_fetch(base_url: str, since: datetime.datetime):
+    """The original fetch loop: one new connection per page until an empty page."""
+    url = f"{base_url}/repos/o/r/commits"
+    params = {"since": since.isoformat() + "Z", "per_page": 100, "page": 1}
+    commits = []
+    while True:
+        resp = requests.get(url, params=params, timeout=30)
+        resp.raise_for_status()
+        data = resp.json()
+        if not data:
+            break
+        commits.extend(data)
+        params["page"] += 1
+    return commits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark GitHub commit fetching")
+    parser.add_argument("--commits", type=int, default=5000, help="commits served by the stub")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added per response")
+    parser.add_argument("--jobs", type=int, default=8, help="parallel page downloads")
+    args = parser.parse_args()
+
+    commits = make_api_commits(args.commits, days=30)
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=31)
+
+    with StubGitHub(commits, latency=args.latency) as stub, tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        expected = sequential_fetch(stub.url, since)
+        print(f"sequential       : {time.perf_counter() - start:7.3f}s, {stub.requests} requests")
+
+        for label in ("parallel, cold  ", "parallel, cached"):
+            before = stub.requests
+            start = time.perf_counter()
+            with GitHubFetcher(base_url=stub.url, cache_dir=tmp, max_workers=args.jobs) as fetcher:
+                fetched, _ = fetcher.fetch_commits("o", "r", since)
+            print(f"{label} : {time.perf_counter() - start:7.3f}s, {stub.requests - before} requests, "
+                  f"{fetcher.not_modified} not modified")
+            if [c["sha"] for c in fetched] != [c["sha"] for c in expected]:
+                raise SystemExit("Fetched commits differ from the sequential result")
+
+    with StubGitHub(commits, rate_limit=10, reset_after=1.0) as stub:
+        start = time.perf_counter()
+        with GitHubFetcher(base_url=stub.url, max_workers=args.jobs) as fetcher:
+            fetched, _ = fetcher.fetch_commits("o", "r", since)
+        print(f"rate-limited     : {time.perf_counter() - start:7.3f}s, "
+              f"{stub.rate_limited} responses rate limited")
+        if len(fetched) != len(expected):
+            raise SystemExit("Rate-limited fetch lost commits")
+
+
+if __name__ == "__main__":
+    main()
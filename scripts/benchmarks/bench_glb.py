@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Compare ``scene.export`` with the compact GLB writer on every model.
+
+For each GLB in ``--models`` (and optionally freshly built sculptures of a
+synthetic history) the script writes the scene with ``trimesh`` and with
+:func:`compact_glb.write_glb` with and without meshopt compression, and
+prints file size, gzip size, write time and trimesh load time.
+
+Correctness checks:
+
+- the quantized file is loaded back with trimesh and every vertex must be
+  within half a quantization step of the original;
+- every meshopt-compressed buffer view is decoded with the ``meshoptimizer``
+  package (if installed) and must equal the uncompressed data.
+
+Example usage:
+  python scripts/benchmarks/bench_glb.py --models models --commits 3000
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compact_glb import write_glb  # noqa: E402
+from generate_enhanced_sculpture import BUILDERS  # noqa: E402
+from patterns import detect_patterns  # noqa: E402
+from synthetic import make_commits  # noqa: E402
+
+
+def read_glb(path: str):
+    with open(path, "rb") as fh:
+        data = fh.read()
+    json_length = struct.unpack("<I", data[12:16])[0]
+    gltf = json.loads(data[20:20 + json_length])
+    return gltf, data[20 + json_length + 8:]
+
+
+def world_vertices(scene: trimesh.Scene) -> np.ndarray:
+    """Return the world-space vertices of all nodes, ordered by node name."""
+    return np.concatenate([
+        trimesh.transform_points(scene.geometry[name].vertices, transform)
+        for transform, name in (scene.graph[node] for node in sorted(scene.graph.nodes_geometry))])
+
+
+def check_quantized(scene: trimesh.Scene, path: str) -> None:
+    loaded = trimesh.load(path, force="scene")
+    original, restored = world_vertices(scene), world_vertices(loaded)
+    extents = np.array([float(np.max(scene.geometry[name].extents))
+                        for _, name in (scene.graph[n] for n in scene.graph.nodes_geometry)])
+    error = np.abs(original - restored).max()
+    if error > extents.max() / 65535:
+        sys.exit(f"{path}: quantization error {error} too large")
+
+
+def check_meshopt(compressed: str, plain: str) -> int:
+    """Decode every compressed view of ``compressed`` and compare with ``plain``."""
+    try:
+        import meshoptimizer
+    except ImportError:
+        print("  (meshoptimizer not installed, skipping decode check)")
+        return 0
+    gltf, binary = read_glb(compressed)
+    plain_gltf, plain_binary = read_glb(plain)
+    checked = 0
+    for view, plain_view in zip(gltf["bufferViews"], plain_gltf["bufferViews"]):
+        ext = view.get("extensions", {}).get("EXT_meshopt_compression")
+        if not ext:
+            continue
+        encoded = binary[ext["byteOffset"]:ext["byteOffset"] + ext["byteLength"]]
+        if ext["mode"] == "ATTRIBUTES":
+            decoded = meshoptimizer.decode_vertex_buffer(ext["count"], ext["byteStride"], encoded)
+        else:
+            decoded = meshoptimizer.decode_index_sequence(ext["count"], ext["byteStride"], encoded)
+        # The package returns float32 or uint32 arrays; compare the raw bytes
+        decoded = np.asarray(decoded).view(np.uint8)[:ext["count"] * ext["byteStride"]]
+        start = plain_view["byteOffset"]
+        expected = plain_binary[start:start + plain_view["byteLength"]]
+        if decoded.tobytes() != expected:
+            sys.exit(f"{compressed}: buffer view does not decode to the original data")
+        checked += 1
+    return checked
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def compare(label: str, scene: trimesh.Scene, workdir: str) -> None:
+    print(f"{label}")
+    paths = {name: os.path.join(workdir, f"{name}.glb") for name in ("export", "compact", "meshopt")}
+    writers = {
+        "export": lambda: scene.export(paths["export"]),
+        "compact": lambda: write_glb(scene, paths["compact"]),
+        "meshopt": lambda: write_glb(scene, paths["meshopt"], meshopt=True),
+    }
+    for name, writer in writers.items():
+        _, write_time = timed(writer)
+        with open(paths[name], "rb") as fh:
+            data = fh.read()
+        load = "-"
+        if name != "meshopt":
+            _, load_time = timed(lambda: trimesh.load(paths[name], force="scene"))
+            load = f"{load_time:6.3f}s"
+        print(f"  {name:<8} {len(data):>10} bytes  gzip {len(gzip.compress(data)):>9}  "
+              f"write {write_time:6.3f}s  load {load}")
+    check_quantized(scene, paths["compact"])
+    checked = check_meshopt(paths["meshopt"], paths["compact"])
+    print(f"  quantization ok, {checked} meshopt views decode correctly")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the compact GLB writer")
+    parser.add_argument("--models", default="models", help="directory of GLB files to rewrite")
+    parser.add_argument("--commits", type=int, default=0,
+                        help="also build every mode from this many synthetic commits")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for path in sorted(glob.glob(os.path.join(args.models, "*.glb"))):
+            compare(path, trimesh.load(path, force="scene"), workdir)
+        if args.commits:
+            commits = make_commits(args.commits, end=1_700_000_000)
+            patterns = detect_patterns(commits)
+            for mode, build in BUILDERS.items():
+                compare(f"{mode} ({args.commits} synthetic commits)", build(commits, patterns), workdir)
+
+
+if __name__ == "__main__":
+    main()
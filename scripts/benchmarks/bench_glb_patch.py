@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Compare the ``trimesh`` and memory-mapped paths of ``commit_randomizer``.
+
+A synthetic sculpture is written with ``scene.export`` for every requested
+mode, batched and unbatched, and ``--generations`` generations are produced
+from it twice, each in a fresh process so that its peak RSS can be read:
+
+- ``trimesh``: load the scene, ``randomize_object`` and ``scene.export``
+  every generation (the randomizer before the GLB patcher);
+- ``patch``: :func:`commit_randomizer.run_generations`, which maps the file
+  and only rewrites the positions.
+
+Both use the same seeds, so the last generations must agree: the same
+meshes in the same order, identical faces and vertex colors, and positions
+within float32 rounding (``--atol``).
+
+Example usage:
+  python scripts/benchmarks/bench_glb_patch.py --commits 20000 --generations 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from commit_table import CommitTable  # noqa: E402
+from generate_enhanced_sculpture import BUILDERS  # noqa: E402
+from patterns import detect_patterns  # noqa: E402
+from synthetic import make_commits  # noqa: E402
+
+
+def _peak_mb() -> float:
+    # ru_maxrss survives the fork and exec that start a spawned worker, VmHWM does not
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def generate(method: str, directory: str, generations: int, seed: int) -> Tuple[float, float]:
+    """Return seconds and peak RSS (MB) for ``generations`` generations in ``directory``."""
+    import trimesh
+
+    from commit_randomizer import generation_rng, randomize_object, run_generations
+
+    os.chdir(directory)
+    path = os.path.join("models", "commit_sculpture.glb")
+    start = time.perf_counter()
+    if method == "patch":
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_generations(path, 0, generations, seed)
+    else:
+        scene = trimesh.load(path)
+        for number in range(1, generations + 1):
+            randomize_object(scene, generation_rng(seed, number))
+            scene.export(os.path.join("models", f"commit_sculpture_gen{number}.glb"))
+    return time.perf_counter() - start, _peak_mb()
+
+
+def in_fresh_process(*args) -> Tuple[float, float]:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(generate, args)
+
+
+def compare(expected_path: str, actual_path: str, atol: float) -> float:
+    """Check that two generations agree; return the largest position difference."""
+    import trimesh
+
+    expected = list(trimesh.load(expected_path, force="scene").geometry.values())
+    actual = list(trimesh.load(actual_path, force="scene").geometry.values())
+    if len(expected) != len(actual):
+        raise AssertionError(f"{len(expected)} meshes, expected {len(actual)}")
+    worst = 0.0
+    for mesh, other in zip(expected, actual):
+        if not np.array_equal(mesh.faces, other.faces):
+            raise AssertionError("faces differ")
+        if not np.array_equal(mesh.visual.vertex_colors, other.visual.vertex_colors):
+            raise AssertionError("vertex colors differ")
+        difference = float(np.abs(mesh.vertices - other.vertices).max(initial=0.0))
+        if difference > atol:
+            raise AssertionError(f"positions differ by {difference}")
+        worst = max(worst, difference)
+    return worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped GLB patcher")
+    parser.add_argument("--commits", type=int, default=20_000)
+    parser.add_argument("--modes", nargs="+", choices=list(BUILDERS), default=["organic", "crystalline"])
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--atol", type=float, default=1e-4,
+                        help="largest accepted position difference between the two paths")
+    args = parser.parse_args()
+
+    table = CommitTable.from_commits(make_commits(args.commits, end=1_700_000_000))
+    patterns = detect_patterns(table)
+    print(f"{args.commits} commits, {args.generations} generations")
+    print(f"{'mode':<12} {'batched':<8} {'method':<8} {'time s':>8} {'peak MB':>8} {'max diff':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            for batched in (True, False):
+                directories = {}
+                for method in ("trimesh", "patch"):
+                    directory = os.path.join(tmp, f"{mode}_{batched}_{method}")
+                    os.makedirs(os.path.join(directory, "models"))
+                    directories[method] = directory
+                BUILDERS[mode](table, patterns, batched).export(
+                    os.path.join(directories["trimesh"], "models", "commit_sculpture.glb"))
+                os.link(os.path.join(directories["trimesh"], "models", "commit_sculpture.glb"),
+                        os.path.join(directories["patch"], "models", "commit_sculpture.glb"))
+
+                last = os.path.join("models", f"commit_sculpture_gen{args.generations}.glb")
+                results = {}
+                for method, directory in directories.items():
+                    results[method] = in_fresh_process(method, directory, args.generations, args.seed)
+                difference = compare(os.path.join(directories["trimesh"], last),
+                                     os.path.join(directories["patch"], last), args.atol)
+                for method, (elapsed, peak) in results.items():
+                    print(f"{mode:<12} {str(batched):<8} {method:<8} {elapsed:>8.2f} {peak:>8.0f} "
+                          f"{difference:>10.2e}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare streaming ``git log`` ingestion with one ``git show`` per commit.
+
+With ``--jobs`` the sharded reader is timed for each job count as well and
+checked against the single stream. ``git rev-list`` and every shard are also
+timed one after the other. Shards run while ``rev-list`` is still listing,
+so with N idle cores the wall time approaches the largest of the
+``rev-list`` time, the slowest shard and the summed shard time divided by
+N, where N is capped at the number of shards. That estimate is printed next
+to the measured time, which on a machine with fewer cores than jobs cannot
+show the speedup.
+
+Example usage:
+  python scripts/benchmarks/bench_ingest.py --commits 10000
+  python scripts/benchmarks/bench_ingest.py --commits 200000 --days 3650 \\
+    --skip-legacy --jobs 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import git_ingest  # noqa: E402
+from git_ingest import fetch_commits_per_commit, fetch_commits_streaming  # noqa: E402
+from synthetic import make_repo  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark git ingestion paths")
+    parser.add_argument("--commits", type=int, default=10000, help="synthetic commits to create")
+    parser.add_argument("--days", type=int, default=90, help="history window in days")
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the streaming path")
+    parser.add_argument("--jobs", type=int, nargs="*", default=[],
+                        help="also time sharded ingestion with these job counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = os.path.join(tmp, "repo")
+        _, build_time = timed(make_repo, repo, args.commits, args.days)
+        print(f"Synthetic repo with {args.commits} commits built in {build_time:.2f}s")
+
+        streamed, stream_time = timed(fetch_commits_streaming, repo, args.days)
+        print(f"streaming git log : {len(streamed):6d} commits in {stream_time:8.3f}s")
+
+        if args.jobs:
+            shards, list_time = timed(list, git_ingest.iter_commit_shards(
+                repo, git_ingest.since_date(args.days)))
+            shard_times = [timed(git_ingest.read_shard, repo, shard)[1] for shard in shards]
+            shard_time, slowest = sum(shard_times), max(shard_times, default=0.0)
+            print(f"rev-list {list_time:.3f}s, {len(shards)} shards {shard_time:.3f}s in total, "
+                  f"slowest {slowest:.3f}s")
+        for jobs in args.jobs:
+            sharded, sharded_time = timed(fetch_commits_streaming, repo, args.days, jobs)
+            if sharded != streamed:
+                raise SystemExit(f"Sharded ingestion with {jobs} jobs disagrees")
+            workers = max(1, min(jobs, len(shards)))
+            ideal = max(list_time, slowest, shard_time / workers)
+            print(f"{jobs:2d} jobs: {sharded_time:8.3f}s here, about {ideal:.3f}s "
+                  f"with {workers} idle cores ({stream_time / ideal:.1f}x)")
+
+        if args.skip_legacy:
+            return
+        legacy, legacy_time = timed(fetch_commits_per_commit, repo, args.days)
+        print(f"git show per commit: {len(legacy):6d} commits in {legacy_time:8.3f}s")
+        print(f"speedup: {legacy_time / stream_time:.1f}x")
+        if streamed != legacy:
+            raise SystemExit("Ingestion paths disagree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Check vectorized ``detect_patterns`` against the original loops and time both.
+
+The equivalence check runs the reference implementation and the vectorized
+one on many random commit sets (duplicate timestamps, dense and sparse
+histories, several burst windows) and fails on the first difference.
+
+Example usage:
+  python scripts/benchmarks/bench_patterns.py --commits 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from commit_table import CommitTable  # noqa: E402
+from git_ingest import make_commit  # noqa: E402
+from patterns import detect_patterns  # noqa: E402
+from synthetic import make_commits  # noqa: E402
+
+REFERENCE_KEYS = ("hour_distribution", "bursts", "human_ratio", "automation_ratio",
+                  "avg_impact", "peak_hour", "total_changes")
+
+
+def reference_patterns(commits, burst_window=3600):
+    """The original per-commit implementation of ``detect_patterns``."""
+    if not commits:
+        return {}
+
+    hour_counts = defaultdict(int)
+    for c in commits:
+        hour_counts[c.hour] += 1
+
+    sorted_commits = sorted(commits, key=lambda c: c.timestamp)
+    bursts = []
+    i = 0
+    while i < len(sorted_commits):
+        burst_size = 1
+        while (i + burst_size < len(sorted_commits) and
+               sorted_commits[i + burst_size].timestamp - sorted_commits[i].timestamp < burst_window):
+            burst_size += 1
+        if burst_size >= 3:
+            bursts.append((i, burst_size))
+        i += burst_size
+
+    human_commits = sum(1 for c in commits if c.is_human)
+    auto_commits = len(commits) - human_commits
+    total_changes = sum(c.additions + c.deletions for c in commits)
+    avg_change = total_changes / len(commits) if commits else 0
+    peak_hour = max(hour_counts.items(), key=lambda x: x[1])[0] if hour_counts else 12
+
+    return {
+        "hour_distribution": dict(hour_counts),
+        "bursts": bursts,
+        "human_ratio": human_commits / len(commits) if commits else 0.5,
+        "automation_ratio": auto_commits / len(commits) if commits else 0.5,
+        "avg_impact": avg_change,
+        "peak_hour": peak_hour,
+        "total_changes": total_changes
+    }
+
+
+def random_commits(rng: random.Random):
+    count = rng.choice([0, 1, 2, 3, 5, 20, 200])
+    spread = rng.choice([60, 3600, 86400, 30 * 86400])
+    base = 1_700_000_000
+    names = ["ada", "ben", "ci-bot", "github-actions"]
+    return [make_commit(f"{rng.getrandbits(64):016x}", rng.choice(names),
+                        base + rng.randrange(spread), "m",
+                        rng.randint(0, 5), rng.randint(0, 50), rng.randint(0, 50))
+            for _ in range(count)]
+
+
+def check_equivalence(cases: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    for case in range(cases):
+        commits = random_commits(rng)
+        window = rng.choice([1, 60, 600, 3600, 7200])
+        expected = reference_patterns(commits, window)
+        actual = detect_patterns(commits, burst_window=window)
+        actual = {key: actual[key] for key in REFERENCE_KEYS if key in actual}
+        if expected != actual or list(expected.get("hour_distribution", {})) != \
+                list(actual.get("hour_distribution", {})):
+            raise SystemExit(f"Mismatch in case {case}:\n{expected}\n{actual}")
+    print(f"{cases} random cases match the reference implementation")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pattern detection")
+    parser.add_argument("--commits", type=int, default=1000000, help="synthetic commits to time")
+    parser.add_argument("--cases", type=int, default=500, help="random equivalence cases")
+    args = parser.parse_args()
+
+    check_equivalence(args.cases)
+
+    commits = make_commits(args.commits, days=365 * 3)
+    table = CommitTable.from_commits(commits, keep_messages=False)
+
+    start = time.perf_counter()
+    expected = reference_patterns(commits)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = detect_patterns(table)
+    vector_time = time.perf_counter() - start
+
+    if any(expected[key] != actual[key] for key in REFERENCE_KEYS):
+        raise SystemExit("Vectorized result differs from the reference")
+    print(f"reference : {reference_time:8.3f}s")
+    print(f"vectorized: {vector_time:8.3f}s ({reference_time / vector_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
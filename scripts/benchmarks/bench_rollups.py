@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Check the rollup index against the per-commit code and time both.
+
+- ``commits_by_day`` on API payloads: the previous dict loop with one
+  ``timedelta`` per backfilled day against ``datetime64`` binning;
+- pattern statistics: ``detect_patterns`` on the table against
+  ``rollup_patterns`` on a stored index, and ``detect_patterns`` with and
+  without the index, hour order and ``peak_hour`` ties included;
+- an incremental update adding the newest ``--update`` commits and dropping
+  as many of the oldest, against rebuilding the index;
+- the same with only ``--delta`` commits on a history spread over
+  ``--authors`` authors, where the (day, author) table is large;
+- a ``--range-days`` range query against masking the table.
+
+Every pair of results is compared and the script exits with status 1 on the
+first difference.
+
+Example usage:
+  python scripts/benchmarks/bench_rollups.py --commits 1000000 --days 365
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from commit_cache import records_table  # noqa: E402
+from commit_table import CommitTable  # noqa: E402
+from git_ingest import make_commit  # noqa: E402
+from generate_commit_sculpture import commits_by_day, daily_counts  # noqa: E402
+from patterns import detect_patterns, rollup_patterns  # noqa: E402
+from rollups import Rollups  # noqa: E402
+from stub_github import make_api_commits  # noqa: E402
+from synthetic import make_commits  # noqa: E402
+
+
+def commits_by_day_loop(commits: list[dict], days: int) -> dict[str, int]:
+    """``commits_by_day`` before the rollup index."""
+    counts: defaultdict[str, int] = defaultdict(int)
+    for c in commits:
+        counts[c["commit"]["committer"]["date"][:10]] += 1
+    today = datetime.datetime.utcnow().date()
+    for offset in range(days):
+        counts.setdefault((today - datetime.timedelta(days=offset)).isoformat(), 0)
+    return dict(sorted(counts.items()))
+
+
+def timed(func: Callable, *args) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def check(name: str, expected, actual) -> None:
+    if expected != actual:
+        sys.exit(f"{name}: the rollup index gives a different result")
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(f"{name:<44} {before:>9.4f} {after:>9.4f} {before / max(after, 1e-9):>8.1f}x")
+
+
+def many_authors(table: CommitTable, count: int) -> CommitTable:
+    """Return ``table`` with its commits spread randomly over ``count`` authors."""
+    wide = table.take(np.arange(len(table)))
+    wide.authors = [f"author-{i}" for i in range(count)]
+    wide.author_id = np.random.default_rng(0).integers(0, count, len(table)).astype(
+        table.author_id.dtype)
+    return wide
+
+
+def without_bursts(patterns: Dict) -> Dict:
+    return {key: value for key, value in patterns.items() if key != "bursts"}
+
+
+def in_hour_order(patterns: Dict) -> Dict:
+    """Order the hours as ``rollup_patterns`` does, which ties ``peak_hour`` to the earliest hour."""
+    hours = dict(sorted(patterns["hour_distribution"].items()))
+    return dict(without_bursts(patterns), hour_distribution=hours,
+                peak_hour=max(hours.items(), key=lambda x: x[1])[0])
+
+
+def check_order(name: str, expected: Dict, actual: Dict) -> None:
+    check(name, expected, actual)
+    if list(expected["hour_distribution"]) != list(actual["hour_distribution"]):
+        sys.exit(f"{name}: the rollup index orders the hours differently")
+
+
+def check_peak_tie() -> None:
+    """Hours 20 and 3 with as many commits each: the first to appear is the peak."""
+    commits = [make_commit(f"{i:040x}", "ada", int(datetime.datetime(2024, 1, 2, hour).timestamp()),
+                           "m", 1, 1, 1)
+               for i, hour in enumerate([20, 3, 20, 3])]
+    table = CommitTable.from_commits(commits)
+    expected = detect_patterns(table, aggregates=True)
+    actual = detect_patterns(table, rollups=Rollups.from_table(table), aggregates=True)
+    check_order("peak_hour tie", expected, actual)
+    if actual["peak_hour"] != 20:
+        sys.exit("peak_hour tie: the first hour to appear is not the peak")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the rollup index")
+    parser.add_argument("--commits", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365, help="days spanned by the history")
+    parser.add_argument("--update", type=int, default=1000, help="commits added and dropped")
+    parser.add_argument("--delta", type=int, default=10,
+                        help="commits added and dropped on the many-author history")
+    parser.add_argument("--authors", type=int, default=2000,
+                        help="authors of the many-author history")
+    parser.add_argument("--range-days", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{args.commits} commits over {args.days} days")
+    print(f"{'':<44} {'before s':>9} {'after s':>9} {'speedup':>9}")
+
+    api = make_api_commits(args.commits, days=args.days)
+    loop_time, expected = timed(commits_by_day_loop, api, args.days + 1)
+    rollup_time, actual = timed(commits_by_day, api, args.days + 1)
+    check("commits_by_day", expected, actual)
+    report("commits_by_day", loop_time, rollup_time)
+    rollups = Rollups.from_table(records_table(api))
+    stored_time, actual = timed(daily_counts, rollups, args.days + 1)
+    check("daily_counts", expected, actual)
+    report("commits_by_day / daily_counts (stored index)", loop_time, stored_time)
+
+    table = CommitTable.from_commits(make_commits(args.commits, days=args.days, end=1_700_000_000),
+                                     keep_messages=False)
+    newest_first = table.take(np.argsort(-table.timestamp, kind="stable"))
+    rest = newest_first.take(np.arange(args.update, len(table)))
+    old = rest.take(np.arange(len(rest) - args.update, len(rest)))
+    kept = rest.take(np.arange(len(rest) - args.update))
+    new = newest_first.take(np.arange(args.update))
+    current = CommitTable.concat([new, kept])
+
+    build_time, index = timed(Rollups.from_table, rest)
+    detect_time, expected = timed(lambda: detect_patterns(rest, aggregates=True))
+    rollup_time, actual = timed(lambda: rollup_patterns(index, aggregates=True))
+    check("detect_patterns", in_hour_order(expected), actual)
+    report("detect_patterns / rollup_patterns", detect_time, rollup_time)
+    check_order("detect_patterns with the index", expected,
+                detect_patterns(rest, rollups=index, aggregates=True))
+    check_peak_tie()
+    print(f"{'  building the index':<44} {'':>9} {build_time:>9.4f}")
+
+    def update() -> Rollups:
+        index.remove(old)
+        index.add(new)
+        return index
+
+    rebuild_time, rebuilt = timed(Rollups.from_table, current)
+    update_time, updated = timed(update)
+    check("incremental update", rebuilt.summary(), updated.summary())
+    report(f"rebuild / update (+{args.update} -{args.update})", rebuild_time, update_time)
+
+    wide = many_authors(current, args.authors)
+    delta = args.delta
+    wide_index = Rollups.from_table(wide.take(np.arange(delta, len(wide))))
+
+    def small_update() -> Rollups:
+        wide_index.remove(wide.take(np.arange(len(wide) - delta, len(wide))))
+        wide_index.add(wide.take(np.arange(delta)))
+        return wide_index
+
+    rebuild_time, rebuilt = timed(Rollups.from_table, wide.take(np.arange(len(wide) - delta)))
+    update_time, updated_wide = timed(small_update)
+    check("small update", rebuilt.summary(), updated_wide.summary())
+    check("small update rows", len(rebuilt.author_key), len(updated_wide.author_key))
+    report(f"{len(rebuilt.author_key)} author rows: rebuild / +{delta} -{delta}",
+           rebuild_time, update_time)
+
+    end = np.datetime64(int(current.timestamp.max()), "s").astype("datetime64[D]")
+    start = end - (args.range_days - 1)
+
+    def masked() -> Dict:
+        lo = start.astype("datetime64[s]").astype(np.int64)
+        hi = (end + 1).astype("datetime64[s]").astype(np.int64)
+        inside = (current.timestamp >= lo) & (current.timestamp < hi)
+        return in_hour_order(detect_patterns(current.take(inside), aggregates=True))
+
+    mask_time, expected = timed(masked)
+    range_time, actual = timed(lambda: rollup_patterns(updated, start, end, aggregates=True))
+    check("range query", expected, actual)
+    report(f"{args.range_days}-day range: mask + detect / query", mask_time, range_time)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rollups.npz")
+        save_time, _ = timed(updated.save, path)
+        load_time, loaded = timed(Rollups.load, path)
+        check("save and load", updated.summary(), loaded.summary())
+        print(f"index file {os.path.getsize(path) / 1024:.0f} KB, "
+              f"save {save_time:.4f} s, load {load_time:.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Measure the start-up cost of the command line entry points.
+
+Every command runs in a fresh interpreter, best of ``--repeat`` runs:
+
+- ``python -c pass`` and importing ``numpy``, ``trimesh`` and ``requests``
+  eagerly (what every script used to pay before doing anything);
+- ``--help`` of the generators and of ``sculpt``;
+- ``sculpt analyze`` and an up-to-date ``sculpt build`` on a synthetic
+  repository, after a first build has written the outputs.
+
+Each line also shows whether ``trimesh`` and ``requests`` were actually
+loaded, read from ``python -X importtime``.
+
+Example usage:
+  python scripts/benchmarks/bench_startup.py --commits 2000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from synthetic import make_repo  # noqa: E402
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ("trimesh", "requests")
+
+
+def loaded_heavy(command: List[str], cwd: str) -> List[str]:
+    """Return the heavy modules that ``command`` imports."""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + command, cwd=cwd,
+                            capture_output=True, text=True, check=True)
+    modules = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()
+               if line.startswith("import time:")}
+    return [name for name in HEAVY if name in modules]
+
+
+def best_time(command: List[str], cwd: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + command, cwd=cwd, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark command start-up times")
+    parser.add_argument("--commits", type=int, default=2000, help="size of the synthetic repository")
+    parser.add_argument("--repeat", type=int, default=5, help="best of this many runs")
+    args = parser.parse_args()
+
+    sculpt = os.path.join(SCRIPTS, "sculpt.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = make_repo(os.path.join(tmp, "repo"), args.commits, days=30)
+        os.makedirs(os.path.join(tmp, "models"))
+        build = [sculpt, "build", "--repo-path", repo, "--days", "31", "--mode", "all",
+                 "--batched", "--cache-dir", ".sculpture_cache", "--jobs", "1"]
+        subprocess.run([sys.executable] + build, cwd=tmp, stdout=subprocess.DEVNULL, check=True)
+
+        commands: List[Tuple[str, List[str]]] = [
+            ("python -c pass", ["-c", "pass"]),
+            ("import numpy, trimesh, requests", ["-c", "import numpy, trimesh, requests"]),
+            ("generate_enhanced_sculpture --help",
+             [os.path.join(SCRIPTS, "generate_enhanced_sculpture.py"), "--help"]),
+            ("generate_commit_sculpture --help",
+             [os.path.join(SCRIPTS, "generate_commit_sculpture.py"), "--help"]),
+            ("sculpt --help", [sculpt, "--help"]),
+            ("sculpt build --help", [sculpt, "build", "--help"]),
+            ("sculpt analyze (cached)", [sculpt, "analyze", "--repo-path", repo, "--days", "31",
+                                         "--cache-dir", ".sculpture_cache"]),
+            ("sculpt build (up to date)", build),
+        ]
+        print(f"{'command':<38} {'best s':>8}  loads")
+        for name, command in commands:
+            elapsed = best_time(command, tmp, args.repeat)
+            heavy = ", ".join(loaded_heavy(command, tmp)) or "-"
+            print(f"{name:<38} {elapsed:>8.3f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Compare ``scene.export`` with building straight into :class:`GlbStream`.
+
+For every mode, batched and unbatched, the sculpture is built and written
+once with ``scene.export`` and once through the streaming writer, each in a
+fresh process so that its peak RSS can be read. Both files are loaded back
+with ``trimesh`` and their triangles (positions and vertex colors, with node
+transforms applied) compared as sets; the streaming writer may split a
+batched class into several primitives, which changes the vertex order but
+not the geometry.
+
+The comparison loads both files in full, so it only runs up to
+``--check-limit`` commits. Unbatched ``scene.export`` creates one node per
+commit and is slow at 100k commits; ``--skip-unbatched-export`` leaves it
+out.
+
+Example usage:
+  python scripts/benchmarks/bench_stream_glb.py --commits 100000 --modes organic chaotic
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from commit_table import CommitTable  # noqa: E402
+from generate_enhanced_sculpture import BUILDERS  # noqa: E402
+from glb_stream import GlbStream  # noqa: E402
+from patterns import detect_patterns  # noqa: E402
+from synthetic import make_commits  # noqa: E402
+
+
+def _peak_mb() -> float:
+    # ru_maxrss survives the fork and exec that start a spawned worker, VmHWM does not
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_and_write(writer: str, mode: str, batched: bool, commits: int,
+                    path: str) -> Tuple[float, float, float]:
+    """Return seconds, peak RSS before building and peak RSS after writing (MB)."""
+    table = CommitTable.from_commits(make_commits(commits, end=1_700_000_000))
+    patterns = detect_patterns(table)
+    before = _peak_mb()
+    start = time.perf_counter()
+    if writer == "export":
+        BUILDERS[mode](table, patterns, batched).export(path)
+    else:
+        with GlbStream(path) as stream:
+            BUILDERS[mode](table, patterns, batched, stream)
+    return time.perf_counter() - start, before, _peak_mb()
+
+
+def in_fresh_process(*args) -> Tuple[float, float, float]:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(build_and_write, args)
+
+
+def triangles(path: str) -> np.ndarray:
+    """Return every triangle as a sorted-comparable row of positions and colors."""
+    import trimesh
+
+    rows = []
+    for mesh in trimesh.load(path, force="scene").dump():
+        corners = np.round(mesh.vertices[mesh.faces].reshape(-1, 9), 4)
+        colors = mesh.visual.vertex_colors[mesh.faces].reshape(-1, 12).astype(np.float64)
+        rows.append(np.hstack([corners, colors]))
+    rows = np.concatenate(rows)
+    return rows[np.lexsort(rows.T[::-1])]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the streaming GLB writer")
+    parser.add_argument("--commits", type=int, default=100_000)
+    parser.add_argument("--modes", nargs="+", choices=list(BUILDERS), default=list(BUILDERS))
+    parser.add_argument("--check-limit", type=int, default=20_000,
+                        help="compare the geometry of both files up to this many commits")
+    parser.add_argument("--skip-unbatched-export", action="store_true",
+                        help="do not run scene.export on unbatched scenes")
+    args = parser.parse_args()
+
+    print(f"{args.commits} commits")
+    print(f"{'mode':<12} {'batched':<8} {'writer':<8} {'time s':>8} {'base MB':>8} "
+          f"{'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            for batched in (True, False):
+                paths: List[str] = []
+                for writer in ("export", "stream"):
+                    if writer == "export" and not batched and args.skip_unbatched_export:
+                        continue
+                    path = os.path.join(tmp, f"{mode}_{batched}_{writer}.glb")
+                    elapsed, before, peak = in_fresh_process(writer, mode, batched, args.commits, path)
+                    paths.append(path)
+                    print(f"{mode:<12} {str(batched):<8} {writer:<8} {elapsed:>8.2f} {before:>8.0f} "
+                          f"{peak:>8.0f} {os.path.getsize(path) / 2**20:>8.1f}", flush=True)
+                if len(paths) < 2 or args.commits > args.check_limit:
+                    continue
+                if not np.array_equal(triangles(paths[0]), triangles(paths[1])):
+                    sys.exit(f"{mode} (batched={batched}): the streamed file has different geometry")
+
+
+if __name__ == "__main__":
+    main()
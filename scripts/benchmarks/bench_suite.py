@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark suite with a JSON baseline and a regression check.
+
+For every size in ``--sizes`` (default 1k, 10k and 100k commits; add
+1000000 for the full run) the suite
+
+- creates a synthetic repository with ``git fast-import`` and times
+  ``fetch_detailed_commits_from_git`` on it;
+- serves synthetic API commits from the local stub server and times
+  ``fetch_commits`` and ``commits_by_day``;
+- builds a synthetic ``CommitData`` set and times ``CommitTable``
+  conversion, ``detect_patterns``, every ``build_*_sculpture`` (batched),
+  ``scene.export`` of each scene and ``randomize_object`` on the organic
+  scene.
+
+Stages are measured with :mod:`profiling` (wall time, CPU time, peak RSS).
+``--output`` writes the results as JSON. ``--baseline`` compares them with
+an earlier result file and exits with status 1 when a stage got slower than
+``--threshold`` (relative) and ``--min-delta`` (seconds) at once;
+``--update-baseline`` then stores the new results as the baseline.
+Repositories are kept in ``--workdir`` if given, so later runs skip
+creating them.
+
+Example usage:
+  python scripts/benchmarks/bench_suite.py --output timings.json
+  python scripts/benchmarks/bench_suite.py --baseline baseline.json --threshold 0.3
+  python scripts/benchmarks/bench_suite.py --sizes 1000 10000 100000 1000000 \\
+    --workdir /tmp/sculpture-bench --baseline baseline.json --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import profiling  # noqa: E402
+from commit_randomizer import generation_rng, randomize_object  # noqa: E402
+from commit_table import CommitTable  # noqa: E402
+from generate_commit_sculpture import commits_by_day, fetch_commits  # noqa: E402
+from generate_enhanced_sculpture import BUILDERS, fetch_detailed_commits_from_git  # noqa: E402
+from patterns import detect_patterns  # noqa: E402
+from stub_github import StubGitHub, make_api_commits  # noqa: E402
+from synthetic import make_commits, make_repo  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DAYS = 30
+
+
+def git_stages(size: int, workdir: str) -> None:
+    path = os.path.join(workdir, f"repo-{size}")
+    if not os.path.isdir(os.path.join(path, ".git")):
+        make_repo(path, size, days=DAYS)
+    with profiling.stage(f"{size}/fetch_detailed_commits_from_git"):
+        commits = fetch_detailed_commits_from_git(path, DAYS + 1)
+    if len(commits) != size:
+        sys.exit(f"git ingestion returned {len(commits)} of {size} commits")
+
+
+def api_stages(size: int) -> None:
+    with StubGitHub(make_api_commits(size, days=DAYS)) as stub:
+        with profiling.stage(f"{size}/fetch_commits"):
+            commits = fetch_commits("o", "r", None, DAYS + 1, base_url=stub.url)
+    with profiling.stage(f"{size}/commits_by_day"):
+        counts = commits_by_day(commits, DAYS + 1)
+    if sum(counts.values()) != size:
+        sys.exit(f"the API fetch returned {sum(counts.values())} of {size} commits")
+
+
+def model_stages(size: int, workdir: str) -> None:
+    commits = make_commits(size, days=DAYS, end=1_700_000_000)
+    with profiling.stage(f"{size}/commit_table"):
+        table = CommitTable.from_commits(commits)
+    with profiling.stage(f"{size}/detect_patterns"):
+        patterns = detect_patterns(table)
+    for mode, build in BUILDERS.items():
+        with profiling.stage(f"{size}/build_{mode}_sculpture"):
+            scene = build(table, patterns, batched=True)
+        with profiling.stage(f"{size}/export:{mode}"):
+            scene.export(os.path.join(workdir, f"{mode}.glb"))
+        if mode == "organic":
+            with profiling.stage(f"{size}/randomize_object"):
+                randomize_object(scene, generation_rng(0, 1))
+
+
+def run_suite(sizes: List[int], workdir: str) -> None:
+    for size in sizes:
+        print(f"{size} commits...", flush=True)
+        git_stages(size, workdir)
+        api_stages(size)
+        model_stages(size, workdir)
+
+
+def results_from(stages: List[Dict[str, object]]) -> Dict[str, object]:
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "stages": {record["name"]: {key: record[key] for key in ("wall_s", "cpu_s", "peak_rss_mb")}
+                   for record in stages},
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta: float) -> List[str]:
+    """Print current against baseline times and return the regressed stages."""
+    regressions = []
+    print(f"{'stage':<44} {'baseline':>9} {'current':>9} {'change':>8}")
+    for name, current in results["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if before is None:
+            print(f"{name:<44} {'-':>9} {current['wall_s']:>8.3f}s {'new':>8}")
+            continue
+        delta = current["wall_s"] - before["wall_s"]
+        change = delta / before["wall_s"] if before["wall_s"] else 0.0
+        regressed = change > threshold and delta > min_delta
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<44} {before['wall_s']:>8.3f}s {current['wall_s']:>8.3f}s "
+              f"{change:>+7.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the synthetic-history benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="history sizes in commits")
+    parser.add_argument("--workdir", help="keep synthetic repositories here between runs")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with this earlier result file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        _, stages = profiling.run_profiled(run_suite, args.sizes, workdir)
+    results = results_from(stages)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    regressions: List[str] = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.threshold, args.min_delta)
+    else:
+        for name, stage in results["stages"].items():
+            print(f"{name:<44} {stage['wall_s']:>8.3f}s  cpu {stage['cpu_s']:>8.3f}s  "
+                  f"peak {stage['peak_rss_mb']} MB")
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    if regressions:
+        sys.exit(f"{len(regressions)} stage(s) regressed beyond {args.threshold:.0%}: "
+                 f"{', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Time ``--watch`` rebuilds against one-shot runs after each new commit.
+
+Builds a synthetic repository, renders it once and then, for ``--rounds``
+rounds, adds a commit and measures:
+
+- the watch path: :class:`watch.RefWatcher` noticing the commit (one poll
+  interval of quiet included) and the in-memory rebuild of
+  :func:`generate_enhanced_sculpture.render_history` after
+  :meth:`watch.LiveHistory.refresh`;
+- a one-shot ``generate_enhanced_sculpture.py --cache-dir`` process, which
+  is what a post-commit hook would otherwise run.
+
+Both write to their own directory and the build digests are compared after
+every round; the script exits with status 1 if they differ.
+
+Example usage:
+  python scripts/benchmarks/bench_watch.py --commits 10000 --mode organic crystalline
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from build_manifest import read_manifest  # noqa: E402
+from compact_glb import WRITERS  # noqa: E402
+from generate_enhanced_sculpture import (BUILDERS, RenderOptions,  # noqa: E402
+                                         output_path, render_history)
+from synthetic import make_repo  # noqa: E402
+from tiles import PERIODS  # noqa: E402
+from watch import LiveHistory, RefWatcher  # noqa: E402
+
+SCRIPT = os.path.join(HERE, "..", "generate_enhanced_sculpture.py")
+
+
+def add_commit(repo: str, number: int) -> None:
+    """Commit the tree of ``main`` again on top of it, without a working tree."""
+    env = dict(os.environ, GIT_AUTHOR_NAME="Bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="Bench", GIT_COMMITTER_EMAIL="bench@example.com")
+    sha = subprocess.run(["git", "-C", repo, "commit-tree", "main^{tree}", "-p", "main",
+                          "-m", f"watch benchmark {number}"],
+                         capture_output=True, text=True, check=True, env=env).stdout.strip()
+    subprocess.run(["git", "-C", repo, "update-ref", "refs/heads/main", sha], check=True)
+
+
+def digests(outputs: List[str]) -> List[str]:
+    return [(read_manifest(output) or {}).get("digest", "") for output in outputs]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark --watch rebuilds")
+    parser.add_argument("--commits", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=30, help="days spanned by the history")
+    parser.add_argument("--mode", nargs="+", choices=list(BUILDERS), default=["organic"])
+    parser.add_argument("--batched", action="store_true")
+    parser.add_argument("--glb-writer", choices=WRITERS, default="trimesh")
+    parser.add_argument("--tiles", choices=PERIODS)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=0.05, help="watcher poll interval")
+    args = parser.parse_args()
+
+    options = RenderOptions(batched=args.batched, writer=args.glb_writer, tiles=args.tiles)
+    multiple = len(args.mode) > 1
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = make_repo(os.path.join(tmp, "repo"), args.commits, days=args.days - 1)
+        watch_dir, cold_dir = os.path.join(tmp, "watch"), os.path.join(tmp, "cold")
+        os.makedirs(watch_dir)
+        os.makedirs(cold_dir)
+        watch_outputs = [output_path(os.path.join(watch_dir, "s.glb"), mode, multiple)
+                         for mode in args.mode]
+        cold_outputs = [output_path(os.path.join(cold_dir, "s.glb"), mode, multiple)
+                        for mode in args.mode]
+        cold_cmd = [sys.executable, SCRIPT, "--repo-path", repo, "--days", str(args.days),
+                    "--mode", *args.mode, "--output", os.path.join(cold_dir, "s.glb"),
+                    "--cache-dir", os.path.join(tmp, "cache"), "--jobs", "1",
+                    "--glb-writer", args.glb_writer]
+        if args.batched:
+            cold_cmd.append("--batched")
+        if args.tiles:
+            cold_cmd.extend(["--tiles", args.tiles])
+
+        watcher = RefWatcher(repo, args.interval)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            history = LiveHistory(repo, args.days, period=args.tiles)
+            render_history(history.table, history.rollups, args.mode, watch_outputs, options)
+        first = time.perf_counter() - start
+        subprocess.run(cold_cmd, check=True, capture_output=True)
+        print(f"{len(history.table)} commits, modes {', '.join(args.mode)}, "
+              f"{args.glb_writer} writer{', batched' if args.batched else ''}"
+              f"{f', {args.tiles} tiles' if args.tiles else ''}; "
+              f"first render {first:.2f} s")
+        print(f"{'round':>5} {'notice ms':>10} {'rebuild ms':>11} {'one-shot ms':>12}")
+
+        rebuilds, colds = [], []
+        for number in range(1, args.rounds + 1):
+            committed = time.perf_counter()
+            add_commit(repo, number)
+            watcher.wait()
+            noticed = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                history.refresh()
+                render_history(history.table, history.rollups, args.mode, watch_outputs, options)
+            rebuilt = time.perf_counter()
+
+            subprocess.run(cold_cmd, check=True, capture_output=True)
+            cold = time.perf_counter() - rebuilt
+            if digests(watch_outputs) != digests(cold_outputs):
+                sys.exit(f"round {number}: the watch and one-shot builds differ")
+            rebuilds.append(rebuilt - noticed)
+            colds.append(cold)
+            print(f"{number:>5} {(noticed - committed) * 1000:>10.0f} "
+                  f"{(rebuilt - noticed) * 1000:>11.0f} {cold * 1000:>12.0f}")
+
+        rebuilds.sort()
+        colds.sort()
+        median = len(rebuilds) // 2
+        print(f"median rebuild {rebuilds[median] * 1000:.0f} ms, "
+              f"one-shot {colds[median] * 1000:.0f} ms "
+              f"({colds[median] / rebuilds[median]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""A local stand-in for the GitHub commits API.
+
+:class:`StubGitHub` serves ``/repos/{owner}/{repo}/commits`` from an
+in-memory list of commits. It supports ``since``, ``per_page`` and ``page``,
+``Link`` headers, ``ETag``/``If-None-Match`` and a simple rate limit, and
+can add latency to every response to imitate a remote server.
+"""
+
+from __future__ import annotations
+
+import bisect
+import datetime
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_api_commits(count: int, days: int = 30, seed: int = 0, end: float | None = None):
+    """Return ``count`` API-shaped commit payloads, newest first."""
+    rng = random.Random(seed)
+    end = time.time() if end is None else end
+    commits = []
+    for i in range(count):
+        when = end - (i + rng.random()) * days * 86400 / max(1, count)
+        date = datetime.datetime.fromtimestamp(when, datetime.timezone.utc)
+        commits.append({
+            "sha": f"{rng.getrandbits(160):040x}",
+            "commit": {
+                "message": f"Synthetic change {i}",
+                "committer": {"name": "stub", "date": date.strftime("%Y-%m-%dT%H:%M:%SZ")},
+            },
+        })
+    return commits
+
+
+class StubGitHub:
+    """Threaded HTTP server serving ``commits``; use as a context manager."""
+
+    def __init__(self, commits, latency: float = 0.0, rate_limit: int | None = None,
+                 reset_after: float = 1.0) -> None:
+        # Newest first, like GitHub; every "since" query then matches a prefix
+        self.commits = sorted(commits, key=lambda c: c["commit"]["committer"]["date"], reverse=True)
+        self._ascending_dates = sorted(c["commit"]["committer"]["date"] for c in commits)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.reset_after = reset_after
+        self.requests = 0
+        self.not_modified = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_count = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubGitHub":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _take_quota(self):
+        """Return ``(allowed, remaining, reset)`` for one more request."""
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            if now - self._window_start >= self.reset_after:
+                self._window_start, self._window_count = now, 0
+            reset = self._window_start + self.reset_after
+            if self.rate_limit is None:
+                return True, 5000, reset
+            if self._window_count >= self.rate_limit:
+                self.rate_limited += 1
+                return False, 0, reset
+            self._window_count += 1
+            return True, self.rate_limit - self._window_count, reset
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if stub.latency:
+                    time.sleep(stub.latency)
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                parts = parsed.path.strip("/").split("/")
+                if len(parts) != 4 or parts[0] != "repos" or parts[3] != "commits":
+                    self.send_error(404)
+                    return
+
+                allowed, remaining, reset = stub._take_quota()
+                rate_headers = {"X-RateLimit-Remaining": str(remaining),
+                                "X-RateLimit-Reset": str(int(reset) + 1)}
+                if not allowed:
+                    self._send(403, b'{"message": "API rate limit exceeded"}', rate_headers)
+                    return
+
+                since = query.get("since", "")
+                older = bisect.bisect_left(stub._ascending_dates, since[:19])
+                matching = stub.commits[:len(stub.commits) - older]
+                per_page = int(query.get("per_page", 30))
+                page = int(query.get("page", 1))
+                body = json.dumps(matching[(page - 1) * per_page:page * per_page]).encode()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+                headers = dict(rate_headers, ETag=etag)
+                last = max(1, -(-len(matching) // per_page))
+                base = f"{stub.url}{parsed.path}?since={since}&per_page={per_page}"
+                links = []
+                if page < last:
+                    links.append(f'<{base}&page={page + 1}>; rel="next"')
+                    links.append(f'<{base}&page={last}>; rel="last"')
+                if links:
+                    headers["Link"] = ", ".join(links)
+
+                if self.headers.get("If-None-Match") == etag:
+                    with stub._lock:
+                        stub.not_modified += 1
+                    self._send(304, b"", headers)
+                    return
+                self._send(200, body, headers)
+
+            def _send(self, status: int, body: bytes, headers) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,64 @@
+"""Content-addressed build skipping for the generators.
+
+A generator hashes everything that determines a model (the commit table or
+day counts, the mode and options, the seed and its own version) with
+:func:`input_digest` and stores the result in a sidecar manifest,
+``<output without extension>.build.json``. When the next run arrives at the
+same digest and all files of the previous build still exist,
+:func:`up_to_date` returns ``True`` and the generator skips building and
+exporting entirely, so an unchanged model is not rewritten and CI has
+nothing to commit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Iterable, Optional
+
+MANIFEST_SUFFIX = ".build.json"
+
+
+def manifest_path(output: str) -> str:
+    return os.path.splitext(output)[0] + MANIFEST_SUFFIX
+
+
+def input_digest(*parts: object) -> str:
+    """Return a hex digest of ``parts``; strings are hashed as is, other values as JSON."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        text = part if isinstance(part, str) else json.dumps(part, sort_keys=True)
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def read_manifest(output: str) -> Optional[dict]:
+    try:
+        with open(manifest_path(output), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def up_to_date(output: str, digest: str) -> bool:
+    """Return whether ``output`` was built from ``digest`` and all its files still exist."""
+    manifest = read_manifest(output)
+    if not manifest or manifest.get("digest") != digest:
+        return False
+    base = os.path.dirname(output)
+    return all(os.path.exists(os.path.join(base, name)) for name in manifest.get("files", []))
+
+
+def record_build(output: str, digest: str, files: Iterable[str], **info: object) -> None:
+    """Write the manifest of a finished build of ``output`` producing ``files``."""
+    base = os.path.dirname(output)
+    manifest = {"digest": digest,
+                "files": sorted({os.path.relpath(path, base or ".") for path in files}),
+                "built_at": int(time.time()), **info}
+    path = manifest_path(output)
+    with open(path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Persistent, incremental commit store for the sculpture generators.
+
+Each repository gets one JSON file inside the cache directory holding the
+parsed commit records and a checkpoint describing the history that has
+already been ingested, and a ``.rollups.npz`` file with their
+:class:`rollups.Rollups` index. Later runs only ask git (or the
+GitHub API) for commits added after that checkpoint, merge them with the
+stored records and drop whatever has fallen out of the ``--days`` window, so
+the work done grows with the number of new commits rather than with the size
+of the window. The rollups are updated with the same added and dropped
+commits.
+
+Checkpoints:
+- local repositories store the SHA of every ref tip seen on the last run and
+  exclude history reachable from them on the next ``git log``;
+- GitHub repositories store the newest commit SHA and stop paging once the
+  API returns it.
+
+If a checkpoint can no longer be resolved (for example after a force push)
+the store is rebuilt from a full fetch.
+
+Example usage:
+  python commit_cache.py --repo-path .. --days 90 --cache-dir .sculpture_cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+from dataclasses import asdict
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+import profiling
+from commit_table import CommitTable
+from git_ingest import CommitData, iter_git_records, ref_tips, since_cutoff, since_date
+from rollups import Rollups
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = ".sculpture_cache"
+
+
+class CommitStore:
+    """On-disk commit records for one repository.
+
+    ``records`` are JSON-serializable dictionaries, newest first. Their shape
+    depends on the source: git records hold the :class:`CommitData` fields
+    plus ``full_sha`` and ``committed``, GitHub records keep the subset of the
+    API payload used by ``commits_by_day``. ``rollups`` aggregates exactly
+    the commits in ``records``.
+    """
+
+    def __init__(self, path: str, key: str) -> None:
+        self.path = path
+        self.key = key
+        self.records: List[dict] = []
+        self.checkpoint: dict = {}
+        self.rollups = Rollups()
+
+    @property
+    def rollups_path(self) -> str:
+        return os.path.splitext(self.path)[0] + ".rollups.npz"
+
+    @classmethod
+    def open(cls, cache_dir: str, key: str) -> "CommitStore":
+        """Load the store for ``key``, or return an empty one."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        store = cls(os.path.join(cache_dir, f"commits-{digest}.json"), key)
+        try:
+            with open(store.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return store
+        if data.get("version") != CACHE_VERSION or data.get("key") != key:
+            return store
+        store.records = data.get("records", [])
+        store.checkpoint = data.get("checkpoint", {})
+        rollups = Rollups.load(store.rollups_path)
+        if rollups is None or int(rollups.totals()[0]) != len(store.records):
+            # Missing or out of step with the records, rebuild once
+            rollups = Rollups.from_table(records_table(store.records))
+        store.rollups = rollups
+        return store
+
+    def reset(self) -> List[dict]:
+        """Forget every record, for a full fetch, and return them."""
+        records, self.records = self.records, []
+        self.rollups = Rollups()
+        return records
+
+    def save(self) -> None:
+        """Write the store atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "version": CACHE_VERSION,
+            "key": self.key,
+            "checkpoint": self.checkpoint,
+            "records": self.records,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        self.rollups.save(self.rollups_path)
+        os.replace(tmp_path, self.path)
+
+    def merge(self, new_records: List[dict], sha_field: str,
+              time_of: Callable[[dict], object],
+              cutoff: float) -> Tuple[List[dict], List[dict]]:
+        """Prepend ``new_records``, drop duplicates and records older than ``cutoff``.
+
+        Replaced and dropped records are subtracted from the rollups and the
+        new ones added. Returns the records added and removed.
+        """
+        seen = {r[sha_field] for r in new_records}
+        added = [r for r in new_records if _as_time(time_of(r)) >= cutoff]
+        kept: List[dict] = []
+        removed: List[dict] = []
+        for r in self.records:
+            if r[sha_field] in seen or _as_time(time_of(r)) < cutoff:
+                removed.append(r)
+            else:
+                kept.append(r)
+        self.records = added + kept
+        self.rollups.remove(records_table(removed))
+        self.rollups.add(records_table(added))
+        return added, removed
+
+
+def _as_time(value) -> float:
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return float(value)
+
+
+def _git_time(record: dict) -> int:
+    return record["committed"]
+
+
+def _github_time(record: dict) -> str:
+    return record["commit"]["committer"]["date"]
+
+
+def git_repo_key(repo_path: str) -> str:
+    """Return a cache key identifying the local repository at ``repo_path``."""
+    cmd = ["git", "-C", repo_path, "rev-parse", "--absolute-git-dir"]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return "git:" + os.path.realpath(result.stdout.strip())
+
+
+def _git_record(commit: CommitData, full_sha: str, committed: int) -> dict:
+    record = asdict(commit)
+    record["full_sha"] = full_sha
+    record["committed"] = committed
+    return record
+
+
+def _git_commits(records: List[dict]) -> List[CommitData]:
+    fields = CommitData.__dataclass_fields__
+    return [CommitData(**{k: r[k] for k in fields}) for r in records]
+
+
+def records_table(records: List[dict]) -> CommitTable:
+    """Return git or GitHub ``records`` as a :class:`CommitTable` without messages.
+
+    GitHub records only carry a SHA and a commit date, so they get the UTC
+    hour, an empty author name and no line counts.
+    """
+    if not records or "commit" not in records[0]:
+        return CommitTable.from_commits(_git_commits(records), keep_messages=False)
+    dates = np.array([r["commit"]["committer"]["date"][:19] for r in records], dtype="datetime64[s]")
+    timestamp = dates.astype(np.int64)
+    count = len(records)
+    return CommitTable(sha=np.array([r["sha"] for r in records], dtype=str),
+                       author_id=np.zeros(count, dtype=np.int32), authors=[""],
+                       timestamp=timestamp, hour=(timestamp // 3600 % 24).astype(np.int8),
+                       is_human=np.ones(count, dtype=np.bool_),
+                       files_changed=np.ones(count, dtype=np.int32),
+                       additions=np.zeros(count, dtype=np.int32),
+                       deletions=np.zeros(count, dtype=np.int32))
+
+
+def update_git_store(store: CommitStore, repo_path: str, days: int,
+                     jobs: int = 1) -> Tuple[List[dict], List[dict]]:
+    """Bring ``store`` up to date with the last ``days`` days of ``repo_path``.
+
+    Returns the records added and removed. After a full fetch every earlier
+    record counts as removed. ``jobs`` is passed to
+    :func:`git_ingest.iter_git_records`.
+    """
+    since = since_date(days)
+    cutoff = since_cutoff(repo_path, since)
+    tips = ref_tips(repo_path)
+    previous = store.checkpoint.get("tips")
+    dropped: List[dict] = []
+    if cutoff < store.checkpoint.get("cutoff", cutoff):
+        # The window grew past what the cache covers
+        previous = None
+        dropped = store.reset()
+
+    new_records: Optional[List[dict]] = None
+    if previous is not None:
+        try:
+            new_records = [_git_record(*rec) for rec in
+                           iter_git_records(repo_path, since, exclude=previous, jobs=jobs)]
+        except subprocess.CalledProcessError:
+            # A checkpoint tip no longer exists, start over
+            dropped = store.reset()
+    if new_records is None:
+        new_records = [_git_record(*rec) for rec in iter_git_records(repo_path, since, jobs=jobs)]
+
+    added, removed = store.merge(new_records, "full_sha", _git_time, cutoff)
+    store.checkpoint = {"tips": tips, "cutoff": cutoff}
+    return added, dropped + removed
+
+
+def load_git_store(repo_path: str, days: int, cache_dir: str, jobs: int = 1) -> CommitStore:
+    """Bring the cache of ``repo_path`` up to date with the last ``days`` days and return it."""
+    store = CommitStore.open(cache_dir, git_repo_key(repo_path))
+    update_git_store(store, repo_path, days, jobs)
+    store.save()
+    return store
+
+
+def load_git_commits(repo_path: str, days: int, cache_dir: str,
+                     jobs: int = 1) -> List[CommitData]:
+    """Return the commits of the last ``days`` days, updating the cache in ``cache_dir``."""
+    return _git_commits(load_git_store(repo_path, days, cache_dir, jobs).records)
+
+
+def load_github_store(owner: str, repo: str, days: int, cache_dir: str,
+                      fetch: Callable[..., tuple[List[dict], bool]]) -> CommitStore:
+    """Bring the cache of ``owner/repo`` up to date with the last ``days`` days and return it.
+
+    ``fetch(until_sha)`` must return ``(commits, found)``: the commits newer
+    than ``until_sha`` (all commits in the window when it is ``None``) and
+    whether ``until_sha`` was reached.
+    """
+    store = CommitStore.open(cache_dir, f"github:{owner}/{repo}")
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    cutoff = since.replace(tzinfo=datetime.timezone.utc).timestamp()
+    last_sha = store.checkpoint.get("last_sha")
+    if cutoff < store.checkpoint.get("cutoff", cutoff):
+        # The window grew past what the cache covers
+        last_sha = None
+        store.reset()
+
+    commits, found = fetch(last_sha)
+    if last_sha is not None and not found:
+        # The checkpoint is gone from the window or from history, start over
+        store.reset()
+    new_records = [{"sha": c["sha"],
+                    "commit": {"committer": {"date": c["commit"]["committer"]["date"]}}}
+                   for c in commits]
+
+    store.merge(new_records, "sha", _github_time, cutoff)
+    store.checkpoint = {"cutoff": cutoff}
+    if store.records:
+        store.checkpoint["last_sha"] = store.records[0]["sha"]
+    store.save()
+    return store
+
+
+def load_github_commits(owner: str, repo: str, days: int, cache_dir: str,
+                        fetch: Callable[..., tuple[List[dict], bool]]) -> List[dict]:
+    """Return API commit payloads of the last ``days`` days, updating the cache.
+
+    See :func:`load_github_store` for ``fetch``.
+    """
+    return load_github_store(owner, repo, days, cache_dir, fetch).records
+
+
+def run(args: argparse.Namespace) -> None:
+    with profiling.stage("ingest"):
+        commits = load_git_commits(args.repo_path, args.days, args.cache_dir, args.jobs)
+    print(f"{len(commits)} commits cached in {args.cache_dir}")
+
+
+def build_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog=prog, description="Update the incremental commit cache of a local repository")
+    parser.add_argument("--repo-path", default=".", help="path to git repository")
+    parser.add_argument("--days", type=int, default=30, help="number of days to keep")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="cache directory")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="git log processes for large windows")
+    profiling.add_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    with profiling.session(args):
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Counter-based random numbers keyed by commit SHA.
+
+Builders that want "random but reproducible" per-commit values used to
+reseed the global ``np.random`` state once per commit. That is slow for long
+histories and leaves the global state changed for whatever runs next.
+
+:class:`CommitRandom` instead evaluates the Philox-4x64-10 block cipher,
+the generator behind ``numpy.random.Philox``, for all commits at once. Each
+commit's key is taken from the first 32 hex digits of its SHA and block
+``i`` of a stream is the cipher applied to the counter ``(i + 1, 0, 0,
+stream)``. Row ``n`` of :meth:`CommitRandom.raw` therefore equals
+``numpy.random.Philox(key=key_n, counter=[0, 0, 0, stream]).random_raw()``
+and :meth:`CommitRandom.random` equals ``Generator.random`` (float64 or
+float32) on that bit generator, so a single commit's values can be reproduced with NumPy alone.
+The values depend only on the commit itself, not on its position in the
+history or on anything that ran before.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+ROUNDS = 10
+_CHUNK = 8192
+
+_MULTIPLIERS = (np.uint64(0xD2E7470EE14C6C93), np.uint64(0xCA5A826395121157))
+_WEYL = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBB67AE8584CAA73B))
+_LOW = np.uint64(0xFFFFFFFF)
+_32 = np.uint64(32)
+
+# ASCII hex digit -> value; other bytes keep their low nibble so any string keys deterministically
+_NIBBLES = np.arange(256, dtype=np.uint8) & 0xF
+_NIBBLES[ord("0"):ord("9") + 1] = np.arange(10)
+_NIBBLES[ord("a"):ord("f") + 1] = np.arange(10, 16)
+_NIBBLES[ord("A"):ord("F") + 1] = np.arange(10, 16)
+
+
+def sha_keys(shas: Sequence[str]) -> np.ndarray:
+    """Return the ``(N, 2)`` uint64 Philox keys of ``shas``.
+
+    The first 16 hex digits form the first key word and the next 16 the
+    second; shorter strings are padded with zeros.
+    """
+    text = np.asarray(shas, dtype=str).reshape(-1)
+    if text.dtype.itemsize < 32 * 4:
+        text = text.astype("<U32")
+    # View the fixed-width strings as UCS-4 code points instead of encoding them
+    codes = np.ascontiguousarray(text).view(np.uint32).reshape(len(text), -1)[:, :32]
+    nibbles = _NIBBLES[np.minimum(codes, 255)]
+    nibbles[codes == 0] = 0
+    nibbles = nibbles.reshape(-1, 16, 2)
+    packed = (nibbles[:, :, 0] << 4) | nibbles[:, :, 1]
+    return np.ascontiguousarray(packed).view(">u8").astype(np.uint64)
+
+
+def _mulhilo(a: np.uint64, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the high and low 64 bits of the 128-bit products ``a * b``."""
+    a_hi, a_lo = a >> _32, a & _LOW
+    b_hi, b_lo = b >> _32, b & _LOW
+    low = a_lo * b_lo
+    upper = a_hi * b_lo + (low >> _32)
+    middle = a_lo * b_hi + (upper & _LOW)
+    return a_hi * b_hi + (upper >> _32) + (middle >> _32), a * b
+
+
+def philox(counter: np.ndarray, key: np.ndarray, rounds: int = ROUNDS) -> np.ndarray:
+    """Apply Philox-4x64 to every row of the ``(N, 4)`` counters with the ``(N, 2)`` keys."""
+    counter = np.asarray(counter, dtype=np.uint64)
+    key = np.asarray(key, dtype=np.uint64)
+    out = np.empty((len(counter), 4), dtype=np.uint64)
+    # Rows are processed in cache-sized chunks; every round is ~30 array operations
+    for start in range(0, len(counter), _CHUNK):
+        rows = slice(start, start + _CHUNK)
+        c0, c1, c2, c3 = (np.array(word) for word in counter[rows].T)
+        k0, k1 = (np.array(word) for word in key[rows].T)
+        with np.errstate(over="ignore"):
+            for round_ in range(rounds):
+                if round_:
+                    k0 += _WEYL[0]
+                    k1 += _WEYL[1]
+                hi0, lo0 = _mulhilo(_MULTIPLIERS[0], c0)
+                hi1, lo1 = _mulhilo(_MULTIPLIERS[1], c2)
+                c0, c1, c2, c3 = hi1 ^ c1 ^ k0, lo1, hi0 ^ c3 ^ k1, lo0
+        out[rows] = np.column_stack([c0, c1, c2, c3])
+    return out
+
+
+class CommitRandom:
+    """Independent random streams for every commit of a history.
+
+    ``stream`` separates uses (colors, jitter, ...) so that adding draws to
+    one of them never shifts the values of another.
+    """
+
+    def __init__(self, shas: Sequence[str]) -> None:
+        self.keys = sha_keys(shas)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def raw(self, count: int, stream: int = 0) -> np.ndarray:
+        """Return ``(N, count)`` uint64 words, the first ``count`` of each commit's stream."""
+        blocks = -(-count // 4)
+        out = np.empty((len(self), blocks * 4), dtype=np.uint64)
+        counter = np.zeros((len(self), 4), dtype=np.uint64)
+        counter[:, 3] = stream
+        for block in range(blocks):
+            counter[:, 0] = block + 1
+            out[:, block * 4:(block + 1) * 4] = philox(counter, self.keys)
+        return out[:, :count]
+
+    def random(self, count: int, stream: int = 0, dtype: type = np.float64) -> np.ndarray:
+        """Return ``(N, count)`` floats uniform in [0, 1), like ``Generator.random``.
+
+        ``np.float64`` values use one raw word each. ``np.float32`` values
+        use 24 bits of one half-word each (low half first, as NumPy does), so
+        half as many Philox blocks are evaluated.
+        """
+        if np.dtype(dtype) == np.float32:
+            words = self.raw(-(-count // 2), stream)
+            halves = np.stack([words & _LOW, words >> _32], axis=-1).reshape(len(self), -1)
+            return ((halves[:, :count] >> np.uint64(8)) * (1.0 / 2 ** 24)).astype(np.float32)
+        return (self.raw(count, stream) >> np.uint64(11)) * (1.0 / 2 ** 53)
+
+    def uniform(self, low: float, high: float, count: int, stream: int = 0,
+                dtype: type = np.float64) -> np.ndarray:
+        return low + (high - low) * self.random(count, stream, dtype)
+
+    def integers(self, low: int, high: int, count: int, stream: int = 0) -> np.ndarray:
+        """Return ``(N, count)`` integers in ``[low, high)`` by reducing raw words modulo the span."""
+        span = np.uint64(high - low)
+        return (self.raw(count, stream) % span).astype(np.int64) + low
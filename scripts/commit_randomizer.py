@@ -10,19 +10,45 @@ The transformations include:
 - Adding per-vertex noise.
 - Non-uniform scaling along X, Y and Z.
 
-Use ``--generations`` to produce multiple iterations in sequence.
+All three run as one fused pass over the vertices, see ``deform.py``.
+
+Use ``--generations`` to produce multiple iterations in sequence. The
+working positions stay in memory from one generation to the next and
+finished generations are written by a background thread.
+
+GLB files with plain float32 positions (everything ``scene.export`` and the
+streaming writer produce) are memory-mapped with ``glb_patch.py`` instead
+of being parsed by ``trimesh``: only the vertex positions are read and
+deformed, and each generation is written by copying the rest of the file
+unchanged and patching the positions and their bounds. Other files, such as
+quantized output of ``compact_glb.py``, go through ``trimesh``. Every generation draws its
+random numbers from its own ``numpy.random.Generator``, seeded from
+``--seed`` and the generation number, so a run can be reproduced exactly.
+
+Use ``--variants N`` to produce N independent variants of the latest
+generation instead, in parallel on a process pool.
 """
 
 from __future__ import annotations
 
 import argparse
+import copy
+import functools
 import glob
 import os
 import re
-from typing import Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 
 import numpy as np
-import trimesh
+
+import profiling
+from deform import DeformationPipeline, Noise, Scale, Twist
+from glb_patch import GlbLayoutError, MappedGlb
+from lazy import lazy_import
+
+trimesh = lazy_import("trimesh")
 
 
 def _generation_number(path: str) -> int:
@@ -45,56 +71,215 @@ def find_latest_model() -> Tuple[str, int]:
 
 def apply_twist(mesh: trimesh.Trimesh, magnitude: float) -> None:
     """Twist the mesh around the Y axis by ``magnitude`` radians per unit height."""
-    v = mesh.vertices.copy()
-    angles = v[:, 1] * magnitude
-    c, s = np.cos(angles), np.sin(angles)
-    x = v[:, 0] * c - v[:, 2] * s
-    z = v[:, 0] * s + v[:, 2] * c
-    v[:, 0] = x
-    v[:, 2] = z
-    mesh.vertices = v
+    DeformationPipeline([Twist(magnitude)]).apply_to_mesh(mesh)
 
 
-def apply_vertex_noise(mesh: trimesh.Trimesh, amount: float) -> None:
+def apply_vertex_noise(mesh: trimesh.Trimesh, amount: float,
+                       rng: Optional[np.random.Generator] = None) -> None:
     """Jitter vertex positions within ``amount`` units."""
-    mesh.vertices += np.random.uniform(-amount, amount, mesh.vertices.shape)
+    DeformationPipeline([Noise(amount, rng)]).apply_to_mesh(mesh)
 
 
 def apply_nonuniform_scale(mesh: trimesh.Trimesh, scale: np.ndarray) -> None:
     """Scale mesh vertices by the three components of ``scale``."""
-    mesh.vertices *= scale
+    DeformationPipeline([Scale(scale)]).apply_to_mesh(mesh)
 
 
-def randomize_mesh(mesh: trimesh.Trimesh) -> None:
-    twist = np.random.uniform(-0.5, 0.5)
-    noise = np.random.uniform(0.02, 0.1)
-    scale = np.random.uniform(0.8, 1.2, size=3)
-    apply_twist(mesh, twist)
-    apply_vertex_noise(mesh, noise)
-    apply_nonuniform_scale(mesh, scale)
+def randomizer_pipeline(rng: Optional[np.random.Generator] = None,
+                        dtype: np.dtype = np.float64) -> DeformationPipeline:
+    """Return a twist, jitter and scale pipeline with parameters drawn from ``rng``.
 
+    Without ``rng`` the global ``np.random`` state is used.
+    """
+    rng = np.random if rng is None else rng
+    twist = rng.uniform(-0.5, 0.5)
+    noise = rng.uniform(0.02, 0.1)
+    scale = rng.uniform(0.8, 1.2, size=3)
+    return DeformationPipeline([Twist(twist), Noise(noise, rng), Scale(scale)], dtype=dtype)
 
-def randomize_object(obj: trimesh.Scene | trimesh.Trimesh) -> None:
+
+def randomize_mesh(mesh: trimesh.Trimesh, rng: Optional[np.random.Generator] = None,
+                   dtype: np.dtype = np.float64) -> None:
+    """Twist, jitter and scale ``mesh`` in one fused pass."""
+    randomizer_pipeline(rng, dtype).apply_to_mesh(mesh)
+
+
+def randomize_object(obj: trimesh.Scene | trimesh.Trimesh,
+                     rng: Optional[np.random.Generator] = None,
+                     dtype: np.dtype = np.float64) -> None:
     if isinstance(obj, trimesh.Trimesh):
-        randomize_mesh(obj)
+        randomize_mesh(obj, rng, dtype)
     else:
         for geom in obj.geometry.values():
-            randomize_mesh(geom)
+            randomize_mesh(geom, rng, dtype)
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Create randomized generations of the commit sculpture")
-    parser.add_argument("--generations", type=int, default=1, help="number of new generations to produce")
-    args = parser.parse_args()
+def generation_rng(seed: int, number: int, variant: Optional[int] = None) -> np.random.Generator:
+    """Return the random generator for generation ``number`` (and ``variant``) of run ``seed``."""
+    key = [seed, number] if variant is None else [seed, number, variant]
+    return np.random.default_rng(np.random.SeedSequence(key))
+
+
+class WorkingModel:
+    """A model whose vertex positions are deformed in memory and written out again.
+
+    Patchable GLB files are memory-mapped and only their positions are
+    touched; the first :meth:`randomize` reads straight from the mapping.
+    Anything else is loaded as a ``trimesh`` scene.
+    """
+
+    def __init__(self, path: str, dtype: np.dtype = np.float64) -> None:
+        self.dtype = dtype
+        self.scene: Optional[trimesh.Scene | trimesh.Trimesh] = None
+        self.glb: Optional[MappedGlb] = None
+        self.positions: Dict[int, np.ndarray] = {}
+        # Whether self.positions may be deformed in place
+        self._owned = False
+        try:
+            self.glb = MappedGlb(path)
+            self.positions = self.glb.positions()
+        except GlbLayoutError:
+            self.glb = None
+            self.scene = trimesh.load(path)
+
+    def copy(self) -> "WorkingModel":
+        """Return a copy that deforms independently of this model."""
+        model = copy.copy(self)
+        model._owned = False
+        if self.scene is not None:
+            model.scene = self.scene.copy()
+        return model
+
+    def snapshot(self) -> "WorkingModel":
+        """Return a copy to write while this model keeps changing."""
+        model = self.copy()
+        model.positions = {key: values.astype(np.float32) for key, values in self.positions.items()}
+        return model
+
+    def randomize(self, rng: np.random.Generator) -> None:
+        """Deform every mesh with parameters drawn from ``rng``, as :func:`randomize_object`."""
+        if self.scene is not None:
+            randomize_object(self.scene, rng, self.dtype)
+            return
+        if not self._owned:
+            self.positions = dict(self.positions)
+        for key, values in self.positions.items():
+            out = values if self._owned else None
+            self.positions[key] = randomizer_pipeline(rng, self.dtype).run(values, out)
+        self._owned = True
+
+    def write(self, path: str) -> None:
+        if self.scene is not None:
+            self.scene.export(path)
+        else:
+            self.glb.write(path, self.positions)
+
+
+def run_generations(path: str, number: int, generations: int, seed: int,
+                    max_pending: int = 4, dtype: np.dtype = np.float64) -> str:
+    """Produce ``generations`` successive generations starting from ``path``.
 
+    The model is loaded once; each generation mutates the in-memory
+    positions and hands a snapshot to a writer thread, with at most
+    ``max_pending`` writes queued at a time. Returns the path of the last
+    generation.
+    """
+    with profiling.stage("load"):
+        model = WorkingModel(path, dtype)
+    pending: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for _ in range(generations):
+            number += 1
+            with profiling.stage("randomize"):
+                model.randomize(generation_rng(seed, number))
+            path = os.path.join("models", f"commit_sculpture_gen{number}.glb")
+            pending.append(writer.submit(model.snapshot().write, path))
+            print(f"Generated {path}")
+            while len(pending) > max_pending:
+                pending.popleft().result()
+        # Writes run on the writer thread; this is the wait for the last ones
+        with profiling.stage("export"):
+            for future in pending:
+                future.result()
+    return path
+
+
+_VARIANT_BASE: Optional[WorkingModel] = None
+
+
+def _load_variant_base(path: str, dtype: np.dtype = np.float64) -> None:
+    global _VARIANT_BASE
+    _VARIANT_BASE = WorkingModel(path, dtype)
+
+
+def _make_variant(number: int, variant: int, seed: int, out_path: str) -> str:
+    model = _VARIANT_BASE.copy()
+    with profiling.stage("randomize"):
+        model.randomize(generation_rng(seed, number, variant))
+    with profiling.stage("export"):
+        model.write(out_path)
+    return out_path
+
+
+def run_variants(path: str, number: int, variants: int, seed: int, jobs: int,
+                 dtype: np.dtype = np.float64) -> list[str]:
+    """Produce ``variants`` independent mutations of ``path`` on a process pool.
+
+    Each worker loads (or maps) the model once. Variants are written to
+    ``models/variants/`` so they are not picked up as the latest generation.
+    """
+    out_dir = os.path.join("models", "variants")
+    os.makedirs(out_dir, exist_ok=True)
+    number += 1
+    paths = [os.path.join(out_dir, f"commit_sculpture_gen{number}_v{i}.glb") for i in range(variants)]
+    profiled = profiling.active()
+    task = functools.partial(profiling.run_profiled, _make_variant) if profiled else _make_variant
+    with ProcessPoolExecutor(max_workers=max(1, jobs), initializer=_load_variant_base,
+                             initargs=(path, dtype)) as pool:
+        futures = [pool.submit(task, number, i, seed, out_path)
+                   for i, out_path in enumerate(paths)]
+        for future in futures:
+            result = future.result()
+            if profiled:
+                result, stages = result
+                profiling.merge(stages)
+            print(f"Generated {result}")
+    return paths
+
+
+def run(args: argparse.Namespace) -> None:
+    """Produce generations or variants as requested by the parsed command line."""
+
+    seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % 2**63)
+    print(f"Seed: {seed}")
+
+    dtype = np.float32 if args.float32 else np.float64
     path, number = find_latest_model()
-    for _ in range(args.generations):
-        obj = trimesh.load(path)
-        randomize_object(obj)
-        number += 1
-        path = os.path.join("models", f"commit_sculpture_gen{number}.glb")
-        obj.export(path)
-        print(f"Generated {path}")
+    if args.variants:
+        run_variants(path, number, args.variants, seed, args.jobs, dtype)
+    else:
+        run_generations(path, number, args.generations, seed, dtype=dtype)
+
+
+def build_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="Create randomized generations of the commit sculpture")
+    parser.add_argument("--generations", type=int, default=1, help="number of new generations to produce")
+    parser.add_argument("--seed", type=int, help="seed for reproducible runs (default: random)")
+    parser.add_argument("--variants", type=int, default=0,
+                        help="produce this many independent variants of the latest generation instead")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for --variants")
+    parser.add_argument("--float32", action="store_true",
+                        help="deform in single precision (faster, different values per seed)")
+    profiling.add_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    with profiling.session(args):
+        run(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+"""Columnar commit storage for pattern detection and the sculpture builders.
+
+A :class:`CommitTable` keeps one NumPy array per :class:`CommitData` field
+instead of one Python object per commit, and interns author names into
+integer IDs. A million commits take roughly 50 MB and every per-commit
+computation in ``detect_patterns`` and the builders becomes an array
+operation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from git_ingest import CommitData
+
+# Numeric columns and their dtypes; ``sha``, ``author_id`` and ``message``
+# are handled separately.
+NUMERIC_COLUMNS = {
+    "timestamp": np.int64,
+    "hour": np.int8,
+    "is_human": np.bool_,
+    "files_changed": np.int32,
+    "additions": np.int32,
+    "deletions": np.int32,
+}
+
+_ARRAY_TYPECODES = {
+    "timestamp": "q",
+    "hour": "b",
+    "is_human": "b",
+    "files_changed": "l",
+    "additions": "l",
+    "deletions": "l",
+}
+
+
+class CommitTable:
+    """Struct-of-arrays view of a list of commits.
+
+    ``authors`` holds each distinct author name once and ``author_id``
+    indexes into it. ``message`` is ``None`` when messages were not kept.
+    """
+
+    __slots__ = ("sha", "author_id", "authors", "timestamp", "hour", "is_human",
+                 "files_changed", "additions", "deletions", "message")
+
+    def __init__(self, sha: np.ndarray, author_id: np.ndarray, authors: List[str],
+                 timestamp: np.ndarray, hour: np.ndarray, is_human: np.ndarray,
+                 files_changed: np.ndarray, additions: np.ndarray, deletions: np.ndarray,
+                 message: Optional[np.ndarray] = None) -> None:
+        self.sha = sha
+        self.author_id = author_id
+        self.authors = authors
+        self.timestamp = timestamp
+        self.hour = hour
+        self.is_human = is_human
+        self.files_changed = files_changed
+        self.additions = additions
+        self.deletions = deletions
+        self.message = message
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @classmethod
+    def from_commits(cls, commits: Iterable[CommitData], keep_messages: bool = True) -> "CommitTable":
+        """Build a table from any iterable of commits, such as a streaming ingestion generator.
+
+        The commits are consumed one at a time, so a generator never has to be
+        materialized as a list of objects.
+        """
+        columns: Dict[str, array] = {name: array(code) for name, code in _ARRAY_TYPECODES.items()}
+        shas: List[str] = []
+        author_ids = array("l")
+        author_index: Dict[str, int] = {}
+        messages: List[str] = []
+        for c in commits:
+            shas.append(c.sha)
+            author_ids.append(author_index.setdefault(c.author, len(author_index)))
+            for name, column in columns.items():
+                column.append(getattr(c, name))
+            if keep_messages:
+                messages.append(c.message)
+
+        arrays = {name: np.frombuffer(column, dtype=column.typecode).astype(NUMERIC_COLUMNS[name])
+                  for name, column in columns.items()}
+        return cls(
+            sha=np.array(shas, dtype=str),
+            author_id=np.asarray(author_ids, dtype=np.int32),
+            authors=list(author_index),
+            message=np.array(messages, dtype=object) if keep_messages else None,
+            **arrays,
+        )
+
+    @classmethod
+    def coerce(cls, commits: Union["CommitTable", Iterable[CommitData]]) -> "CommitTable":
+        """Return ``commits`` as a table, converting a list of commits if needed."""
+        if isinstance(commits, cls):
+            return commits
+        return cls.from_commits(commits)
+
+    @classmethod
+    def concat(cls, tables: Sequence["CommitTable"]) -> "CommitTable":
+        """Return the rows of all ``tables`` in order, with author IDs re-interned."""
+        author_index: Dict[str, int] = {}
+        author_ids = []
+        for table in tables:
+            remap = np.array([author_index.setdefault(name, len(author_index))
+                              for name in table.authors], dtype=np.int32)
+            author_ids.append(remap[table.author_id] if len(table) else table.author_id)
+
+        def join(name: str) -> np.ndarray:
+            return np.concatenate([getattr(t, name) for t in tables])
+
+        keep_messages = all(t.message is not None for t in tables)
+        return cls(
+            sha=join("sha") if tables else np.zeros(0, dtype=str),
+            author_id=np.concatenate(author_ids) if tables else np.zeros(0, dtype=np.int32),
+            authors=list(author_index),
+            message=join("message") if tables and keep_messages else None,
+            **{name: join(name) if tables else np.zeros(0, dtype=dtype)
+               for name, dtype in NUMERIC_COLUMNS.items()},
+        )
+
+    def take(self, indices: np.ndarray) -> "CommitTable":
+        """Return a new table holding the rows at ``indices`` (or a boolean mask)."""
+        return CommitTable(
+            sha=self.sha[indices],
+            author_id=self.author_id[indices],
+            authors=self.authors,
+            timestamp=self.timestamp[indices],
+            hour=self.hour[indices],
+            is_human=self.is_human[indices],
+            files_changed=self.files_changed[indices],
+            additions=self.additions[indices],
+            deletions=self.deletions[indices],
+            message=None if self.message is None else self.message[indices],
+        )
+
+    def sorted_by_time(self) -> "CommitTable":
+        """Return the rows ordered by timestamp, keeping ties in their current order."""
+        return self.take(np.argsort(self.timestamp, kind="stable"))
+
+    @property
+    def author(self) -> np.ndarray:
+        """Author name of every row."""
+        return np.array(self.authors, dtype=object)[self.author_id]
+
+    @property
+    def changes(self) -> np.ndarray:
+        """Lines added plus lines deleted for every row, as int64."""
+        return self.additions.astype(np.int64) + self.deletions
+
+    def digest(self, salt: str = "") -> str:
+        """Return a hex digest of every column the builders read, plus ``salt``.
+
+        Messages are left out. Authors are hashed by name per row, so the
+        digest does not depend on how names were interned.
+        """
+        h = hashlib.blake2b(salt.encode("utf-8"), digest_size=16)
+        h.update(np.ascontiguousarray(self.sha).tobytes())
+        h.update("\0".join(self.author.tolist()).encode("utf-8"))
+        for name in NUMERIC_COLUMNS:
+            h.update(np.ascontiguousarray(getattr(self, name)).tobytes())
+        return h.hexdigest()
+
+    def to_commits(self) -> List[CommitData]:
+        """Return the rows as :class:`CommitData` objects."""
+        messages = self.message if self.message is not None else [""] * len(self)
+        return [
+            CommitData(sha=str(sha), author=self.authors[author_id], timestamp=int(ts),
+                       hour=int(hour), is_human=bool(human), files_changed=int(files),
+                       additions=int(add), deletions=int(dele), message=str(msg))
+            for sha, author_id, ts, hour, human, files, add, dele, msg in zip(
+                self.sha, self.author_id, self.timestamp, self.hour, self.is_human,
+                self.files_changed, self.additions, self.deletions, messages)
+        ]
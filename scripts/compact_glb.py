@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""Compact GLB writer for sculpture scenes.
+
+:func:`write_glb` writes a ``trimesh.Scene`` as a binary glTF file that is
+much smaller than ``scene.export``:
+
+- positions are quantized to 16-bit integers per mesh
+  (``KHR_mesh_quantization``); the offset and uniform scale that restore
+  them go into the node transform, so the viewer dequantizes on the GPU;
+- optional normals are stored as normalized 8-bit vectors;
+- indices are ``uint16`` whenever a mesh has fewer than 65,536 vertices;
+- identical accessors are written once and identical primitives share one
+  mesh. Copies of a template that only differ by uniform scale and
+  translation quantize to the same integers, so an unbatched sculpture
+  stores each primitive kind roughly once;
+- with ``meshopt=True`` every buffer view is additionally encoded with the
+  ``EXT_meshopt_compression`` vertex and index sequence codecs, implemented
+  here with NumPy. The result compresses further with the gzip/brotli
+  transfer encoding of GitHub Pages.
+
+Files written with ``meshopt=True`` can be displayed by model-viewer and
+three.js but not read back by ``trimesh.load``.
+
+Example usage:
+  python compact_glb.py models/commit_sculpture_organic.glb models/organic_compact.glb --meshopt
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lazy import lazy_import
+
+trimesh = lazy_import("trimesh")
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+FLOAT = 5126
+UNSIGNED_INT = 5125
+UNSIGNED_SHORT = 5123
+UNSIGNED_BYTE = 5121
+BYTE = 5120
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+QUANTIZE_MAX = 65535
+
+# Compressing a view also adds an extension object to the JSON chunk
+MESHOPT_MIN_SAVING = 192
+
+WRITERS = ("trimesh", "compact", "meshopt", "stream")
+
+
+def _align(size: int) -> int:
+    return (size + 3) & ~3
+
+
+# -- EXT_meshopt_compression codecs -----------------------------------------
+
+def _encode_byte_groups(groups: np.ndarray) -> np.ndarray:
+    """Encode ``(units, groups, 16)`` zigzagged bytes; return the concatenated stream.
+
+    Each unit (one byte position of one vertex block) is a header with two
+    bits per group followed by the groups. Every group of 16 bytes is stored
+    as all zeros, 2-bit or 4-bit values with escaped outliers, or raw bytes,
+    whichever is shortest.
+    """
+    units, count, _ = groups.shape
+    v = groups.reshape(-1, 16)
+    rows = len(v)
+
+    esc2, esc4 = v >= 3, v >= 15
+    sizes = np.column_stack([
+        np.where(v.any(axis=1), 1 << 30, 0),
+        4 + esc2.sum(axis=1),
+        8 + esc4.sum(axis=1),
+        np.full(rows, 16),
+    ])
+    mode = np.argmin(sizes, axis=1)
+    length = sizes[np.arange(rows), mode]
+
+    payload = np.zeros((rows, 32), dtype=np.uint8)
+    for bits, esc, packed_size in ((1, esc2, 4), (2, esc4, 8)):
+        selected = mode == bits
+        if not selected.any():
+            continue
+        vs, es = v[selected], esc[selected]
+        width = 2 * bits
+        per_byte = 8 // width
+        capped = np.minimum(vs, (1 << width) - 1).reshape(-1, packed_size, per_byte)
+        shifts = np.arange(per_byte - 1, -1, -1) * width
+        packed = (capped.astype(np.uint16) << shifts).sum(axis=2).astype(np.uint8)
+        # Escaped values follow the packed bytes in their original order
+        order = np.argsort(~es, axis=1, kind="stable")
+        rest = np.take_along_axis(vs, order, axis=1)
+        block = np.zeros((len(vs), 32), dtype=np.uint8)
+        block[:, :packed_size] = packed
+        block[:, packed_size:packed_size + 16] = rest
+        payload[selected] = block
+    payload[mode == 3, :16] = v[mode == 3]
+
+    header_size = (count + 3) // 4
+    modes = np.zeros((units, header_size * 4), dtype=np.uint8)
+    modes[:, :count] = mode.reshape(units, count)
+    headers = (modes.reshape(units, header_size, 4).astype(np.uint16)
+               << np.array([0, 2, 4, 6], dtype=np.uint16)).sum(axis=2).astype(np.uint8)
+
+    stream = np.zeros((units, count + 1, 32), dtype=np.uint8)
+    stream[:, 0, :header_size] = headers
+    stream[:, 1:] = payload.reshape(units, count, 32)
+    lengths = np.empty((units, count + 1), dtype=np.int64)
+    lengths[:, 0] = header_size
+    lengths[:, 1:] = length.reshape(units, count)
+    return stream[np.arange(32) < lengths[:, :, np.newaxis]]
+
+
+def encode_vertex_buffer(data: np.ndarray) -> bytes:
+    """Encode ``(count, stride)`` bytes with the meshopt vertex codec (``ATTRIBUTES`` mode)."""
+    count, stride = data.shape
+    block_size = min((8192 // stride) & ~15, 256)
+
+    delta = data.copy()
+    delta[1:] -= data[:-1]
+    delta[0] = 0
+    signed = delta.view(np.int8).astype(np.int16)
+    zigzag = ((signed << 1) ^ (signed >> 7)).astype(np.uint8)
+
+    parts = [b"\xa0"]
+    full = count // block_size
+    if full:
+        blocks = zigzag[:full * block_size].reshape(full, block_size, stride).transpose(0, 2, 1)
+        parts.append(_encode_byte_groups(
+            blocks.reshape(full * stride, block_size // 16, 16)).tobytes())
+    tail = count - full * block_size
+    if tail:
+        aligned = (tail + 15) & ~15
+        block = np.zeros((stride, aligned), dtype=np.uint8)
+        block[:, :tail] = zigzag[full * block_size:].T
+        parts.append(_encode_byte_groups(block.reshape(stride, aligned // 16, 16)).tobytes())
+
+    parts.append(bytes(max(32, stride) - stride))
+    parts.append(data[0].tobytes())
+    return b"".join(parts)
+
+
+def encode_index_sequence(indices: np.ndarray) -> bytes:
+    """Encode indices with the meshopt index sequence codec (``INDICES`` mode)."""
+    indices = np.asarray(indices, dtype=np.int64).ravel()
+    delta = np.diff(indices, prepend=0)
+    zigzag = ((delta << 1) ^ (delta >> 63)) & 0xFFFFFFFF
+    value = zigzag << 1  # lowest bit selects baseline 0
+    size = 1 + sum((value >= 1 << (7 * k)).astype(np.int64) for k in range(1, 5))
+    groups = (value[:, np.newaxis] >> (7 * np.arange(5))) & 0x7F
+    groups |= (np.arange(5) < (size - 1)[:, np.newaxis]) * 0x80
+    data = groups.astype(np.uint8)[np.arange(5) < size[:, np.newaxis]]
+    return b"\xd1" + data.tobytes() + bytes(4)
+
+
+# -- glTF assembly ----------------------------------------------------------
+
+class GlbBuilder:
+    """Accumulate deduplicated accessors and meshes and serialize them as GLB."""
+
+    def __init__(self, meshopt: bool = False) -> None:
+        self.meshopt = meshopt
+        self.gltf: Dict[str, list] = {"accessors": [], "bufferViews": [], "meshes": [], "nodes": []}
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.fallback_size = 0
+        self.extensions: set = set()
+        self._accessors: Dict[Tuple, int] = {}
+        self._meshes: Dict[Tuple, int] = {}
+
+    def _append(self, data: bytes) -> int:
+        offset = self.size
+        self.chunks.append(data)
+        self.chunks.append(bytes(_align(len(data)) - len(data)))
+        self.size += _align(len(data))
+        return offset
+
+    def add_view(self, data: np.ndarray, target: int, stride: Optional[int] = None) -> int:
+        """Add a buffer view holding ``data``, compressed if that makes it smaller."""
+        raw = data.tobytes()
+        view: Dict[str, object] = {"buffer": 0, "byteLength": len(raw), "target": target}
+        if stride:
+            view["byteStride"] = stride
+
+        encoded = None
+        if self.meshopt and len(data):
+            if target == ARRAY_BUFFER:
+                mode, encoded = "ATTRIBUTES", encode_vertex_buffer(data.view(np.uint8).reshape(len(data), -1))
+            else:
+                mode, encoded = "INDICES", encode_index_sequence(data)
+        if encoded is not None and len(encoded) + MESHOPT_MIN_SAVING < len(raw):
+            view["buffer"] = 1
+            view["byteOffset"] = self.fallback_size
+            self.fallback_size += _align(len(raw))
+            view["extensions"] = {"EXT_meshopt_compression": {
+                "buffer": 0, "byteOffset": self._append(encoded), "byteLength": len(encoded),
+                "byteStride": data.nbytes // len(data), "mode": mode, "count": len(data)}}
+            self.extensions.add("EXT_meshopt_compression")
+        else:
+            view["byteOffset"] = self._append(raw)
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def add_accessor(self, data: np.ndarray, component: int, kind: str, target: int,
+                     normalized: bool = False, stride: Optional[int] = None,
+                     bounds: Optional[Tuple[list, list]] = None) -> int:
+        """Add an accessor over ``data``, reusing an identical earlier one."""
+        key = (hashlib.blake2b(data.tobytes(), digest_size=16).digest(), data.shape,
+               component, kind, normalized)
+        if key in self._accessors:
+            return self._accessors[key]
+        accessor: Dict[str, object] = {"bufferView": self.add_view(data, target, stride),
+                                       "componentType": component, "type": kind,
+                                       "count": len(data)}
+        if normalized:
+            accessor["normalized"] = True
+        if bounds is not None:
+            accessor["min"], accessor["max"] = bounds
+        self.gltf["accessors"].append(accessor)
+        self._accessors[key] = len(self.gltf["accessors"]) - 1
+        return self._accessors[key]
+
+    def add_mesh(self, mesh: trimesh.Trimesh, quantize: bool = True,
+                 normals: bool = False) -> Tuple[int, np.ndarray]:
+        """Add ``mesh`` and return its index and the dequantization transform."""
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        dequantize = np.eye(4)
+        if quantize:
+            offset = vertices.min(axis=0)
+            extent = float((vertices.max(axis=0) - offset).max())
+            scale = extent / QUANTIZE_MAX if extent > 0 else 1.0
+            quantized = np.zeros((len(vertices), 4), dtype=np.uint16)  # padded to 8 bytes
+            quantized[:, :3] = np.clip(np.rint((vertices - offset) / scale), 0, QUANTIZE_MAX)
+            bounds = (quantized[:, :3].min(axis=0).tolist(), quantized[:, :3].max(axis=0).tolist())
+            position = self.add_accessor(quantized, UNSIGNED_SHORT, "VEC3", ARRAY_BUFFER,
+                                         stride=8, bounds=bounds)
+            dequantize[:3, :3] *= scale
+            dequantize[:3, 3] = offset
+        else:
+            points = vertices.astype(np.float32)
+            position = self.add_accessor(points, FLOAT, "VEC3", ARRAY_BUFFER,
+                                         bounds=(points.min(axis=0).tolist(), points.max(axis=0).tolist()))
+        attributes = {"POSITION": position}
+
+        if normals:
+            packed = np.zeros((len(vertices), 4), dtype=np.int8)  # padded to 4 bytes
+            packed[:, :3] = np.rint(np.asarray(mesh.vertex_normals) * 127)
+            attributes["NORMAL"] = self.add_accessor(packed, BYTE, "VEC3", ARRAY_BUFFER,
+                                                     normalized=True, stride=4)
+        if mesh.visual.kind in ("vertex", "face"):
+            colors = np.ascontiguousarray(mesh.visual.vertex_colors, dtype=np.uint8)
+            attributes["COLOR_0"] = self.add_accessor(colors, UNSIGNED_BYTE, "VEC4", ARRAY_BUFFER,
+                                                      normalized=True)
+
+        index_type = (np.uint16, UNSIGNED_SHORT) if len(vertices) < 65536 else (np.uint32, UNSIGNED_INT)
+        indices = np.ascontiguousarray(mesh.faces, dtype=index_type[0]).ravel()
+        primitive = {"attributes": attributes, "mode": 4,
+                     "indices": self.add_accessor(indices, index_type[1], "SCALAR",
+                                                  ELEMENT_ARRAY_BUFFER)}
+
+        key = tuple(sorted(attributes.items())) + (primitive["indices"],)
+        if key not in self._meshes:
+            self.gltf["meshes"].append({"primitives": [primitive]})
+            self._meshes[key] = len(self.gltf["meshes"]) - 1
+        return self._meshes[key], dequantize
+
+    def add_node(self, name: str, mesh: int, transform: np.ndarray) -> None:
+        node: Dict[str, object] = {"name": name, "mesh": mesh}
+        if not np.allclose(transform, np.eye(4)):
+            node["matrix"] = transform.T.ravel().tolist()  # column-major
+        self.gltf["nodes"].append(node)
+
+    def to_bytes(self) -> bytes:
+        gltf: Dict[str, object] = {"asset": {"version": "2.0", "generator": "compact_glb.py"},
+                                   "scene": 0,
+                                   "scenes": [{"nodes": list(range(len(self.gltf["nodes"])))}]}
+        gltf.update(self.gltf)
+        gltf["buffers"] = [{"byteLength": self.size}]
+        if self.fallback_size:
+            gltf["buffers"].append({"byteLength": self.fallback_size,
+                                    "extensions": {"EXT_meshopt_compression": {"fallback": True}}})
+        if self.extensions:
+            gltf["extensionsUsed"] = sorted(self.extensions)
+            gltf["extensionsRequired"] = sorted(self.extensions)
+
+        header = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        header += b" " * (_align(len(header)) - len(header))
+        total = 12 + 8 + len(header) + 8 + self.size
+        return b"".join([GLB_MAGIC, struct.pack("<II", 2, total),
+                         struct.pack("<II", len(header), CHUNK_JSON), header,
+                         struct.pack("<II", self.size, CHUNK_BIN), *self.chunks])
+
+
+def write_glb(scene: trimesh.Scene | trimesh.Trimesh, path: str, quantize: bool = True,
+              meshopt: bool = False, normals: bool = False) -> Dict[str, int]:
+    """Write ``scene`` to ``path`` as a compact GLB and return size statistics."""
+    if isinstance(scene, trimesh.Trimesh):
+        scene = trimesh.Scene(scene)
+    builder = GlbBuilder(meshopt)
+    if quantize:
+        builder.extensions.add("KHR_mesh_quantization")
+
+    nodes = 0
+    for node in scene.graph.nodes_geometry:
+        transform, name = scene.graph[node]
+        geom = scene.geometry[name]
+        if not isinstance(geom, trimesh.Trimesh) or not len(geom.faces):
+            continue
+        mesh, dequantize = builder.add_mesh(geom, quantize, normals)
+        builder.add_node(str(node), mesh, np.asarray(transform) @ dequantize)
+        nodes += 1
+
+    data = builder.to_bytes()
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return {"bytes": len(data), "nodes": nodes, "meshes": len(builder.gltf["meshes"]),
+            "accessors": len(builder.gltf["accessors"])}
+
+
+def export_scene(scene: trimesh.Scene | trimesh.Trimesh, path: str, writer: str = "trimesh") -> None:
+    """Write ``scene`` with ``trimesh``, the compact or the streaming writer, see :data:`WRITERS`."""
+    if writer == "trimesh":
+        scene.export(path)
+    elif writer == "stream":
+        from glb_stream import write_scene  # glb_stream imports this module
+
+        write_scene(scene, path)
+    elif writer in WRITERS:
+        write_glb(scene, path, meshopt=writer == "meshopt")
+    else:
+        raise ValueError(f"unknown GLB writer: {writer}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rewrite a GLB file in compact form")
+    parser.add_argument("input", help="GLB file to read")
+    parser.add_argument("output", help="GLB file to write")
+    parser.add_argument("--meshopt", action="store_true",
+                        help="encode buffers with EXT_meshopt_compression")
+    parser.add_argument("--no-quantize", action="store_true", help="keep float32 positions")
+    parser.add_argument("--normals", action="store_true", help="store quantized vertex normals")
+    args = parser.parse_args()
+
+    stats = write_glb(trimesh.load(args.input, force="scene"), args.output,
+                      quantize=not args.no_quantize, meshopt=args.meshopt, normals=args.normals)
+    print(f"Wrote {args.output}: {stats['bytes']} bytes, {stats['nodes']} nodes, "
+          f"{stats['meshes']} meshes, {stats['accessors']} accessors")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,90 +9,160 @@ Requirements:
   - requests
   - trimesh (for simple geometry + glTF export)
 
+Day counts are binned with NumPy ``datetime64`` into a
+:class:`rollups.Rollups` index; with ``--cache-dir`` the index kept by the
+commit cache is read directly and no commit is counted again.
+
+The inputs (day counts, options, seed and ``GENERATOR_VERSION``) are hashed
+and recorded next to the model; when they have not changed since the last
+run, nothing is rebuilt or rewritten unless ``--force`` is given.
+
 Example usage:
   python generate_commit_sculpture.py --owner USER --repo REPO \
     --token YOURTOKEN --days 30 --output models/commit_sculpture.glb
 """
 
+from __future__ import annotations
+
 import argparse
 import datetime
-from collections import defaultdict
 import os
-import requests
-import trimesh
 
-from commit_randomizer import randomize_object
+import numpy as np
+
+import profiling
+from build_manifest import input_digest, record_build, up_to_date
+from commit_cache import load_github_store, records_table
+from compact_glb import WRITERS, export_scene
+from geometry import SceneBuilder
+from github_fetch import API_URL, GitHubFetcher
+from lazy import lazy_import
+from rollups import Rollups
+
+trimesh = lazy_import("trimesh")
+
+# Bump whenever the model changes for the same day counts
+GENERATOR_VERSION = 1
 
 
-def fetch_commits(owner: str, repo: str, token: str | None, days: int):
+def fetch_commits(owner: str, repo: str, token: str | None, days: int,
+                  http_cache: str | None = None, base_url: str = API_URL):
     """Return a list of commits from the last ``days`` days."""
-    since = (datetime.datetime.utcnow() - datetime.timedelta(days=days))
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits"
-    headers = {"Authorization": f"token {token}"} if token else {}
-    params = {"since": since.isoformat() + "Z", "per_page": 100, "page": 1}
-    commits: list[dict] = []
-    while True:
-        resp = requests.get(url, headers=headers, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        if not data:
-            break
-        commits.extend(data)
-        params["page"] += 1
+    commits, _ = fetch_commits_until(owner, repo, token, days, None, http_cache, base_url)
     return commits
 
 
-def commits_by_day(commits: list[dict], days: int) -> dict[str, int]:
-    """Return commit counts for each day in the range.
+def fetch_commits_until(owner: str, repo: str, token: str | None, days: int,
+                        until_sha: str | None, http_cache: str | None = None,
+                        base_url: str = API_URL) -> tuple[list[dict], bool]:
+    """Return commits newer than ``until_sha`` and whether it was reached.
+
+    Pages are downloaded in parallel through :class:`github_fetch.GitHubFetcher`,
+    which also honours rate limits and, with ``http_cache``, sends
+    ``If-None-Match`` for pages it has seen before.
+    """
+    since = (datetime.datetime.utcnow() - datetime.timedelta(days=days))
+    with GitHubFetcher(token, base_url=base_url, cache_dir=http_cache) as fetcher:
+        return fetcher.fetch_commits(owner, repo, since, until_sha)
 
-    Days with no commits should still appear with a count of ``0`` so that the
-    resulting model preserves consistent spacing between days.
+
+def daily_counts(rollups: Rollups, days: int) -> dict[str, int]:
+    """Return commit counts for each of the last ``days`` days from ``rollups``.
+
+    Days with no commits still appear with a count of ``0`` so that the
+    resulting model preserves consistent spacing between days. The range
+    is widened to any day outside it that holds commits.
     """
-    counts: defaultdict[str, int] = defaultdict(int)
-    for c in commits:
-        date = c["commit"]["committer"]["date"][:10]
-        counts[date] += 1
+    today = np.datetime64(datetime.datetime.utcnow().date(), "D")
+    start, end = today - (days - 1), today
+    if rollups.first_date is not None:
+        start, end = min(start, rollups.first_date), max(end, rollups.last_date)
+    return rollups.day_counts(start, end)
 
-    # Ensure we have an entry for every day in the requested range
-    today = datetime.datetime.utcnow().date()
-    for offset in range(days):
-        day = (today - datetime.timedelta(days=offset)).isoformat()
-        counts.setdefault(day, 0)
 
-    return dict(sorted(counts.items()))
+def commits_by_day(commits: list[dict], days: int) -> dict[str, int]:
+    """Return commit counts for each day in the range, see :func:`daily_counts`."""
+    return daily_counts(Rollups.from_table(records_table(commits)), days)
 
 
-def build_scene(counts: dict[str, int]):
-    meshes = []
+def build_scene(counts: dict[str, int], batched: bool = False):
+    builder = SceneBuilder(batched)
     days = sorted(counts.keys())
     for i, day in enumerate(days):
         height = max(1, counts[day])
         box = trimesh.creation.box(extents=[1.0, height, 1.0])
         box.apply_translation([i * 1.2, height / 2, 0])
-        meshes.append(box)
-    scene = trimesh.Scene(meshes)
+        builder.add(box, "bars")
+    scene = builder.scene()
     return scene
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate commit sculpture")
+def run(args: argparse.Namespace) -> None:
+    """Fetch, count and build as requested by the parsed command line."""
+    with profiling.stage("ingest"):
+        if args.cache_dir:
+            http_cache = os.path.join(args.cache_dir, "http")
+            rollups = load_github_store(
+                args.owner, args.repo, args.days, args.cache_dir,
+                lambda until_sha: fetch_commits_until(args.owner, args.repo, args.token,
+                                                      args.days, until_sha, http_cache,
+                                                      args.api_url)).rollups
+        else:
+            commits = fetch_commits(args.owner, args.repo, args.token, args.days,
+                                    base_url=args.api_url)
+            rollups = Rollups.from_table(records_table(commits))
+    with profiling.stage("patterns"):
+        counts = daily_counts(rollups, args.days)
+    seed = args.seed if args.seed is not None else int(input_digest(counts)[:8], 16)
+    digest = input_digest(counts, args.batched, args.glb_writer, seed, GENERATOR_VERSION)
+    if not args.force and up_to_date(args.output, digest):
+        print(f"{args.output} is up to date")
+        return
+
+    with profiling.stage("build"):
+        scene = build_scene(counts, args.batched)
+    with profiling.stage("export"):
+        export_scene(scene, args.output, args.glb_writer)
+
+    # Imported here so that an up-to-date run never loads the randomizer
+    from commit_randomizer import generation_rng, randomize_object
+
+    with profiling.stage("randomize"):
+        random_scene = scene.copy()
+        randomize_object(random_scene, generation_rng(seed, 1))
+    base, ext = os.path.splitext(args.output)
+    random_path = f"{base}_gen1{ext}"
+    with profiling.stage("export:gen1"):
+        random_scene.export(random_path)
+    record_build(args.output, digest, [args.output, random_path],
+                 seed=seed, generator_version=GENERATOR_VERSION)
+
+
+def build_parser(prog: str | None = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description="Generate commit sculpture")
     parser.add_argument("--owner", required=True, help="repository owner")
     parser.add_argument("--repo", required=True, help="repository name")
     parser.add_argument("--token", help="GitHub token")
     parser.add_argument("--days", type=int, default=30, help="number of days to scan")
     parser.add_argument("--output", default="models/commit_sculpture.glb")
-    args = parser.parse_args()
-
-    commits = fetch_commits(args.owner, args.repo, args.token, args.days)
-    counts = commits_by_day(commits, args.days)
-    scene = build_scene(counts)
-    scene.export(args.output)
-
-    random_scene = scene.copy()
-    randomize_object(random_scene)
-    base, ext = os.path.splitext(args.output)
-    random_path = f"{base}_gen1{ext}"
-    random_scene.export(random_path)
+    parser.add_argument("--api-url", default=API_URL, help="GitHub API base URL")
+    parser.add_argument("--cache-dir", help="keep an incremental commit cache in this directory")
+    parser.add_argument("--batched", action="store_true",
+                        help="merge all bars into a single mesh")
+    parser.add_argument("--glb-writer", choices=WRITERS, default="trimesh",
+                        help="writer for the main model; the _gen1 copy stays readable by trimesh")
+    parser.add_argument("--seed", type=int,
+                        help="seed for the _gen1 variant (default: derived from the day counts)")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild even if the inputs match the last build")
+    profiling.add_arguments(parser)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    with profiling.session(args):
+        run(args)
 
 
 if __name__ == "__main__":
@@ -13,414 +13,542 @@ The sculpture generation uses multiple aesthetic modes:
 - RHYTHMIC: Wave patterns from temporal commit patterns
 - CHAOTIC: Emergent complexity from change magnitude
 
+Several modes can be rendered from one ingestion and analysis pass with
+``--mode all`` or a list of modes; the scenes are then built and exported
+concurrently on a process pool.
+
+With ``--watch`` the script stays running after the first render. It keeps
+the commit table and rollups in memory (see :mod:`watch`), polls the
+repository's refs, and on every change ingests only the new commits and
+re-renders, in process, the modes whose digest changed. With ``--tiles``
+only the tile the new commits fall into is rebuilt. The time from noticing
+the change to the last file written is printed for every rebuild, with its
+ingest, pattern and render stages, against ``--latency-budget``.
+
 Example usage:
   python generate_enhanced_sculpture.py --owner USER --repo REPO \\
     --token TOKEN --days 30 --mode organic --output models/sculpture.glb
+  python generate_enhanced_sculpture.py --repo-path .. --mode all \\
+    --output "models/commit_sculpture_{mode}.glb"
+  python generate_enhanced_sculpture.py --repo-path .. --watch --install-hook
 """
 
+from __future__ import annotations
+
 import argparse
-import datetime
-import hashlib
+import functools
 import math
 import os
-import subprocess
-from collections import defaultdict
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
-import trimesh
 
+import profiling
+from build_manifest import input_digest, record_build, up_to_date
+from commit_cache import load_git_store, records_table
+from commit_random import CommitRandom
+from commit_table import CommitTable
+from compact_glb import WRITERS, export_scene
+from geometry import SceneBuilder, detail_subdivisions, template
+from git_ingest import CommitData, iter_git_commits, since_date
+from glb_stream import GlbStream
+from lazy import lazy_import
+from lod import DEFAULT_BUDGETS, describe_levels, write_lods
+from lod import manifest_path as lod_manifest_path
+from patterns import detect_patterns
+from rollups import Rollups
+from tiles import INDEX_NAME, PERIODS, tile_days, write_tiles
 
-@dataclass
-class CommitData:
-    """Rich commit data for sculpture generation."""
-    sha: str
-    author: str
-    timestamp: int
-    hour: int
-    is_human: bool
-    files_changed: int
-    additions: int
-    deletions: int
-    message: str
+trimesh = lazy_import("trimesh")
 
+# Everything the analysis and builders accept: a columnar table or a plain list
+Commits = Union[CommitTable, List[CommitData]]
 
-def fetch_detailed_commits_from_git(repo_path: str, days: int) -> List[CommitData]:
-    """Fetch commits directly from git with detailed file change statistics."""
-    since = (datetime.datetime.utcnow() - datetime.timedelta(days=days))
-    since_str = since.strftime("%Y-%m-%d")
-
-    # Get commit list with basic info
-    cmd = [
-        "git", "-C", repo_path, "log",
-        f"--since={since_str}",
-        "--all",
-        "--pretty=format:%H|%an|%at|%s"
-    ]
-
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    commits: List[CommitData] = []
-
-    for line in result.stdout.strip().split('\n'):
-        if not line:
-            continue
-
-        parts = line.split('|', 3)
-        if len(parts) < 4:
-            continue
-
-        sha, author, timestamp_str, message = parts
-
-        # Get file stats for this commit
-        stats_cmd = ["git", "-C", repo_path, "show", "--stat", "--format=", sha]
-        stats_result = subprocess.run(stats_cmd, capture_output=True, text=True, check=True)
-
-        # Parse stats
-        files_changed = 0
-        additions = 0
-        deletions = 0
-
-        for stat_line in stats_result.stdout.strip().split('\n'):
-            if not stat_line or 'changed' not in stat_line:
-                continue
+# Bump whenever a builder's output changes for the same commits
+GENERATOR_VERSION = 3
 
-            # Parse lines like: " 2 files changed, 4 insertions(+), 2 deletions(-)"
-            if 'file' in stat_line and 'changed' in stat_line:
-                parts = stat_line.split(',')
-                for part in parts:
-                    if 'changed' in part:
-                        files_changed = int(part.split()[0])
-                    elif 'insertion' in part:
-                        additions = int(part.split()[0])
-                    elif 'deletion' in part:
-                        deletions = int(part.split()[0])
-
-        # Convert timestamp
-        ts = int(timestamp_str)
-        dt = datetime.datetime.fromtimestamp(ts)
-
-        # Detect automation
-        is_human = not any(bot in author.lower() for bot in ['bot', 'action', 'ci', 'cd'])
-
-        commit_data = CommitData(
-            sha=sha[:7],
-            author=author,
-            timestamp=ts,
-            hour=dt.hour,
-            is_human=is_human,
-            files_changed=max(1, files_changed),  # Ensure at least 1
-            additions=additions,
-            deletions=deletions,
-            message=message[:50]
-        )
-        commits.append(commit_data)
-
-    return commits
-
-
-def detect_patterns(commits: List[CommitData]) -> Dict[str, any]:
-    """Detect emergent patterns in commit data."""
-    if not commits:
-        return {}
 
-    # Temporal patterns
-    hour_counts = defaultdict(int)
-    for c in commits:
-        hour_counts[c.hour] += 1
-
-    # Detect commit bursts (multiple commits within short time windows)
-    sorted_commits = sorted(commits, key=lambda c: c.timestamp)
-    bursts = []
-    burst_window = 3600  # 1 hour
-
-    i = 0
-    while i < len(sorted_commits):
-        burst_size = 1
-        while (i + burst_size < len(sorted_commits) and
-               sorted_commits[i + burst_size].timestamp - sorted_commits[i].timestamp < burst_window):
-            burst_size += 1
-        if burst_size >= 3:
-            bursts.append((i, burst_size))
-        i += burst_size
-
-    # Author collaboration
-    human_commits = sum(1 for c in commits if c.is_human)
-    auto_commits = len(commits) - human_commits
-
-    # Code impact
-    total_changes = sum(c.additions + c.deletions for c in commits)
-    avg_change = total_changes / len(commits) if commits else 0
-
-    # Find peak activity hour
-    peak_hour = max(hour_counts.items(), key=lambda x: x[1])[0] if hour_counts else 12
-
-    return {
-        "hour_distribution": dict(hour_counts),
-        "bursts": bursts,
-        "human_ratio": human_commits / len(commits) if commits else 0.5,
-        "automation_ratio": auto_commits / len(commits) if commits else 0.5,
-        "avg_impact": avg_change,
-        "peak_hour": peak_hour,
-        "total_changes": total_changes
-    }
-
-
-def build_organic_sculpture(commits: List[CommitData], patterns: Dict) -> trimesh.Scene:
-    """Generate organic, branch-like structures based on collaboration patterns."""
-    meshes = []
+def fetch_detailed_commits_from_git(repo_path: str, days: int) -> List[CommitData]:
+    """Fetch commits directly from git with detailed file change statistics.
 
-    # Group by time windows
-    if not commits:
-        return trimesh.Scene([trimesh.creation.box(extents=[1, 1, 1])])
+    The whole window is read from a single ``git log --shortstat`` stream, see
+    :mod:`git_ingest`.
+    """
+    return list(iter_git_commits(repo_path, since_date(days)))
 
-    sorted_commits = sorted(commits, key=lambda c: c.timestamp)
 
-    # Create branch structure
-    branch_points = []
-    for i, commit in enumerate(sorted_commits):
-        # Position based on time
-        x = i * 0.8
+def fetch_commit_table(repo_path: str, days: int, jobs: int = 1) -> CommitTable:
+    """Like :func:`fetch_detailed_commits_from_git` but streamed straight into a :class:`CommitTable`.
 
-        # Height based on impact
-        impact = math.log1p(commit.additions + commit.deletions)
-        y = impact * 2
+    With ``jobs`` above one, large windows are read by that many ``git log``
+    processes, see :func:`git_ingest.iter_sharded_records`.
+    """
+    return CommitTable.from_commits(iter_git_commits(repo_path, since_date(days), jobs=jobs))
 
-        # Z deviation based on author (human vs bot)
-        z = 2.0 if commit.is_human else -2.0
 
-        # Add hour-of-day influence as spiral
-        hour_angle = (commit.hour / 24.0) * 2 * math.pi
-        z += math.sin(hour_angle) * 1.5
-        y += math.cos(hour_angle) * 0.5
+def load_history(repo_path: str, days: int, cache_dir: Optional[str] = None,
+                 jobs: int = 1) -> Tuple[CommitTable, Optional[Rollups]]:
+    """Return the last ``days`` days of history and, through the commit cache, their rollups.
 
-        branch_points.append((x, y, z))
+    Without ``cache_dir`` the history is read straight from git and there
+    are no stored rollups.
+    """
+    if cache_dir:
+        store = load_git_store(repo_path, days, cache_dir, jobs)
+        return records_table(store.records), store.rollups
+    return fetch_commit_table(repo_path, days, jobs), None
 
-        # Create node at this point
-        radius = 0.3 + (commit.files_changed * 0.1)
-        node = trimesh.creation.icosphere(subdivisions=2, radius=radius)
-        node.apply_translation([x, y, z])
 
-        # Color based on commit type
-        if commit.is_human:
-            node.visual.vertex_colors = [100, 150, 255, 255]  # Blue for human
-        else:
-            node.visual.vertex_colors = [255, 150, 100, 255]  # Orange for automation
+def load_commit_table(repo_path: str, days: int, cache_dir: Optional[str] = None) -> CommitTable:
+    """Return the last ``days`` days of history, through the commit cache if ``cache_dir`` is set."""
+    return load_history(repo_path, days, cache_dir)[0]
 
-        meshes.append(node)
 
-        # Connect to previous commit with cylinder
-        if i > 0:
-            prev = branch_points[i-1]
-            curr = branch_points[i]
+def _impact(table: CommitTable) -> np.ndarray:
+    return np.log1p(table.changes)
 
-            # Create connecting branch
-            length = math.sqrt(sum((a-b)**2 for a, b in zip(curr, prev)))
-            if length > 0:
-                branch = trimesh.creation.cylinder(radius=0.15, height=length)
 
-                # Orient cylinder between points
-                direction = np.array([curr[j] - prev[j] for j in range(3)])
-                direction = direction / np.linalg.norm(direction)
+def _author_colors(is_human: np.ndarray, human: List[int], automation: List[int]) -> np.ndarray:
+    return np.where(is_human[:, np.newaxis], np.array(human, dtype=np.uint8),
+                    np.array(automation, dtype=np.uint8))
 
-                midpoint = [(prev[j] + curr[j]) / 2 for j in range(3)]
-                branch.apply_translation(midpoint)
 
-                meshes.append(branch)
+def build_organic_sculpture(commits: Commits, patterns: Dict, batched: bool = False,
+                            stream: Optional[GlbStream] = None) -> Optional[trimesh.Scene]:
+    """Generate organic, branch-like structures based on collaboration patterns."""
+    builder = SceneBuilder(batched, stream)
+    table = CommitTable.coerce(commits)
 
-    return trimesh.Scene(meshes)
+    # Group by time windows
+    if not len(table):
+        return trimesh.Scene([trimesh.creation.box(extents=[1, 1, 1])])
 
+    table = table.sorted_by_time()
+    is_human = table.is_human
+    hour_angle = (table.hour / 24.0) * 2 * math.pi
 
-def build_crystalline_sculpture(commits: List[CommitData], patterns: Dict) -> trimesh.Scene:
-    """Generate geometric, crystalline forms from code structure."""
-    meshes = []
+    # Create branch structure: X follows time, Y impact, Z author type
+    # (human vs bot) plus an hour-of-day spiral
+    x = np.arange(len(table)) * 0.8
+    y = _impact(table) * 2 + np.cos(hour_angle) * 0.5
+    z = np.where(is_human, 2.0, -2.0) + np.sin(hour_angle) * 1.5
+    branch_points = np.column_stack([x, y, z])
 
-    if not commits:
-        return trimesh.Scene([trimesh.creation.box(extents=[1, 1, 1])])
+    # Create a node at each point, blue for human and orange for automation
+    radius = 0.3 + table.files_changed * 0.1
+    colors = _author_colors(is_human, [100, 150, 255, 255], [255, 150, 100, 255])
+    builder.add_instances(template("icosphere", detail_subdivisions(len(table))),
+                          branch_points, radius, colors, "nodes")
 
-    # Create crystal formation based on commit impact
-    center = np.array([0, 0, 0])
+    # Connect the commits with one tube that thickens with commit impact
+    if len(table) > 1:
+        branch_radius = np.minimum(0.08 + _impact(table) * 0.04, 0.3)
+        builder.add_tube(branch_points, branch_radius, "branches")
 
-    for i, commit in enumerate(commits):
-        # Angular position based on hour
-        angle = (commit.hour / 24.0) * 2 * math.pi + (i * 0.3)
+    return builder.scene()
 
-        # Radial distance based on impact
-        impact = math.log1p(commit.additions + commit.deletions)
-        radius = 3 + impact * 0.5
 
-        # Height based on sequence
-        height = i * 0.5
+def build_crystalline_sculpture(commits: Commits, patterns: Dict, batched: bool = False,
+                                stream: Optional[GlbStream] = None) -> Optional[trimesh.Scene]:
+    """Generate geometric, crystalline forms from code structure."""
+    builder = SceneBuilder(batched, stream)
+    table = CommitTable.coerce(commits)
 
-        # Create crystal spike
-        x = radius * math.cos(angle)
-        z = radius * math.sin(angle)
-        y = height
+    if not len(table):
+        return trimesh.Scene([trimesh.creation.box(extents=[1, 1, 1])])
 
-        # Make sharper crystals for bigger changes
-        sharpness = min(5, 1 + commit.files_changed * 0.5)
-        crystal = trimesh.creation.cone(radius=0.5, height=sharpness)
+    # Create crystal formation based on commit impact
+    index = np.arange(len(table))
 
-        # Orient outward from center
-        crystal.apply_translation([x, y, z])
+    # Angular position based on hour, radial distance on impact, height on sequence
+    angle = (table.hour / 24.0) * 2 * math.pi + (index * 0.3)
+    radius = 3 + _impact(table) * 0.5
+    positions = np.column_stack([radius * np.cos(angle), index * 0.5, radius * np.sin(angle)])
 
-        # Geometric faceting for crystalline look
-        if commit.is_human:
-            crystal.visual.vertex_colors = [150, 200, 255, 255]
-        else:
-            crystal.visual.vertex_colors = [255, 200, 150, 255]
+    # Make sharper crystals for bigger changes
+    sharpness = np.minimum(5, 1 + table.files_changed * 0.5)
+    scales = np.column_stack([np.full(len(table), 0.5), np.full(len(table), 0.5), sharpness])
 
-        meshes.append(crystal)
+    # Geometric faceting for crystalline look
+    colors = _author_colors(table.is_human, [150, 200, 255, 255], [255, 200, 150, 255])
+    builder.add_instances(template("cone"), positions, scales, colors, "crystals")
 
     # Add central core
     core_size = math.log1p(patterns.get("total_changes", 100)) * 0.5
     core = trimesh.creation.icosphere(subdivisions=3, radius=core_size)
     core.visual.vertex_colors = [200, 200, 200, 255]
-    meshes.append(core)
+    builder.add(core, "core")
 
-    return trimesh.Scene(meshes)
+    return builder.scene()
 
 
-def build_rhythmic_sculpture(commits: List[CommitData], patterns: Dict) -> trimesh.Scene:
+def build_rhythmic_sculpture(commits: Commits, patterns: Dict, batched: bool = False,
+                             stream: Optional[GlbStream] = None) -> Optional[trimesh.Scene]:
     """Generate wave patterns from temporal commit rhythms."""
-    meshes = []
+    builder = SceneBuilder(batched, stream)
 
-    if not commits:
+    if not len(commits):
         return trimesh.Scene([trimesh.creation.box(extents=[1, 1, 1])])
 
     hour_dist = patterns.get("hour_distribution", {})
+    count = np.array([hour_dist.get(hour, 0) for hour in range(24)], dtype=np.float64)
 
-    # Create wave based on hourly activity
-    points = []
-    for hour in range(24):
-        count = hour_dist.get(hour, 0)
-
-        # Position around a circle
-        angle = (hour / 24.0) * 2 * math.pi
-        radius = 5
+    # Create wave based on hourly activity: hours around a circle, height by activity
+    angle = (np.arange(24) / 24.0) * 2 * math.pi
+    radius = 5
+    points = np.column_stack([radius * np.cos(angle), count * 2, radius * np.sin(angle)])
 
-        x = radius * math.cos(angle)
-        z = radius * math.sin(angle)
-        y = count * 2  # Height based on activity
+    # Create sphere at each hour, colored by intensity
+    intensity = np.minimum(255, (count * 50).astype(np.int64))
+    colors = np.column_stack([intensity, np.full(24, 100), 255 - intensity, np.full(24, 255)])
+    builder.add_instances(template("icosphere", 2), points, 0.3 + count * 0.2,
+                          colors.astype(np.uint8), "spheres")
 
-        points.append([x, y, z])
+    # Connect points in a closed wave, thicker through busy hours
+    tube_radius = 0.1 + 0.1 * count / max(count.max(), 1)
+    builder.add_tube(points, tube_radius, "tubes", closed=True)
 
-        # Create sphere at each hour
-        sphere = trimesh.creation.icosphere(subdivisions=2, radius=0.3 + count * 0.2)
-        sphere.apply_translation([x, y, z])
+    return builder.scene()
 
-        # Color based on intensity
-        intensity = min(255, int(count * 50))
-        sphere.visual.vertex_colors = [intensity, 100, 255 - intensity, 255]
 
-        meshes.append(sphere)
-
-    # Connect points in wave
-    for i in range(len(points)):
-        next_i = (i + 1) % len(points)
-        p1, p2 = points[i], points[next_i]
-
-        length = np.linalg.norm(np.array(p2) - np.array(p1))
-        if length > 0:
-            tube = trimesh.creation.cylinder(radius=0.15, height=length)
-            midpoint = [(p1[j] + p2[j]) / 2 for j in range(3)]
-            tube.apply_translation(midpoint)
-            meshes.append(tube)
-
-    return trimesh.Scene(meshes)
-
-
-def build_chaotic_sculpture(commits: List[CommitData], patterns: Dict) -> trimesh.Scene:
+def build_chaotic_sculpture(commits: Commits, patterns: Dict, batched: bool = False,
+                            stream: Optional[GlbStream] = None) -> Optional[trimesh.Scene]:
     """Generate emergent complexity from change magnitude."""
-    meshes = []
+    builder = SceneBuilder(batched, stream)
+    table = CommitTable.coerce(commits)
 
-    if not commits:
+    if not len(table):
         return trimesh.Scene([trimesh.creation.box(extents=[1, 1, 1])])
 
-    # Use L-system inspired growth
-    positions = []
+    # Pseudo-random but deterministic per-commit values keyed by the SHA:
+    # RGB in [100, 256), a position jitter and a size factor
+    draws = CommitRandom(table.sha).random(7, dtype=np.float32).astype(np.float64)
+    colors = np.empty((len(table), 4), dtype=np.uint8)
+    colors[:, :3] = 100 + (draws[:, :3] * 156).astype(np.int64)
+    colors[:, 3] = 255
+    jitter = (draws[:, 3:6] - 0.5) * 0.5
+
+    # Use L-system inspired growth: each commit grows from the previous
+    # position in a direction influenced by its properties
+    hour_angle = table.hour / 24.0 * 2 * math.pi
+    direction = np.column_stack([
+        np.sin(hour_angle),
+        table.additions * 0.01,
+        np.cos(hour_angle),
+    ])
+    step_size = _impact(table) * 0.5
+    steps = direction * step_size[:, np.newaxis]
+    steps[0] = 0.0
+    positions = np.cumsum(steps, axis=0) + jitter
+
+    # Alternate between spheres (human) and cubes (automation)
+    size = (0.2 + table.files_changed * 0.1) * (0.8 + draws[:, 6] * 0.4)
+    is_human = table.is_human
+    builder.add_instances(template("icosphere", detail_subdivisions(len(table), 1)),
+                          positions[is_human], size[is_human],
+                          colors[is_human], "spheres")
+    builder.add_instances(template("box"), positions[~is_human], size[~is_human] * 2,
+                          colors[~is_human], "boxes")
+
+    return builder.scene()
+
+
+BUILDERS = {
+    "organic": build_organic_sculpture,
+    "crystalline": build_crystalline_sculpture,
+    "rhythmic": build_rhythmic_sculpture,
+    "chaotic": build_chaotic_sculpture,
+}
+
+
+def output_path(pattern: str, mode: str, multiple: bool) -> str:
+    """Return the output file of ``mode``.
+
+    ``{mode}`` in ``pattern`` is replaced by the mode name. Without it, a
+    multi-mode run appends ``_<mode>`` to the file name.
+    """
+    if "{mode}" in pattern:
+        return pattern.replace("{mode}", mode)
+    if multiple:
+        root, ext = os.path.splitext(pattern)
+        return f"{root}_{mode}{ext}"
+    return pattern
 
-    for i, commit in enumerate(commits):
-        # Pseudo-random but deterministic position based on commit data
-        stable_hash = hashlib.sha256(commit.sha.encode("utf-8")).digest()
-        seed = int.from_bytes(stable_hash[:4], "big")
-        np.random.seed(seed)
 
-        if i == 0:
-            pos = np.array([0.0, 0.0, 0.0])
-        else:
-            # Grow from previous position
-            prev_pos = positions[-1]
-
-            # Direction influenced by commit properties
-            direction = np.array([
-                math.sin(commit.hour / 24.0 * 2 * math.pi),
-                commit.additions * 0.01,
-                math.cos(commit.hour / 24.0 * 2 * math.pi)
-            ])
-
-            step_size = math.log1p(commit.deletions + commit.additions) * 0.5
-            pos = prev_pos + direction * step_size
+@dataclass
+class RenderOptions:
+    """How each mode is built and written, see :func:`render_mode`."""
+
+    batched: bool = False
+    writer: str = "trimesh"
+    lod_budgets: Optional[List[int]] = None
+    tiles: Optional[str] = None
+
+
+def mode_digest(commits: Commits, mode: str, options: RenderOptions) -> str:
+    """Return the digest of everything that determines the ``mode`` model."""
+    return CommitTable.coerce(commits).digest(
+        input_digest(mode, asdict(options), GENERATOR_VERSION))
+
+
+def render_mode(mode: str, commits: Commits, patterns: Dict, output: str,
+                options: RenderOptions, digest: Optional[str] = None) -> Tuple[float, List[str]]:
+    """Build the ``mode`` sculpture and export it to ``output``.
+
+    ``options.writer`` selects the GLB writer, see
+    :func:`compact_glb.export_scene`; with ``"stream"`` the builder writes
+    straight into a :class:`glb_stream.GlbStream` and no scene is kept. With ``options.lod_budgets`` the coarse
+    levels and their manifest are written as well, see :func:`lod.write_lods`.
+    With ``options.tiles`` the history is split into week or month tiles
+    written to ``<output>_tiles/`` instead, see :func:`tiles.write_tiles`.
+    With ``digest`` the build is recorded in a manifest next to ``output``,
+    see :mod:`build_manifest`. Returns the seconds taken and report lines,
+    the first of which names what was written.
+    """
+    start = time.perf_counter()
+    if options.tiles:
+        directory = os.path.splitext(output)[0] + "_tiles"
+        build = functools.partial(BUILDERS[mode], batched=options.batched)
+        key = f"{mode}:{options.batched}:{options.writer}:{GENERATOR_VERSION}"
+        with profiling.stage(f"tiles:{mode}"):
+            summary = write_tiles(commits, build, directory, options.tiles, key, options.writer)
+        files = [os.path.join(directory, INDEX_NAME)]
+        lines = [f"  Wrote {summary['tiles']} {options.tiles} tiles to {directory}: "
+                 f"{summary['exported']} exported, {summary['reused']} unchanged, "
+                 f"{summary['removed']} removed"]
+    elif options.writer == "stream" and not options.lod_budgets:
+        with GlbStream(output) as stream:
+            with profiling.stage(f"build:{mode}"):
+                scene = BUILDERS[mode](commits, patterns, options.batched, stream)
+            with profiling.stage(f"export:{mode}"):
+                if scene is not None:  # builders return a placeholder scene for empty histories
+                    stream.add_scene(scene)
+                stream.close()
+        lines = [f"  Exported {output}"]
+        files = [output]
+    else:
+        with profiling.stage(f"build:{mode}"):
+            scene = BUILDERS[mode](commits, patterns, options.batched)
+        with profiling.stage(f"export:{mode}"):
+            export_scene(scene, output, options.writer)
+        lines = [f"  Exported {output}"]
+        files = [output]
+        if options.lod_budgets:
+            with profiling.stage(f"lod:{mode}"):
+                levels = write_lods(scene, output, options.lod_budgets, options.writer)
+            lines.extend(describe_levels(levels))
+            files.append(lod_manifest_path(output))
+            files.extend(os.path.join(os.path.dirname(output), level["file"]) for level in levels)
+    if digest:
+        record_build(output, digest, files, mode=mode, generator_version=GENERATOR_VERSION)
+    return time.perf_counter() - start, lines
+
+
+def render_modes(commits: Commits, patterns: Dict, modes: List[str], outputs: List[str],
+                 options: RenderOptions, jobs: int = 1,
+                 digests: Optional[List[str]] = None) -> None:
+    """Render every mode in ``modes`` to the matching path in ``outputs``.
+
+    With more than one job the builders run in worker processes, each of
+    which also exports its own scene. While profiling, the workers' stages
+    are merged into the parent's report.
+    """
+    if jobs <= 1 or len(modes) == 1:
+        for mode, output, digest in zip(modes, outputs, digests or [None] * len(modes)):
+            print(f"Generating {mode} sculpture...")
+            elapsed, lines = render_mode(mode, commits, patterns, output, options, digest)
+            print(f"{lines[0]} ({elapsed:.1f}s)")
+            for line in lines[1:]:
+                print(line)
+        return
+
+    print(f"Generating {', '.join(modes)} sculptures with {min(jobs, len(modes))} workers...")
+    with ProcessPoolExecutor(max_workers=min(jobs, len(modes))) as pool:
+        task = functools.partial(profiling.run_profiled, render_mode) if profiling.active() \
+            else render_mode
+        futures = [pool.submit(task, mode, commits, patterns, output, options, digest)
+                   for mode, output, digest in zip(modes, outputs, digests or [None] * len(modes))]
+        for mode, output, future in zip(modes, outputs, futures):
+            result = future.result()
+            if profiling.active():
+                result, stages = result
+                profiling.merge(stages)
+            elapsed, lines = result
+            print(f"{lines[0]} ({elapsed:.1f}s)")
+            for line in lines[1:]:
+                print(line)
+
+
+def describe_patterns(patterns: Dict) -> List[str]:
+    """Return the pattern summary lines printed before rendering."""
+    return [f"  Human commits: {patterns.get('human_ratio', 0)*100:.1f}%",
+            f"  Peak activity hour: {patterns.get('peak_hour', 0)}:00",
+            f"  Commit bursts detected: {len(patterns.get('bursts', []))}",
+            f"  Average impact: {patterns.get('avg_impact', 0):.1f} lines changed"]
+
+
+def render_options(args: argparse.Namespace) -> RenderOptions:
+    return RenderOptions(batched=args.batched, writer=args.glb_writer,
+                         lod_budgets=args.lod_budgets if args.lod else None,
+                         tiles=args.tiles)
+
+
+def render_history(commits: CommitTable, rollups: Optional[Rollups], modes: List[str],
+                   outputs: List[str], options: RenderOptions, jobs: int = 1,
+                   force: bool = False) -> Dict[str, float]:
+    """Render the modes whose output is not up to date with ``commits``.
+
+    Returns the seconds spent detecting patterns and rendering, by stage;
+    empty when nothing had to be rebuilt.
+    """
+    digests = [mode_digest(commits, mode, options) for mode in modes]
+    pending = [i for i, (output, digest) in enumerate(zip(outputs, digests))
+               if force or not up_to_date(output, digest)]
+    for i in sorted(set(range(len(modes))) - set(pending)):
+        print(f"  {outputs[i]} is up to date ({modes[i]})")
+    if not pending:
+        print("✓ Nothing to rebuild")
+        return {}
 
-        positions.append(pos)
+    print("Detecting patterns...")
+    start = time.perf_counter()
+    with profiling.stage("patterns"):
+        patterns = detect_patterns(commits, rollups=rollups)
+    for line in describe_patterns(patterns):
+        print(line)
+
+    detected = time.perf_counter()
+    with profiling.stage("render"):
+        render_modes(commits, patterns, [modes[i] for i in pending],
+                     [outputs[i] for i in pending], options, jobs,
+                     [digests[i] for i in pending])
+    return {"patterns": detected - start, "render": time.perf_counter() - detected}
+
+
+def run(args: argparse.Namespace) -> None:
+    """Ingest, analyze and render as requested by the parsed command line."""
+    if args.watch:
+        run_watch(args)
+        return
+    modes = list(BUILDERS) if "all" in args.mode else list(dict.fromkeys(args.mode))
+    outputs = [output_path(args.output, mode, len(modes) > 1) for mode in modes]
+
+    # Tiles read whole weeks or months, so that the oldest tile does not change
+    days = tile_days(args.days, args.tiles) if args.tiles else args.days
+    print(f"Fetching commit data from {args.repo_path}...")
+    with profiling.stage("ingest"):
+        commits, rollups = load_history(args.repo_path, days, args.cache_dir, args.jobs)
+    print(f"Found {len(commits)} commits")
 
-        # Create form at position
-        size = 0.2 + (commit.files_changed * 0.1)
+    if render_history(commits, rollups, modes, outputs, render_options(args),
+                      args.jobs, args.force):
+        print("✓ Enhanced sculpture generated successfully!")
+        print(f"\nView at: commit_sculpture.html")
 
-        # Alternate between different shapes
-        if commit.is_human:
-            shape = trimesh.creation.icosphere(subdivisions=1, radius=size)
-        else:
-            shape = trimesh.creation.box(extents=[size*2, size*2, size*2])
 
-        shape.apply_translation(pos)
+def _stop(signum, frame) -> None:
+    raise KeyboardInterrupt
 
-        # Chaotic coloring derived from a stable hash so outputs remain reproducible
-        color_hash = hashlib.sha256(f"{commit.sha}:color".encode("utf-8")).digest()
-        r, g, b = [(component % 156) + 100 for component in color_hash[:3]]
-        shape.visual.vertex_colors = [r, g, b, 255]
 
-        meshes.append(shape)
+def run_watch(args: argparse.Namespace) -> None:
+    """Render, then re-render from the in-memory history whenever the refs move.
 
-    return trimesh.Scene(meshes)
+    Rendering stays in this process: a worker pool would have to be started
+    and sent the whole table on every rebuild. Stops on Ctrl-C or SIGTERM,
+    writing the commit cache back and printing the latency summary.
+    """
+    # Imported here so that one-shot runs never load the watcher
+    from watch import LiveHistory, RefWatcher, install_hook
 
+    modes = list(BUILDERS) if "all" in args.mode else list(dict.fromkeys(args.mode))
+    outputs = [output_path(args.output, mode, len(modes) > 1) for mode in modes]
+    options = render_options(args)
+    if args.install_hook:
+        print(f"Installed {install_hook(args.repo_path)}")
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate enhanced commit sculpture")
+    watcher = RefWatcher(args.repo_path, args.interval)
+    print(f"Fetching commit data from {args.repo_path}...")
+    with profiling.stage("ingest"):
+        history = LiveHistory(args.repo_path, args.days, args.cache_dir, args.jobs, args.tiles)
+    print(f"Found {len(history.table)} commits")
+    render_history(history.table, history.rollups, modes, outputs, options, force=args.force)
+
+    signal.signal(signal.SIGTERM, _stop)
+    latencies: List[float] = []
+    print(f"Watching {watcher.git_dir} for new commits (Ctrl-C to stop)...")
+    try:
+        while True:
+            watcher.wait()
+            start = time.perf_counter()
+            with profiling.stage("ingest"):
+                added, removed = history.refresh()
+            stages = {"ingest": time.perf_counter() - start}
+            if not added and not removed:
+                continue
+            print(f"+{added} -{removed} commits, {len(history.table)} in the window")
+            stages.update(render_history(history.table, history.rollups, modes, outputs, options))
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            verdict = "within" if latency <= args.latency_budget else "OVER"
+            print(f"Rebuilt in {latency * 1000:.0f} ms ("
+                  + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in stages.items())
+                  + f"), {verdict} the {args.latency_budget * 1000:.0f} ms budget")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        history.save()
+    if latencies:
+        ordered = sorted(latencies)
+        over = sum(latency > args.latency_budget for latency in latencies)
+        print(f"Rebuilds: {len(latencies)}, median {ordered[len(ordered) // 2] * 1000:.0f} ms, "
+              f"max {ordered[-1] * 1000:.0f} ms, {over} over the budget")
+
+
+def build_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description="Generate enhanced commit sculpture")
     parser.add_argument("--repo-path", default=".", help="path to git repository")
     parser.add_argument("--days", type=int, default=30, help="number of days to scan")
-    parser.add_argument("--mode", choices=["organic", "crystalline", "rhythmic", "chaotic"],
-                       default="organic", help="aesthetic mode")
-    parser.add_argument("--output", default="models/commit_sculpture_enhanced.glb")
-    args = parser.parse_args()
-
-    print(f"Fetching commit data from {args.repo_path}...")
-    commits = fetch_detailed_commits_from_git(args.repo_path, args.days)
-    print(f"Found {len(commits)} commits")
-
-    print("Detecting patterns...")
-    patterns = detect_patterns(commits)
-    print(f"  Human commits: {patterns.get('human_ratio', 0)*100:.1f}%")
-    print(f"  Peak activity hour: {patterns.get('peak_hour', 0)}:00")
-    print(f"  Commit bursts detected: {len(patterns.get('bursts', []))}")
-    print(f"  Average impact: {patterns.get('avg_impact', 0):.1f} lines changed")
-
-    print(f"Generating {args.mode} sculpture...")
-
-    if args.mode == "organic":
-        scene = build_organic_sculpture(commits, patterns)
-    elif args.mode == "crystalline":
-        scene = build_crystalline_sculpture(commits, patterns)
-    elif args.mode == "rhythmic":
-        scene = build_rhythmic_sculpture(commits, patterns)
-    else:  # chaotic
-        scene = build_chaotic_sculpture(commits, patterns)
-
-    print(f"Exporting to {args.output}...")
-    scene.export(args.output)
-
-    print("✓ Enhanced sculpture generated successfully!")
-    print(f"\nView at: commit_sculpture.html")
+    parser.add_argument("--mode", nargs="+", choices=list(BUILDERS) + ["all"],
+                       default=["organic"], help="aesthetic mode(s), or 'all'")
+    parser.add_argument("--output", default="models/commit_sculpture_enhanced.glb",
+                       help="output file; '{mode}' is replaced by the mode name")
+    parser.add_argument("--cache-dir", help="keep an incremental commit cache in this directory")
+    parser.add_argument("--glb-writer", choices=WRITERS, default="trimesh",
+                       help="'compact' quantizes and deduplicates, 'meshopt' also compresses, "
+                            "'stream' writes meshes as they are built")
+    parser.add_argument("--batched", action="store_true",
+                       help="merge primitives into one mesh per material class")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                       help="worker processes for reading large histories and "
+                            "rendering several modes")
+    parser.add_argument("--lod", action="store_true",
+                       help="also write coarse levels of detail and a .lod.json manifest")
+    parser.add_argument("--lod-budgets", type=int, nargs="+", default=list(DEFAULT_BUDGETS),
+                       help="triangle budget of each coarse level")
+    parser.add_argument("--force", action="store_true",
+                       help="rebuild even if the inputs match the last build")
+    parser.add_argument("--tiles", choices=PERIODS,
+                       help="write one GLB per week or month to <output>_tiles/ instead")
+    parser.add_argument("--watch", action="store_true",
+                       help="keep running and rebuild whenever the repository's refs move")
+    parser.add_argument("--interval", type=float, default=0.25,
+                       help="seconds between polls of the refs in --watch mode")
+    parser.add_argument("--install-hook", action="store_true",
+                       help="with --watch, add a post-commit hook that wakes the watcher")
+    parser.add_argument("--latency-budget", type=float, default=1.0,
+                       help="seconds a --watch rebuild should take, reported per rebuild")
+    profiling.add_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    with profiling.session(args):
+        run(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Generate one sculpture from many local repositories.
+
+Repositories are given as paths on the command line and/or in a manifest
+file (one path per line; lines starting with ``#`` and anything after a
+``#`` that follows whitespace are comments). A process pool with a
+bounded number of workers ingests every repository and detects its patterns
+in parallel. The per-repository commit tables are then merged into a
+combined table, which is analyzed once more and rendered as a single
+sculpture. With ``--per-repo`` each worker also builds the sculpture of its
+own repository and the parent lays the sub-sculptures out on a grid in one
+scene instead. Repositories that fail are skipped, but the exit status is 1
+if any did, and nothing is written if all of them did.
+
+Example usage:
+  python generate_org_sculpture.py --manifest repos.txt --days 90 \\
+    --mode crystalline --jobs 8 --output models/org_sculpture.glb
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import profiling
+from commit_cache import load_git_commits
+from commit_table import CommitTable
+from generate_enhanced_sculpture import BUILDERS, fetch_commit_table
+from lazy import lazy_import
+from patterns import detect_patterns
+
+trimesh = lazy_import("trimesh")
+
+
+def read_manifest(path: str) -> List[str]:
+    """Return the repository paths listed in ``path``, relative to the manifest."""
+    base = os.path.dirname(os.path.abspath(path))
+    repos = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line.startswith("#"):
+                continue
+            # A '#' inside a path (as in "c#-tools") does not start a comment
+            line = re.split(r"\s#", line, maxsplit=1)[0].rstrip()
+            if line:
+                repos.append(os.path.join(base, os.path.expanduser(line)))
+    return repos
+
+
+def process_repo(repo_path: str, days: int, cache_dir: Optional[str],
+                 mode: Optional[str], batched: bool) -> Tuple[CommitTable, Dict, Optional[trimesh.Scene]]:
+    """Ingest and analyze one repository; build its sculpture if ``mode`` is given.
+
+    Runs inside a worker process.
+    """
+    with profiling.stage("ingest:repo"):
+        if cache_dir:
+            table = CommitTable.from_commits(load_git_commits(repo_path, days, cache_dir))
+        else:
+            table = fetch_commit_table(repo_path, days)
+    with profiling.stage("patterns:repo"):
+        patterns = detect_patterns(table)
+    with profiling.stage("build:repo"):
+        scene = BUILDERS[mode](table, patterns, batched) if mode else None
+    return table, patterns, scene
+
+
+def arrange_scenes(scenes: List[trimesh.Scene], names: List[str], spacing: float = 5.0) -> trimesh.Scene:
+    """Place ``scenes`` side by side on a square grid in the XZ plane."""
+    combined = trimesh.Scene()
+    columns = max(1, math.ceil(math.sqrt(len(scenes))))
+    cell = max((float(np.max(s.extents)) for s in scenes if not s.is_empty), default=1.0) + spacing
+    for index, (scene, name) in enumerate(zip(scenes, names)):
+        if scene.is_empty:
+            continue
+        offset = np.eye(4)
+        offset[:3, 3] = [(index % columns) * cell, 0.0, (index // columns) * cell]
+        offset[:3, 3] -= scene.bounds.mean(axis=0) * [1, 0, 1]
+        for node in scene.graph.nodes_geometry:
+            transform, geom_name = scene.graph[node]
+            combined.add_geometry(scene.geometry[geom_name], node_name=f"{name}/{node}",
+                                  geom_name=f"{name}/{geom_name}", transform=offset @ transform)
+    return combined
+
+
+def run(args: argparse.Namespace, repos: List[str]) -> int:
+    """Process ``repos`` and render the combined sculpture; return how many failed."""
+    names = [os.path.basename(os.path.normpath(path)) for path in repos]
+    names = [name if names.count(name) == 1 else f"{name}-{i}" for i, name in enumerate(names)]
+    results: List[Optional[Tuple[CommitTable, Dict, Optional[trimesh.Scene]]]] = [None] * len(repos)
+    start = time.perf_counter()
+    print(f"Processing {len(repos)} repositories with {args.jobs} workers...")
+    profiled = profiling.active()
+    task = functools.partial(profiling.run_profiled, process_repo) if profiled else process_repo
+    with profiling.stage("ingest"), ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {
+            pool.submit(task, path, args.days, args.cache_dir,
+                        args.mode if args.per_repo else None, args.batched): index
+            for index, path in enumerate(repos)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:  # one broken clone should not stop the batch
+                print(f"  [{done}/{len(repos)}] {names[index]}: failed ({exc})", file=sys.stderr)
+                continue
+            if profiled:
+                result, stages = result
+                profiling.merge(stages)
+            results[index] = result
+            print(f"  [{done}/{len(repos)}] {names[index]}: {len(results[index][0])} commits "
+                  f"({time.perf_counter() - start:.1f}s)")
+
+    succeeded = [i for i, result in enumerate(results) if result is not None]
+    if not succeeded:
+        print("No repository could be processed, nothing written", file=sys.stderr)
+        return len(repos)
+    combined = CommitTable.concat([results[i][0] for i in succeeded])
+    with profiling.stage("patterns"):
+        patterns = detect_patterns(combined)
+    print(f"Combined {len(combined)} commits from {len(succeeded)} repositories")
+    print(f"  Human commits: {patterns.get('human_ratio', 0)*100:.1f}%")
+    print(f"  Commit bursts detected: {len(patterns.get('bursts', []))}")
+
+    with profiling.stage("build"):
+        if args.per_repo:
+            scene = arrange_scenes([results[i][2] for i in succeeded],
+                                   [names[i] for i in succeeded])
+        else:
+            scene = BUILDERS[args.mode](combined, patterns, args.batched)
+
+    print(f"Exporting to {args.output}...")
+    with profiling.stage("export"):
+        scene.export(args.output)
+    print(f"✓ Organization sculpture generated in {time.perf_counter() - start:.1f}s")
+    return len(repos) - len(succeeded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a sculpture from many repositories")
+    parser.add_argument("repos", nargs="*", help="paths to git repositories")
+    parser.add_argument("--manifest", help="file listing one repository path per line")
+    parser.add_argument("--days", type=int, default=30, help="number of days to scan")
+    parser.add_argument("--mode", choices=list(BUILDERS), default="organic", help="aesthetic mode")
+    parser.add_argument("--output", default="models/org_sculpture.glb")
+    parser.add_argument("--cache-dir", help="keep an incremental commit cache in this directory")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes")
+    parser.add_argument("--per-repo", action="store_true",
+                        help="render one sub-sculpture per repository into the scene")
+    parser.add_argument("--batched", action="store_true",
+                        help="merge primitives into one mesh per material class")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    repos = list(args.repos)
+    if args.manifest:
+        repos.extend(read_manifest(args.manifest))
+    if not repos:
+        parser.error("no repositories given")
+    with profiling.session(args):
+        failed = run(args, repos)
+    if failed:
+        sys.exit(f"{failed} of {len(repos)} repositories failed")
+
+
+if __name__ == "__main__":
+    main()
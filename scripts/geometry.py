@@ -0,0 +1,456 @@
+"""Geometry helpers shared by the sculpture builders.
+
+Builders hand every primitive they create to a :class:`SceneBuilder` under a
+material class name (``"nodes"``, ``"branches"``, ...). By default each
+primitive becomes its own node in the resulting ``trimesh.Scene``, as before.
+In batched mode the primitives of one class are merged with NumPy into a
+single vertex/face buffer that keeps the per-commit vertex colors, so the
+exported GLB holds a handful of meshes instead of one per commit.
+
+Repeated primitives (icospheres, cones, cylinders, boxes) are tessellated once
+by :func:`template` and placed with :meth:`SceneBuilder.add_instances`, which
+scales, rotates and translates every copy in one vectorized operation.
+:func:`detail_subdivisions` lowers the tessellation of large instance counts.
+
+Given a :class:`glb_stream.GlbStream`, the builder writes primitives to the
+GLB file as they arrive instead of keeping them for a scene.
+
+Connectors along a path of points are swept as one continuous tube by
+:func:`sweep_tube`, using parallel-transport frames from
+:func:`transport_frames` so the cross sections neither twist nor flip.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from glb_stream import GlbStream
+from lazy import lazy_import
+
+trimesh = lazy_import("trimesh")
+
+# Color trimesh gives meshes without vertex colors
+DEFAULT_COLOR = np.array([102, 102, 102, 255], dtype=np.uint8)
+
+
+@lru_cache(maxsize=None)
+def template(kind: str, subdivisions: int = 2) -> trimesh.Trimesh:
+    """Return a cached unit primitive to be placed with :func:`instance_arrays`.
+
+    ``"icosphere"`` has radius 1, ``"box"`` has unit extents, ``"cone"`` and
+    ``"cylinder"`` have radius 1 and height 1 along Z. Scaling a template by
+    ``(r, r, h)`` gives the same vertices as creating the primitive with
+    radius ``r`` and height ``h``. The returned mesh is shared and must not be
+    modified.
+    """
+    if kind == "icosphere":
+        return trimesh.creation.icosphere(subdivisions=subdivisions, radius=1.0)
+    if kind == "box":
+        return trimesh.creation.box(extents=[1.0, 1.0, 1.0])
+    if kind == "cone":
+        return trimesh.creation.cone(radius=1.0, height=1.0)
+    if kind == "cylinder":
+        return trimesh.creation.cylinder(radius=1.0, height=1.0)
+    raise ValueError(f"unknown primitive: {kind}")
+
+
+def detail_subdivisions(count: int, base: int = 2) -> int:
+    """Return the icosphere subdivisions to use for ``count`` instances.
+
+    Up to 1,000 instances keep ``base``; every tenfold increase drops one
+    level, down to 0 (a 20-face icosahedron).
+    """
+    if count <= 1000:
+        return base
+    return max(0, base - int(math.log10(count / 1000)) - 1)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    length = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(length > 0, length, 1.0)
+
+
+def _perpendicular(vectors: np.ndarray) -> np.ndarray:
+    """Return a unit vector perpendicular to each row of ``vectors``."""
+    axis = np.zeros_like(vectors)
+    axis[np.arange(len(vectors)), np.argmin(np.abs(vectors), axis=1)] = 1.0
+    return _normalize(np.cross(vectors, axis))
+
+
+def _quat_scan(rotations: np.ndarray) -> np.ndarray:
+    """Return the running products ``q_i ... q_1 q_0`` of ``(N, 4)`` quaternions ``(w, x, y, z)``.
+
+    Hillis-Steele scan: after the pass with shift ``s`` every entry holds the
+    product of up to ``2 s`` consecutive rotations, the later ones on the left.
+    """
+    w, x, y, z = rotations.T.copy()
+    shift = 1
+    while shift < len(w):
+        aw, ax, ay, az = w[shift:], x[shift:], y[shift:], z[shift:]
+        bw, bx, by, bz = w[:-shift], x[:-shift], y[:-shift], z[:-shift]
+        product = (aw * bw - ax * bx - ay * by - az * bz,
+                   aw * bx + ax * bw + ay * bz - az * by,
+                   aw * by - ax * bz + ay * bw + az * bx,
+                   aw * bz + ax * by - ay * bx + az * bw)
+        for row, value in zip((w, x, y, z), product):
+            row[shift:] = value
+        shift *= 2
+    return np.column_stack([w, x, y, z])
+
+
+def _quat_rotate(q: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    w, u = q[:, :1], q[:, 1:]
+    t = 2 * np.cross(u, vectors)
+    return vectors + w * t + np.cross(u, t)
+
+
+def _min_rotations(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return the quaternions of the smallest rotations taking unit ``a`` to unit ``b``."""
+    q = np.column_stack([1.0 + np.sum(a * b, axis=1), np.cross(a, b)])
+    opposite = q[:, 0] < 1e-9
+    # Antiparallel tangents: half a turn about any perpendicular axis
+    q[opposite] = np.column_stack([np.zeros(opposite.sum()), _perpendicular(a[opposite])])
+    return _normalize(q)
+
+
+def transport_frames(points: np.ndarray,
+                     closed: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return unit tangents, normals and binormals along a polyline.
+
+    Tangents bisect the adjacent segments. The first normal is an arbitrary
+    perpendicular; every following one is carried along by the smallest
+    rotation between consecutive tangents (parallel transport). The running
+    product of those rotations is an inclusive scan, evaluated with
+    ``log2(N)`` vectorized quaternion products. Consecutive points must
+    differ.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if closed:
+        segments = _normalize(np.roll(points, -1, axis=0) - points)
+        tangents = _normalize(segments + np.roll(segments, 1, axis=0))
+    else:
+        segments = _normalize(np.diff(points, axis=0))
+        tangents = np.concatenate([segments[:1], segments[:-1] + segments[1:], segments[-1:]])
+        tangents = _normalize(tangents)
+
+    rotations = np.zeros((len(points), 4))
+    rotations[0, 0] = 1.0
+    rotations[1:] = _min_rotations(tangents[:-1], tangents[1:])
+    rotations = _normalize(_quat_scan(rotations))
+
+    first = _perpendicular(tangents[:1])
+    normals = _quat_rotate(rotations, np.repeat(first, len(points), axis=0))
+    # Remove the drift the products accumulate, then complete the frames
+    normals = _normalize(normals - np.sum(normals * tangents, axis=1, keepdims=True) * tangents)
+    return tangents, normals, np.cross(tangents, normals)
+
+
+def _tube_frames(points: np.ndarray, radius: float | np.ndarray, sides: int,
+                 closed: bool) -> Optional[tuple]:
+    """Return the kept points, radii, keep mask, frames and per-ring angles of a tube."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(points),))
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    if closed and keep.sum() > 1 and np.array_equal(points[0], points[keep][-1]):
+        keep[np.flatnonzero(keep)[-1]] = False
+    points, radius = points[keep], radius[keep]
+    count = len(points)
+    if count < 2:
+        return None
+
+    tangents, normals, binormals = transport_frames(points, closed)
+    angles = np.linspace(0, 2 * math.pi, sides, endpoint=False)[np.newaxis, :]
+    if closed:
+        # Angle between the first normal and the last one carried once more around the loop
+        carried = _quat_rotate(_min_rotations(tangents[-1:], tangents[:1]), normals[-1:])[0]
+        twist = math.atan2(np.dot(binormals[0], carried), np.dot(normals[0], carried))
+        angles = angles - (twist * np.arange(count) / count)[:, np.newaxis]
+    angles = np.broadcast_to(angles, (count, sides))
+    return points, radius, keep, normals, binormals, angles
+
+
+def _rings(points: np.ndarray, radius: np.ndarray, normals: np.ndarray,
+           binormals: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """Return the ``sides`` cross-section vertices around every point, ring by ring."""
+    cos, sin = np.cos(angles)[..., np.newaxis], np.sin(angles)[..., np.newaxis]
+    rings = points[:, np.newaxis, :] + radius[:, np.newaxis, np.newaxis] * (
+        cos * normals[:, np.newaxis, :] + sin * binormals[:, np.newaxis, :])
+    return rings.reshape(-1, 3)
+
+
+def sweep_tube(points: np.ndarray, radius: float | np.ndarray, sides: int = 8,
+               colors: Optional[np.ndarray] = None, closed: bool = False) -> trimesh.Trimesh:
+    """Return one tube mesh swept along the ``(N, 3)`` polyline ``points``.
+
+    ``radius`` is a scalar or one value per point; the tube tapers linearly
+    between points. ``colors`` optionally holds one RGBA row per point. An
+    open tube gets flat end caps; a ``closed`` one joins its last point to
+    the first, with the transport's twist around the loop spread evenly
+    over all sections. Repeated consecutive points are dropped.
+    """
+    frames = _tube_frames(points, radius, sides, closed)
+    if frames is None:
+        return trimesh.Trimesh()
+    points, radius, keep, normals, binormals, angles = frames
+    count = len(points)
+    vertices = _rings(points, radius, normals, binormals, angles)
+
+    ring = np.arange(count if closed else count - 1)[:, np.newaxis]
+    side = np.arange(sides)[np.newaxis, :]
+    a = ring * sides + side
+    b = ring * sides + (side + 1) % sides
+    c = (ring + 1) % count * sides + (side + 1) % sides
+    d = (ring + 1) % count * sides + side
+    faces = np.concatenate([np.stack([a, b, c], axis=-1).reshape(-1, 3),
+                            np.stack([a, c, d], axis=-1).reshape(-1, 3)])
+
+    vertex_colors = None
+    if colors is not None:
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (len(keep), 4))[keep]
+        vertex_colors = np.repeat(colors, sides, axis=0)
+    if not closed:
+        start, end = len(vertices), len(vertices) + 1
+        vertices = np.concatenate([vertices, points[[0, -1]]])
+        last = (count - 1) * sides
+        side = side[0]
+        faces = np.concatenate([
+            faces,
+            np.column_stack([np.full(sides, start), (side + 1) % sides, side]),
+            np.column_stack([np.full(sides, end), last + side, last + (side + 1) % sides])])
+        if vertex_colors is not None:
+            vertex_colors = np.concatenate([vertex_colors, colors[[0, -1]]])
+    return trimesh.Trimesh(vertices=vertices, faces=faces, vertex_colors=vertex_colors,
+                           process=False)
+
+
+def tube_sections(points: np.ndarray, radius: float | np.ndarray, sides: int = 8,
+                  colors: Optional[np.ndarray] = None, closed: bool = False,
+                  max_rings: int = 4096) -> Iterator[tuple]:
+    """Yield the tube of :func:`sweep_tube` as ``(vertices, faces, colors)`` pieces.
+
+    Each piece spans at most ``max_rings`` segments and repeats the boundary
+    ring of the next one, so the pieces hold the same triangles as the
+    single mesh while only one piece of vertices exists at a time.
+    """
+    frames = _tube_frames(points, radius, sides, closed)
+    if frames is None:
+        return
+    points, radius, keep, normals, binormals, angles = frames
+    count = len(points)
+    if colors is not None:
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (len(keep), 4))[keep]
+    segments = count if closed else count - 1
+    side = np.arange(sides)
+    for first in range(0, segments, max_rings):
+        rows = np.arange(first, min(first + max_rings, segments) + 1) % count
+        vertices = _rings(points[rows], radius[rows], normals[rows], binormals[rows], angles[rows])
+        ring = np.arange(len(rows) - 1)[:, np.newaxis]
+        a = ring * sides + side
+        b = ring * sides + (side + 1) % sides
+        faces = np.concatenate([np.stack([a, b, b + sides], axis=-1).reshape(-1, 3),
+                                np.stack([a, b + sides, a + sides], axis=-1).reshape(-1, 3)])
+        piece_colors = None if colors is None else np.repeat(colors[rows], sides, axis=0)
+
+        caps = []
+        if not closed and first == 0:
+            caps.append((0, np.column_stack([np.zeros(sides, dtype=np.int64), (side + 1) % sides, side])))
+        if not closed and rows[-1] == count - 1:
+            last = (len(rows) - 1) * sides
+            caps.append((-1, np.column_stack([np.zeros(sides, dtype=np.int64),
+                                              last + side, last + (side + 1) % sides])))
+        for point, cap in caps:
+            cap[:, 0] = len(vertices)
+            vertices = np.concatenate([vertices, points[[point]]])
+            faces = np.concatenate([faces, cap])
+            if piece_colors is not None:
+                piece_colors = np.concatenate([piece_colors, colors[[point]]])
+        yield vertices, faces, piece_colors
+
+
+def instance_arrays(mesh: trimesh.Trimesh, positions: np.ndarray, scales: np.ndarray,
+                    rotations: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Return vertices and faces of one copy of ``mesh`` per row of ``positions``.
+
+    ``scales`` has shape ``(N,)`` for uniform or ``(N, 3)`` for per-axis
+    scaling and ``rotations`` optional shape ``(N, 3, 3)``. Copies are scaled,
+    then rotated, then translated.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    scales = np.asarray(scales, dtype=np.float64)
+    scales = scales.reshape(-1, 1, 1) if scales.ndim == 1 else scales.reshape(-1, 1, 3)
+
+    vertices = mesh.vertices[np.newaxis, :, :] * scales
+    if rotations is not None:
+        vertices = np.einsum("nij,nvj->nvi", rotations, vertices)
+    vertices = vertices + positions[:, np.newaxis, :]
+
+    offsets = np.arange(len(positions), dtype=np.int64) * len(mesh.vertices)
+    faces = mesh.faces[np.newaxis, :, :] + offsets[:, np.newaxis, np.newaxis]
+    return vertices.reshape(-1, 3), faces.reshape(-1, 3)
+
+
+def merge_meshes(meshes: Sequence[trimesh.Trimesh]) -> trimesh.Trimesh:
+    """Concatenate ``meshes`` into one mesh, keeping vertex colors if any are set."""
+    counts = np.array([len(m.vertices) for m in meshes], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    vertices = np.concatenate([m.vertices for m in meshes])
+    faces = np.concatenate([m.faces + offset for m, offset in zip(meshes, offsets)])
+
+    colors = None
+    if any(m.visual.kind == "vertex" for m in meshes):
+        colors = np.concatenate([m.visual.vertex_colors for m in meshes])
+
+    return trimesh.Trimesh(vertices=vertices, faces=faces, vertex_colors=colors, process=False)
+
+
+class SceneBuilder:
+    """Collect primitives by material class and assemble a scene.
+
+    With a :class:`glb_stream.GlbStream` as ``stream`` nothing is kept in
+    memory: unbatched primitives are written as nodes right away, and in
+    batched mode each class is written as a primitive of its mesh whenever
+    ``stream.flush_vertices`` vertices have accumulated. :meth:`scene` then
+    flushes the rest and returns ``None``.
+    """
+
+    def __init__(self, batched: bool = False, stream: Optional[GlbStream] = None) -> None:
+        self.batched = batched
+        self.stream = stream
+        self.meshes: List[trimesh.Trimesh] = []
+        self.groups: Dict[str, List[trimesh.Trimesh]] = defaultdict(list)
+        # Streaming state: arrays awaiting a flush and primitives already written, per class
+        self._pending: Dict[str, List[tuple]] = defaultdict(list)
+        self._pending_vertices: Dict[str, int] = defaultdict(int)
+        self._primitives: Dict[str, List[dict]] = defaultdict(list)
+        self._nodes = 0
+
+    def add(self, mesh: trimesh.Trimesh, group: str = "default") -> None:
+        if self.stream is not None:
+            colors = None
+            if mesh.visual.kind in ("vertex", "face"):
+                colors = np.asarray(mesh.visual.vertex_colors, dtype=np.uint8)
+            self._emit(group, mesh.vertices, mesh.faces, colors)
+            return
+        self.meshes.append(mesh)
+        self.groups[group].append(mesh)
+
+    def add_tube(self, points: np.ndarray, radius: float | np.ndarray, group: str = "default",
+                 sides: int = 8, colors: Optional[np.ndarray] = None, closed: bool = False) -> None:
+        """Add the tube of :func:`sweep_tube`; when streaming it is swept piece by piece."""
+        if self.stream is None:
+            self.add(sweep_tube(points, radius, sides, colors, closed), group)
+            return
+        max_rings = max(1, self.stream.flush_vertices // sides)
+        for vertices, faces, piece_colors in tube_sections(points, radius, sides, colors,
+                                                           closed, max_rings):
+            self._emit(group, vertices, faces, piece_colors)
+
+    def add_instances(self, mesh: trimesh.Trimesh, positions: np.ndarray, scales: np.ndarray,
+                      colors: Optional[np.ndarray] = None, group: str = "default",
+                      rotations: Optional[np.ndarray] = None) -> None:
+        """Add one copy of ``mesh`` per row of ``positions``, see :func:`instance_arrays`.
+
+        ``colors`` holds one RGBA row per copy. In batched mode all copies go
+        into a single mesh; otherwise each copy is added as its own mesh.
+        """
+        count = len(positions)
+        if count == 0:
+            return
+        if colors is not None:
+            colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (count, 4))
+        if self.stream is not None:
+            self._stream_instances(mesh, positions, scales, colors, group, rotations)
+            return
+        vertices, faces = instance_arrays(mesh, positions, scales, rotations)
+        vertex_colors = None
+        if colors is not None:
+            vertex_colors = np.repeat(colors, len(mesh.vertices), axis=0)
+
+        if self.batched:
+            self.groups[group].append(trimesh.Trimesh(
+                vertices=vertices, faces=faces, vertex_colors=vertex_colors, process=False))
+            return
+
+        n_vertices = len(mesh.vertices)
+        for i in range(count):
+            copy = trimesh.Trimesh(
+                vertices=vertices[i * n_vertices:(i + 1) * n_vertices],
+                faces=mesh.faces,
+                vertex_colors=None if vertex_colors is None else colors[i],
+                process=False)
+            self.add(copy, group)
+
+    def _stream_instances(self, mesh: trimesh.Trimesh, positions: np.ndarray, scales: np.ndarray,
+                          colors: Optional[np.ndarray], group: str,
+                          rotations: Optional[np.ndarray]) -> None:
+        """Place copies chunk by chunk so only one chunk of vertices exists at a time."""
+        n_vertices = len(mesh.vertices)
+        scales = np.asarray(scales, dtype=np.float64)
+        # Rounded up so that a full chunk reaches the flush size on its own
+        step = -(-self.stream.flush_vertices // n_vertices)
+        for start in range(0, len(positions), step):
+            rows = slice(start, start + step)
+            vertices, faces = instance_arrays(mesh, positions[rows], scales[rows],
+                                              None if rotations is None else rotations[rows])
+            if self.batched:
+                chunk_colors = None if colors is None else np.repeat(colors[rows], n_vertices, axis=0)
+                self._emit(group, vertices, faces, chunk_colors)
+                continue
+            for i in range(len(vertices) // n_vertices):
+                self._emit(group, vertices[i * n_vertices:(i + 1) * n_vertices], mesh.faces,
+                           None if colors is None else colors[start + i])
+
+    def _emit(self, group: str, vertices: np.ndarray, faces: np.ndarray,
+              colors: Optional[np.ndarray]) -> None:
+        if not len(faces):
+            return
+        if not self.batched:
+            self.stream.add_mesh(vertices, faces, colors, name=f"{group}_{self._nodes}")
+            self._nodes += 1
+            return
+        self._pending[group].append((vertices, faces, colors))
+        self._pending_vertices[group] += len(vertices)
+        if self._pending_vertices[group] >= self.stream.flush_vertices:
+            self._flush(group)
+
+    def _flush(self, group: str) -> None:
+        """Write the pending arrays of ``group`` as one primitive, like :func:`merge_meshes`."""
+        pending = self._pending.pop(group, [])
+        self._pending_vertices.pop(group, None)
+        if not pending:
+            return
+        if len(pending) == 1:
+            self._primitives[group].append(self.stream.add_primitive(*pending[0]))
+            return
+        counts = np.array([len(vertices) for vertices, _, _ in pending], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        vertices = np.concatenate([vertices for vertices, _, _ in pending])
+        faces = np.concatenate([faces + offset for (_, faces, _), offset in zip(pending, offsets)])
+        colors = None
+        if any(c is not None for _, _, c in pending):
+            colors = np.concatenate([
+                np.broadcast_to(DEFAULT_COLOR if c is None else np.asarray(c, dtype=np.uint8), (n, 4))
+                for (_, _, c), n in zip(pending, counts)])
+        self._primitives[group].append(self.stream.add_primitive(vertices, faces, colors))
+
+    def scene(self) -> Optional[trimesh.Scene]:
+        if self.stream is not None:
+            for group in list(self._pending):
+                self._flush(group)
+            for group, primitives in self._primitives.items():
+                self.stream.add_node(group, primitives)
+            self._primitives.clear()
+            return None
+        if not self.batched:
+            return trimesh.Scene(self.meshes)
+        scene = trimesh.Scene()
+        for name, meshes in self.groups.items():
+            if meshes:
+                scene.add_geometry(merge_meshes(meshes), geom_name=name)
+        return scene
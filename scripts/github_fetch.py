@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Concurrent, rate-limit-aware GitHub commit fetcher.
+
+:class:`GitHubFetcher` keeps one pooled ``requests.Session`` for all calls.
+It fetches the first page of ``/repos/{owner}/{repo}/commits``, reads the
+page count from the ``Link`` header and downloads the remaining pages in
+parallel. When a response cache directory is given, every page is stored
+with its ``ETag`` and asked for again with ``If-None-Match``. An unchanged
+page then comes back as ``304 Not Modified``, which costs neither a body
+download nor rate-limit quota.
+
+When GitHub reports an exhausted quota (``403``/``429`` with
+``X-RateLimit-Remaining: 0`` or ``Retry-After``) the fetcher sleeps until the
+advertised reset and retries; other requests wait for the same reset instead
+of hitting the limit as well. Server errors are retried with exponential
+backoff.
+
+``base_url`` can point at a local stub server, see
+``benchmarks/stub_github.py``.
+
+Example usage:
+  python github_fetch.py --owner USER --repo REPO --days 30 --cache-dir .sculpture_cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import profiling
+from lazy import lazy_import
+
+requests = lazy_import("requests")
+
+API_URL = "https://api.github.com"
+PER_PAGE = 100
+
+
+class RateLimitError(RuntimeError):
+    """Raised when the rate-limit reset is further away than ``max_wait``."""
+
+
+class ResponseCache:
+    """ETag-keyed JSON response cache, one file per request URL."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[Tuple[str, object, Dict[str, str]]]:
+        """Return ``(etag, body, links)`` stored for ``key``, if any."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        return entry["etag"], entry["body"], entry.get("links", {})
+
+    def put(self, key: str, etag: str, body: object, links: Dict[str, str]) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"etag": etag, "body": body, "links": links}, fh, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def _last_page(links: Dict[str, str]) -> Optional[int]:
+    """Return the page number of the ``rel="last"`` link."""
+    if "last" not in links:
+        return None
+    query = parse_qs(urlparse(links["last"]).query)
+    return int(query["page"][0]) if "page" in query else None
+
+
+class GitHubFetcher:
+    """Pooled, parallel and cached access to the GitHub REST API."""
+
+    def __init__(self, token: str | None = None, base_url: str = API_URL,
+                 cache_dir: str | None = None, max_workers: int = 4,
+                 max_retries: int = 5, max_wait: float = 900.0,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.sleep = sleep
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_workers,
+                                                pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+        self._lock = threading.Lock()
+        self.rate_remaining: Optional[int] = None
+        self.rate_reset: Optional[float] = None
+        self.requests_made = 0
+        self.not_modified = 0
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "GitHubFetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _wait_for_quota(self) -> None:
+        """Sleep until the rate-limit reset if the quota is known to be used up."""
+        with self._lock:
+            remaining, reset = self.rate_remaining, self.rate_reset
+        if remaining == 0 and reset is not None:
+            self._sleep_until(reset)
+
+    def _sleep_until(self, when: float) -> None:
+        delay = when - time.time()
+        if delay > self.max_wait:
+            raise RateLimitError(f"GitHub rate limit resets in {delay:.0f}s")
+        if delay > 0:
+            self.sleep(delay)
+
+    def _record_rate_limit(self, resp: requests.Response) -> None:
+        profiling.count("http_requests")
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        with self._lock:
+            self.requests_made += 1
+            if remaining is not None:
+                self.rate_remaining = int(remaining)
+            if reset is not None:
+                self.rate_reset = float(reset)
+
+    def get_json(self, url: str, params: Dict[str, object]) -> Tuple[object, Dict[str, str]]:
+        """GET ``url`` and return the decoded body and the ``Link`` URLs by ``rel``."""
+        key = url + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+        cached = self.cache.get(key) if self.cache else None
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self._wait_for_quota()
+            resp = self.session.get(url, params=params, headers=headers, timeout=30)
+            self._record_rate_limit(resp)
+
+            if resp.status_code == 304 and cached:
+                profiling.count("http_not_modified")
+                with self._lock:
+                    self.not_modified += 1
+                return cached[1], cached[2]
+
+            if resp.status_code in (403, 429) and attempt <= self.max_retries:
+                retry_after = resp.headers.get("Retry-After")
+                if retry_after is not None:
+                    self._sleep_until(time.time() + float(retry_after))
+                    continue
+                if resp.headers.get("X-RateLimit-Remaining") == "0":
+                    self._sleep_until(float(resp.headers.get("X-RateLimit-Reset", time.time())) + 1)
+                    continue
+
+            if resp.status_code >= 500 and attempt <= self.max_retries:
+                self.sleep(min(self.max_wait, 0.5 * 2 ** (attempt - 1)))
+                continue
+
+            resp.raise_for_status()
+            body = resp.json()
+            links = {rel: link["url"] for rel, link in resp.links.items()}
+            if self.cache and resp.headers.get("ETag"):
+                self.cache.put(key, resp.headers["ETag"], body, links)
+            return body, links
+
+    def fetch_commits(self, owner: str, repo: str, since: datetime.datetime,
+                      until_sha: str | None = None) -> Tuple[List[dict], bool]:
+        """Return commits newer than ``since`` (a naive UTC datetime), newest first.
+
+        If ``until_sha`` is given, commits from that one onward are dropped and
+        the second return value tells whether it was found. Pages after the
+        first are only downloaded when ``until_sha`` is not on the first page.
+
+        The request asks for everything since midnight UTC of ``since``. That
+        way the page URLs, and therefore their ETags, stay the same for a whole
+        day, and the extra commits are filtered out locally.
+        """
+        url = f"{self.base_url}/repos/{owner}/{repo}/commits"
+        day_start = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        params = {"since": day_start.isoformat() + "Z", "per_page": PER_PAGE}
+
+        first, links = self.get_json(url, dict(params, page=1))
+        pages = [first]
+        if first and not any(c["sha"] == until_sha for c in first):
+            last = _last_page(links)
+            if last is not None and last > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    rest = pool.map(lambda page: self.get_json(url, dict(params, page=page))[0],
+                                    range(2, last + 1))
+                    pages.extend(rest)
+            elif "next" in links:
+                # No "last" link: walk the "next" links one page at a time
+                page = 2
+                while True:
+                    data, links = self.get_json(url, dict(params, page=page))
+                    if not data:
+                        break
+                    pages.append(data)
+                    if "next" not in links:
+                        break
+                    page += 1
+
+        cutoff = since.replace(tzinfo=datetime.timezone.utc)
+        commits: List[dict] = []
+        for page in pages:
+            for c in page:
+                if c["sha"] == until_sha:
+                    return commits, True
+                date = c["commit"]["committer"]["date"]
+                if datetime.datetime.fromisoformat(date.replace("Z", "+00:00")) >= cutoff:
+                    commits.append(c)
+        return commits, False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fetch commits from the GitHub API")
+    parser.add_argument("--owner", required=True, help="repository owner")
+    parser.add_argument("--repo", required=True, help="repository name")
+    parser.add_argument("--token", help="GitHub token")
+    parser.add_argument("--days", type=int, default=30, help="number of days to scan")
+    parser.add_argument("--cache-dir", help="directory for the ETag response cache")
+    parser.add_argument("--jobs", type=int, default=4, help="parallel page downloads")
+    args = parser.parse_args()
+
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=args.days)
+    cache_dir = os.path.join(args.cache_dir, "http") if args.cache_dir else None
+    with GitHubFetcher(args.token, cache_dir=cache_dir, max_workers=args.jobs) as fetcher:
+        commits, _ = fetcher.fetch_commits(args.owner, args.repo, since)
+        print(f"{len(commits)} commits in {fetcher.requests_made} requests "
+              f"({fetcher.not_modified} not modified)")
+
+
+if __name__ == "__main__":
+    main()
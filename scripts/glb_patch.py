@@ -0,0 +1,137 @@
+"""Memory-mapped access to the vertex positions of a GLB file.
+
+:class:`MappedGlb` maps a binary glTF file read-only and exposes every
+``POSITION`` accessor as a zero-copy ``(N, 3)`` float32 NumPy view into the
+mapping. :meth:`MappedGlb.write` writes a copy of the file with new
+positions: the JSON chunk is rewritten with the new ``min``/``max`` bounds,
+everything after it (the binary chunk with indices, colors and any other
+data) is copied byte for byte, and only the position ranges are overwritten
+in place. Nothing is parsed into meshes or a scene graph.
+
+Positions must be plain float32 ``VEC3`` accessors in the GLB's own binary
+chunk, as written by ``scene.export`` and :mod:`glb_stream`. Quantized
+(``KHR_mesh_quantization``), sparse or ``EXT_meshopt_compression``
+positions, as written by :mod:`compact_glb`, raise :class:`GlbLayoutError`.
+
+Example usage:
+  python glb_patch.py models/commit_sculpture.glb
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+from compact_glb import CHUNK_BIN, CHUNK_JSON, FLOAT, GLB_MAGIC, _align
+
+
+class GlbLayoutError(ValueError):
+    """The file is not a GLB whose positions can be patched in place."""
+
+
+class MappedGlb:
+    """A read-only memory mapping of a GLB file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            try:
+                self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise GlbLayoutError(f"{path} is not a GLB file") from exc
+        if len(self._map) < 20:
+            raise GlbLayoutError(f"{path} is not a GLB file")
+        magic, version, _ = struct.unpack_from("<4sII", self._map, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise GlbLayoutError(f"{path} is not a glTF 2.0 binary file")
+        json_length, json_type = struct.unpack_from("<II", self._map, 12)
+        if json_type != CHUNK_JSON:
+            raise GlbLayoutError(f"{path} does not start with a JSON chunk")
+        self.gltf = json.loads(self._map[20:20 + json_length])
+        # Everything after the JSON chunk is copied unchanged by write()
+        self.rest_offset = 20 + json_length
+        self.bin_offset = None
+        if len(self._map) >= self.rest_offset + 8:
+            _, chunk_type = struct.unpack_from("<II", self._map, self.rest_offset)
+            if chunk_type == CHUNK_BIN:
+                self.bin_offset = self.rest_offset + 8
+
+    def position_accessors(self) -> List[int]:
+        """Return the ``POSITION`` accessor indices in the order meshes use them, each once."""
+        seen: Dict[int, None] = {}
+        for mesh in self.gltf.get("meshes", []):
+            for primitive in mesh.get("primitives", []):
+                if "POSITION" in primitive.get("attributes", {}):
+                    seen.setdefault(primitive["attributes"]["POSITION"], None)
+        return list(seen)
+
+    def _view(self, buffer, bin_offset: int, index: int) -> np.ndarray:
+        accessor = self.gltf["accessors"][index]
+        if (accessor.get("componentType") != FLOAT or accessor.get("type") != "VEC3"
+                or "sparse" in accessor or "bufferView" not in accessor):
+            raise GlbLayoutError(f"accessor {index} is not a plain float32 VEC3 accessor")
+        view = self.gltf["bufferViews"][accessor["bufferView"]]
+        buffer_info = self.gltf["buffers"][view.get("buffer", 0)]
+        if view.get("buffer", 0) != 0 or "uri" in buffer_info or "extensions" in view:
+            raise GlbLayoutError(f"accessor {index} is compressed or stored outside the GLB")
+        offset = bin_offset + view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+        return np.ndarray((accessor["count"], 3), dtype="<f4", buffer=buffer, offset=offset,
+                          strides=(view.get("byteStride", 12), 4))
+
+    def positions(self) -> Dict[int, np.ndarray]:
+        """Return read-only zero-copy views of every ``POSITION`` accessor, by accessor index."""
+        if self.bin_offset is None:
+            raise GlbLayoutError(f"{self.path} has no binary chunk")
+        return {index: self._view(self._map, self.bin_offset, index)
+                for index in self.position_accessors()}
+
+    def write(self, path: str, positions: Dict[int, np.ndarray]) -> None:
+        """Write a copy of the file to ``path`` with ``positions`` replacing those accessors."""
+        gltf = dict(self.gltf, accessors=[dict(accessor) for accessor in self.gltf["accessors"]])
+        for index, values in positions.items():
+            values = np.asarray(values, dtype=np.float32)
+            gltf["accessors"][index]["min"] = values.min(axis=0).tolist()
+            gltf["accessors"][index]["max"] = values.max(axis=0).tolist()
+        header = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        header += b" " * (_align(len(header)) - len(header))
+        rest = memoryview(self._map)[self.rest_offset:]
+        total = 12 + 8 + len(header) + len(rest)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(GLB_MAGIC + struct.pack("<II", 2, total))
+            fh.write(struct.pack("<II", len(header), CHUNK_JSON))
+            fh.write(header)
+            fh.write(rest)
+        rest.release()
+        if positions:
+            out = np.memmap(tmp_path, mode="r+")
+            bin_offset = 20 + len(header) + 8
+            for index, values in positions.items():
+                self._view(out, bin_offset, index)[...] = values
+            out.flush()
+            del out
+        os.replace(tmp_path, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List the patchable positions of a GLB file")
+    parser.add_argument("model", help="GLB file to inspect")
+    args = parser.parse_args()
+
+    try:
+        positions = MappedGlb(args.model).positions()
+    except GlbLayoutError as exc:
+        parser.error(str(exc))
+    print(f"{args.model}: {len(positions)} position accessors, "
+          f"{sum(len(values) for values in positions.values())} vertices")
+
+
+if __name__ == "__main__":
+    main()
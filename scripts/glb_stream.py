@@ -0,0 +1,245 @@
+"""Streaming GLB writer.
+
+:class:`GlbStream` writes a binary glTF file without holding the scene in
+memory. Vertex, color and index data are appended to a temporary file as
+soon as a mesh is added, and so are the JSON entries describing them
+(accessors, buffer views, meshes and nodes). :meth:`GlbStream.close`
+assembles the header, the JSON chunk and the binary chunk by copying the
+temporary files into the output, so memory stays bounded by the largest
+single mesh however many meshes are written.
+
+Builders stream into it through :class:`geometry.SceneBuilder`; in batched
+mode each material class is flushed as one primitive every
+:data:`FLUSH_VERTICES` vertices. :func:`write_scene` writes an existing
+``trimesh.Scene`` the same way.
+
+The output uses the same layout as ``scene.export``: float32 positions,
+normalized ``uint8`` vertex colors and no materials, so viewers render it
+identically. Identical index and color buffers are written once.
+
+Example usage:
+  python glb_stream.py models/commit_sculpture.glb models/commit_sculpture_stream.glb
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+from typing import IO, Dict, List, Optional
+
+import numpy as np
+
+from compact_glb import (ARRAY_BUFFER, CHUNK_BIN, CHUNK_JSON, ELEMENT_ARRAY_BUFFER, FLOAT,
+                         GLB_MAGIC, UNSIGNED_BYTE, UNSIGNED_INT, UNSIGNED_SHORT, _align)
+from lazy import lazy_import
+
+trimesh = lazy_import("trimesh")
+
+# Vertices gathered per batched primitive before it is written out
+FLUSH_VERTICES = 1 << 18
+
+# Distinct index and color buffers remembered for deduplication
+SHARED_ACCESSORS = 4096
+
+SECTIONS = ("accessors", "bufferViews", "meshes", "nodes")
+
+
+class _JsonArray:
+    """Elements of one top-level glTF array, serialized to a temporary file."""
+
+    def __init__(self, directory: str) -> None:
+        self.file: IO[bytes] = tempfile.TemporaryFile(dir=directory)
+        self.count = 0
+        self.size = 0
+
+    def append(self, item: object) -> int:
+        data = json.dumps(item, separators=(",", ":")).encode("utf-8")
+        if self.count:
+            data = b"," + data
+        self.file.write(data)
+        self.size += len(data)
+        self.count += 1
+        return self.count - 1
+
+
+class GlbStream:
+    """Write meshes to a GLB file as they are produced.
+
+    Use as a context manager: the file is completed on a clean exit and the
+    partial output is discarded when an exception escapes.
+    """
+
+    def __init__(self, path: str, flush_vertices: int = FLUSH_VERTICES) -> None:
+        self.path = path
+        self.flush_vertices = flush_vertices
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.size = 0
+        self.closed = False
+        self._bin: IO[bytes] = tempfile.TemporaryFile(dir=self.directory)
+        self._arrays = {name: _JsonArray(self.directory) for name in SECTIONS}
+        self._scene_nodes = _JsonArray(self.directory)
+        self._shared: Dict[bytes, int] = {}
+
+    def __enter__(self) -> "GlbStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def _write(self, data: bytes) -> int:
+        offset = self.size
+        self._bin.write(data)
+        self._bin.write(bytes(_align(len(data)) - len(data)))
+        self.size += _align(len(data))
+        return offset
+
+    def _accessor(self, data: np.ndarray, component: int, kind: str, target: int,
+                  normalized: bool = False, bounds: bool = False) -> int:
+        raw = np.ascontiguousarray(data).tobytes()
+        view = self._arrays["bufferViews"].append(
+            {"buffer": 0, "byteOffset": self._write(raw), "byteLength": len(raw), "target": target})
+        accessor: Dict[str, object] = {"bufferView": view, "componentType": component,
+                                       "type": kind, "count": len(data)}
+        if normalized:
+            accessor["normalized"] = True
+        if bounds:
+            accessor["min"] = data.min(axis=0).tolist()
+            accessor["max"] = data.max(axis=0).tolist()
+        return self._arrays["accessors"].append(accessor)
+
+    def add_primitive(self, vertices: np.ndarray, faces: np.ndarray,
+                      colors: Optional[np.ndarray] = None) -> Dict[str, object]:
+        """Write the buffers of one triangle primitive and return its glTF description."""
+        points = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        attributes = {"POSITION": self._accessor(points, FLOAT, "VEC3", ARRAY_BUFFER, bounds=True)}
+        if colors is not None:
+            colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (len(points), 4))
+            attributes["COLOR_0"] = self._shared_accessor(colors, UNSIGNED_BYTE, "VEC4",
+                                                          ARRAY_BUFFER, normalized=True)
+
+        dtype, component = ((np.uint16, UNSIGNED_SHORT) if len(points) < 65536
+                            else (np.uint32, UNSIGNED_INT))
+        indices = np.ascontiguousarray(faces, dtype=dtype).ravel()
+        return {"attributes": attributes, "mode": 4,
+                "indices": self._shared_accessor(indices, component, "SCALAR", ELEMENT_ARRAY_BUFFER)}
+
+    def _shared_accessor(self, data: np.ndarray, component: int, kind: str, target: int,
+                         normalized: bool = False) -> int:
+        """Like :meth:`_accessor`, but reuse an identical earlier one.
+
+        Used for indices and colors, which repeat across the copies of a
+        template. At most :data:`SHARED_ACCESSORS` are remembered, so memory
+        stays bounded when every commit has its own color.
+        """
+        data = np.ascontiguousarray(data)
+        key = hashlib.blake2b(data.tobytes(), digest_size=16).digest() + bytes([component % 256, len(kind)])
+        index = self._shared.get(key)
+        if index is None:
+            index = self._accessor(data, component, kind, target, normalized)
+            if len(self._shared) < SHARED_ACCESSORS:
+                self._shared[key] = index
+        return index
+
+    def add_node(self, name: str, primitives: List[Dict[str, object]],
+                 matrix: Optional[np.ndarray] = None) -> int:
+        """Add a mesh made of ``primitives`` and a root node placing it."""
+        mesh = self._arrays["meshes"].append({"name": name, "primitives": primitives})
+        node: Dict[str, object] = {"name": name, "mesh": mesh}
+        if matrix is not None and not np.allclose(matrix, np.eye(4)):
+            node["matrix"] = np.asarray(matrix, dtype=np.float64).T.ravel().tolist()  # column-major
+        index = self._arrays["nodes"].append(node)
+        self._scene_nodes.append(index)
+        return index
+
+    def add_mesh(self, vertices: np.ndarray, faces: np.ndarray,
+                 colors: Optional[np.ndarray] = None, name: str = "mesh") -> int:
+        """Write one mesh as its own node."""
+        return self.add_node(name, [self.add_primitive(vertices, faces, colors)])
+
+    def add_scene(self, scene: trimesh.Scene | trimesh.Trimesh) -> None:
+        """Write every mesh of ``scene`` with its node transform."""
+        if isinstance(scene, trimesh.Trimesh):
+            scene = trimesh.Scene(scene)
+        for node in scene.graph.nodes_geometry:
+            transform, name = scene.graph[node]
+            geom = scene.geometry[name]
+            if not isinstance(geom, trimesh.Trimesh) or not len(geom.faces):
+                continue
+            primitive = self.add_primitive(geom.vertices, geom.faces, vertex_colors(geom))
+            self.add_node(str(node), [primitive], np.asarray(transform))
+
+    def close(self) -> None:
+        """Assemble the GLB file from the temporary buffers."""
+        if self.closed:
+            return
+        # Fixed JSON text around the streamed arrays, in file order
+        pieces: List[object] = [b'{"asset":{"version":"2.0","generator":"glb_stream.py"}']
+        if self._scene_nodes.count:
+            pieces += [b',"scene":0,"scenes":[{"nodes":[', self._scene_nodes, b"]}]"]
+        for name, array in self._arrays.items():
+            if array.count:
+                pieces += [f',"{name}":['.encode("ascii"), array, b"]"]
+        if self.size:
+            pieces.append(f',"buffers":[{{"byteLength":{self.size}}}]'.encode("ascii"))
+        pieces.append(b"}")
+        length = sum(piece.size if isinstance(piece, _JsonArray) else len(piece) for piece in pieces)
+        padding = _align(length) - length
+        total = 12 + 8 + length + padding + (8 + self.size if self.size else 0)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(GLB_MAGIC + struct.pack("<II", 2, total))
+            fh.write(struct.pack("<II", length + padding, CHUNK_JSON))
+            for piece in pieces:
+                if isinstance(piece, _JsonArray):
+                    piece.file.seek(0)
+                    shutil.copyfileobj(piece.file, fh)
+                else:
+                    fh.write(piece)
+            fh.write(b" " * padding)
+            if self.size:
+                fh.write(struct.pack("<II", self.size, CHUNK_BIN))
+                self._bin.seek(0)
+                shutil.copyfileobj(self._bin, fh)
+        os.replace(tmp_path, self.path)
+        self._discard()
+
+    def _discard(self) -> None:
+        self.closed = True
+        for handle in [self._bin, self._scene_nodes.file] + [a.file for a in self._arrays.values()]:
+            handle.close()
+
+
+def vertex_colors(mesh: trimesh.Trimesh) -> Optional[np.ndarray]:
+    """Return the per-vertex RGBA colors of ``mesh``, or ``None`` if it has none."""
+    if mesh.visual.kind in ("vertex", "face"):
+        return np.asarray(mesh.visual.vertex_colors, dtype=np.uint8)
+    return None
+
+
+def write_scene(scene: trimesh.Scene | trimesh.Trimesh, path: str) -> None:
+    """Write an in-memory scene through :class:`GlbStream`."""
+    with GlbStream(path) as stream:
+        stream.add_scene(scene)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rewrite a GLB file with the streaming writer")
+    parser.add_argument("input", help="GLB file to read")
+    parser.add_argument("output", help="GLB file to write")
+    args = parser.parse_args()
+
+    write_scene(trimesh.load(args.input, force="scene"), args.output)
+    print(f"Wrote {args.output}: {os.path.getsize(args.output)} bytes")
+
+
+if __name__ == "__main__":
+    main()
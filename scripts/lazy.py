@@ -0,0 +1,29 @@
+"""Deferred imports for heavy dependencies.
+
+``trimesh = lazy_import("trimesh")`` binds a module object whose code only
+runs on the first attribute access, so a command that never touches a mesh
+(``--help``, a cached run whose outputs are up to date, ingestion or
+analysis) does not pay for importing it. A missing package still fails at
+import time, as with a plain ``import``.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return module ``name``, loading it on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
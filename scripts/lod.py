@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Level-of-detail (LOD) stage for finished sculpture scenes.
+
+:func:`simplify` reduces a mesh to a triangle budget by vertex clustering:
+vertices are snapped to a uniform grid, every occupied cell becomes one
+vertex at the mean position and color of its members, and faces that
+collapse or repeat are dropped. Small or distant-looking detail such as the
+tessellation of tiny nodes disappears first, and nodes that share a cell are
+fused into one blob. The grid size is found by bisection so that each level
+stays within its budget.
+
+:func:`write_lods` flattens a scene into one mesh, writes one GLB per budget
+next to the full model (``<name>_lod0.glb`` is the coarsest) and a
+``<name>.lod.json`` manifest listing the levels from coarse to fine with
+their triangle counts. ``commit_sculpture_enhanced.html`` reads the manifest,
+shows the coarsest level first and swaps in finer ones as they arrive.
+
+Example usage:
+  python lod.py models/commit_sculpture_organic.glb --budgets 2000 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from compact_glb import export_scene
+from geometry import merge_meshes
+from lazy import lazy_import
+
+trimesh = lazy_import("trimesh")
+
+DEFAULT_BUDGETS = (5_000, 50_000)
+
+# Grid cells per axis are kept below this so cell keys fit into one int64
+_MAX_CELLS = 2 ** 20
+
+
+def flatten(scene: trimesh.Scene | trimesh.Trimesh) -> trimesh.Trimesh:
+    """Return all geometry of ``scene`` in world space as one vertex-colored mesh."""
+    if isinstance(scene, trimesh.Trimesh):
+        return scene
+    meshes = []
+    for node in scene.graph.nodes_geometry:
+        transform, name = scene.graph[node]
+        geom = scene.geometry[name]
+        if not isinstance(geom, trimesh.Trimesh) or not len(geom.faces):
+            continue
+        meshes.append(trimesh.Trimesh(
+            vertices=trimesh.transform_points(geom.vertices, transform),
+            faces=geom.faces, vertex_colors=geom.visual.vertex_colors, process=False))
+    if not meshes:
+        return trimesh.Trimesh()
+    return merge_meshes(meshes)
+
+
+def cluster(mesh: trimesh.Trimesh, cell: float) -> trimesh.Trimesh:
+    """Return ``mesh`` with its vertices merged on a grid of ``cell`` units."""
+    vertices = mesh.vertices
+    origin = vertices.min(axis=0)
+    cells = np.minimum(np.floor((vertices - origin) / cell), _MAX_CELLS - 1).astype(np.int64)
+    keys = (cells[:, 0] * _MAX_CELLS + cells[:, 1]) * _MAX_CELLS + cells[:, 2]
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    merged = np.column_stack([np.bincount(inverse, weights=vertices[:, axis]) for axis in range(3)])
+    merged /= counts[:, np.newaxis]
+    colors = mesh.visual.vertex_colors
+    merged_colors = np.column_stack([np.bincount(inverse, weights=colors[:, channel])
+                                     for channel in range(4)])
+    merged_colors = np.rint(merged_colors / counts[:, np.newaxis]).astype(np.uint8)
+
+    faces = inverse[mesh.faces]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2])
+                  & (faces[:, 0] != faces[:, 2])]
+    # Drop repeated triangles (either winding), keeping the first one
+    _, first = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+    faces = faces[np.sort(first)]
+
+    used = np.zeros(len(merged), dtype=bool)
+    used[faces] = True
+    remap = np.cumsum(used) - 1
+    return trimesh.Trimesh(vertices=merged[used], faces=remap[faces],
+                           vertex_colors=merged_colors[used], process=False)
+
+
+def simplify(mesh: trimesh.Trimesh, budget: int, iterations: int = 24) -> trimesh.Trimesh:
+    """Return the finest vertex clustering of ``mesh`` with at most ``budget`` triangles."""
+    if len(mesh.faces) <= budget:
+        return mesh
+    extent = float(np.max(mesh.extents))
+    # Bisect the cell size in log space; one cell spanning everything has no faces
+    lo, hi = extent / (_MAX_CELLS - 1), extent
+    best = cluster(mesh, hi)
+    for _ in range(iterations):
+        mid = float(np.sqrt(lo * hi))
+        candidate = cluster(mesh, mid)
+        if len(candidate.faces) <= budget:
+            hi, best = mid, candidate
+        else:
+            lo = mid
+        if hi / lo < 1.02:
+            break
+    return best
+
+
+def lod_path(path: str, level: int) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}_lod{level}{ext}"
+
+
+def manifest_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".lod.json"
+
+
+def write_lods(scene: trimesh.Scene | trimesh.Trimesh, path: str,
+               budgets: Sequence[int] = DEFAULT_BUDGETS,
+               writer: str = "trimesh") -> List[Dict[str, object]]:
+    """Write the coarse levels of ``scene`` and the manifest for the full model at ``path``.
+
+    The full model itself is expected at ``path`` already. Budgets at or
+    above the full triangle count are skipped. ``writer`` selects the GLB
+    writer, see :func:`compact_glb.export_scene`. Returns the manifest levels.
+    """
+    full = flatten(scene)
+    full_triangles = len(full.faces)
+    levels: List[Dict[str, object]] = []
+    for budget in sorted(set(budgets)):
+        if budget >= full_triangles:
+            break
+        mesh = simplify(full, budget)
+        level_path = lod_path(path, len(levels))
+        export_scene(trimesh.Scene(mesh), level_path, writer)
+        levels.append({"file": os.path.basename(level_path), "triangles": len(mesh.faces),
+                       "budget": budget})
+    levels.append({"file": os.path.basename(path), "triangles": full_triangles, "budget": None})
+
+    with open(manifest_path(path), "w", encoding="utf-8") as fh:
+        json.dump({"levels": levels}, fh, indent=2)
+    return levels
+
+
+def describe_levels(levels: List[Dict[str, object]]) -> List[str]:
+    """Return one report line per level."""
+    return [f"  {level['file']}: {level['triangles']} triangles "
+            f"({'budget ' + str(level['budget']) if level['budget'] else 'full'})"
+            for level in levels]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write LOD levels for a sculpture GLB")
+    parser.add_argument("model", help="full-detail GLB file")
+    parser.add_argument("--budgets", type=int, nargs="+", default=list(DEFAULT_BUDGETS),
+                        help="triangle budget of each coarse level")
+    args = parser.parse_args()
+
+    levels = write_lods(trimesh.load(args.model), args.model, args.budgets)
+    print(f"Wrote {manifest_path(args.model)}")
+    for line in describe_levels(levels):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Vectorized pattern detection over a :class:`CommitTable`.
+
+Every statistic is computed with NumPy reductions: ``bincount`` for the hour,
+author and day histograms, a merge of the sorted timestamps with their window
+ends for bursts and plain sums for ratios and impact. The results are
+identical to the original per-commit loops, including the order of
+``hour_distribution`` and the tie-breaking of ``peak_hour`` (first hour to
+appear in the input wins). Per-author and per-day aggregates are only
+computed when asked for.
+
+Given a :class:`rollups.Rollups` index of the same commits, every statistic
+except the bursts is read from its buckets instead, see
+:func:`rollup_patterns`. :func:`detect_patterns` then reorders the hours by
+their first appearance in the commits, so both paths give the same result.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from commit_table import CommitTable
+from git_ingest import CommitData
+from rollups import Day, Rollups
+
+BURST_WINDOW = 3600  # 1 hour
+MIN_BURST = 3
+WINDOW_BLOCK = 32768  # commits merged with their window ends at a time
+
+
+def first_appearance(hours: np.ndarray, wanted: int) -> np.ndarray:
+    """Return the ``wanted`` distinct values of ``hours`` in order of first appearance."""
+    # Every hour normally shows up within the first few hundred commits, so
+    # only a growing prefix is searched for first appearances.
+    size = 256
+    while True:
+        present, first_seen = np.unique(hours[:size], return_index=True)
+        if len(present) == wanted or size >= len(hours):
+            break
+        size *= 8
+    return present[np.argsort(first_seen)]
+
+
+def hour_distribution(hours: np.ndarray) -> Dict[int, int]:
+    """Return commits per hour, keyed in order of first appearance in ``hours``."""
+    counts = np.bincount(hours, minlength=24)
+    ordered = first_appearance(hours, np.count_nonzero(counts))
+    return {int(hour): int(counts[hour]) for hour in ordered}
+
+
+def sorted_timestamps(timestamps: np.ndarray) -> np.ndarray:
+    """Return ``timestamps`` in ascending order.
+
+    Tables from git are newest first, which only needs reversing.
+    """
+    if len(timestamps) > 1 and (timestamps[1:] <= timestamps[:-1]).all():
+        return timestamps[::-1]
+    return np.sort(timestamps)
+
+
+def window_ends(timestamps: np.ndarray, window: int) -> np.ndarray:
+    """Return the index of the first timestamp ``window`` or more after each sorted timestamp.
+
+    Equal to ``searchsorted(timestamps, timestamps + window, side="left")``
+    for a positive ``window``. The window ends are sorted too, so a stable
+    sort of both (which merges the two runs in linear time) replaces one
+    binary search per commit; ends come first and so sort before equal
+    timestamps. The merge goes one block of commits at a time to stay in
+    cache, and a block whose windows reach far past it falls back to the
+    binary search.
+    """
+    n = len(timestamps)
+    ends = np.empty(n, dtype=np.intp)
+    for start in range(0, n, WINDOW_BLOCK):
+        stop = min(n, start + WINDOW_BLOCK)
+        queries = timestamps[start:stop] + window
+        reach = int(np.searchsorted(timestamps, queries[-1]))
+        if reach - stop > WINDOW_BLOCK:
+            ends[start:stop] = np.searchsorted(timestamps, queries)
+            continue
+        size = stop - start
+        keys = np.concatenate([queries, timestamps[start:reach]])
+        block = np.flatnonzero(keys.argsort(kind="stable") < size)
+        block += start - np.arange(size)
+        ends[start:stop] = block
+    return ends
+
+
+def find_bursts(timestamps: np.ndarray, window: int = BURST_WINDOW,
+                min_size: int = MIN_BURST) -> List[Tuple[int, int]]:
+    """Return ``(start, size)`` of every burst in sorted ``timestamps``.
+
+    Commits are grouped greedily: a group starts at the first commit not in
+    the previous group and takes every following commit less than ``window``
+    seconds after it. Groups of at least ``min_size`` commits are bursts.
+
+    The end of every candidate group comes from :func:`window_ends`. A gap
+    of at least ``window`` between two commits always starts a new group, so
+    the history splits into independent runs; only runs long enough to hold
+    a burst have their chain of groups followed, one step per group.
+    """
+    n = len(timestamps)
+    if window <= 0:
+        # Every group is a single commit
+        return [(i, 1) for i in range(n)] if min_size <= 1 else []
+
+    run_starts = np.concatenate(([0], np.flatnonzero(np.diff(timestamps) >= window) + 1))
+    run_ends = np.append(run_starts[1:], n)
+    long_runs = (run_ends - run_starts) >= min_size
+    if n == 0 or not long_runs.any():
+        return []
+
+    # A positive window makes every group end at least one commit later
+    end_of = memoryview(window_ends(timestamps, window))
+
+    bursts = []
+    for run_start, run_end in zip(run_starts[long_runs].tolist(), run_ends[long_runs].tolist()):
+        i = run_start
+        while i < run_end:
+            end = end_of[i]
+            if end - i >= min_size:
+                bursts.append((i, end - i))
+            i = end
+    return bursts
+
+
+def author_aggregates(author_id: np.ndarray, authors: List[str],
+                      changes: np.ndarray) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Return commits and lines changed per author."""
+    commits = np.bincount(author_id, minlength=len(authors))
+    churn = np.bincount(author_id, weights=changes, minlength=len(authors))
+    active = np.flatnonzero(commits)
+    return ({authors[i]: int(commits[i]) for i in active},
+            {authors[i]: int(churn[i]) for i in active})
+
+
+def day_aggregates(timestamps: np.ndarray,
+                   changes: np.ndarray) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Return commits and lines changed per UTC day."""
+    days = timestamps // 86400
+    first_day = days.min()
+    offsets = days - first_day
+    commits = np.bincount(offsets)
+    churn = np.bincount(offsets, weights=changes)
+    active = np.flatnonzero(commits)
+    labels = np.datetime_as_string((active + first_day).astype("datetime64[D]"))
+    return ({str(day): int(commits[i]) for day, i in zip(labels, active)},
+            {str(day): int(churn[i]) for day, i in zip(labels, active)})
+
+
+def rollup_patterns(rollups: Rollups, start: Optional[Day] = None,
+                    end: Optional[Day] = None, aggregates: bool = False) -> Dict[str, any]:
+    """Return the statistics of :func:`detect_patterns`, bursts aside, from ``rollups``.
+
+    Only the buckets from ``start`` to ``end`` are read. The index does not
+    know the commit order, so hours are listed in order and ``peak_hour``
+    ties go to the earliest hour; :func:`detect_patterns` restores the
+    first-appearance order. Authors are listed in the order the index first
+    saw them.
+    """
+    commits, additions, deletions = rollups.totals(start, end).tolist()
+    if not commits:
+        return {}
+    total_changes = additions + deletions
+    hours = rollups.hours(start, end)[:, 0]
+    hour_counts = {int(hour): int(hours[hour]) for hour in np.flatnonzero(hours)}
+    human_commits = int(rollups.humans(start, end)[1, 0])
+    patterns = {
+        "hour_distribution": hour_counts,
+        "human_ratio": human_commits / commits,
+        "automation_ratio": (commits - human_commits) / commits,
+        "avg_impact": total_changes / commits,
+        "peak_hour": max(hour_counts.items(), key=lambda x: x[1])[0],
+        "total_changes": total_changes,
+    }
+    if aggregates:
+        authors = rollups.by_author(start, end)
+        dates, days = rollups.days(start, end)
+        active = np.flatnonzero(days[:, 0])
+        labels = np.datetime_as_string(dates[active]).tolist()
+        patterns.update({
+            "author_commits": {name: int(row[0]) for name, row in authors.items()},
+            "author_changes": {name: int(row[1] + row[2]) for name, row in authors.items()},
+            "day_commits": dict(zip(labels, days[active, 0].tolist())),
+            "day_changes": dict(zip(labels, (days[active, 1] + days[active, 2]).tolist())),
+        })
+    return patterns
+
+
+def detect_patterns(commits: Union[CommitTable, List[CommitData]],
+                    burst_window: int = BURST_WINDOW,
+                    min_burst: int = MIN_BURST,
+                    rollups: Optional[Rollups] = None,
+                    aggregates: bool = False) -> Dict[str, any]:
+    """Detect emergent patterns in commit data.
+
+    Commit bursts are ``min_burst`` or more commits within ``burst_window``
+    seconds. With ``aggregates``, per-author and per-day commit counts and
+    lines changed are returned as well. With ``rollups`` of the same
+    commits, only the bursts and the order of the hours are computed from
+    ``commits``.
+    """
+    table = CommitTable.coerce(commits)
+    if not len(table):
+        return {}
+
+    if rollups is not None:
+        patterns = rollup_patterns(rollups, aggregates=aggregates)
+        counts = patterns.pop("hour_distribution")
+        hour_counts = {int(hour): counts[int(hour)]
+                       for hour in first_appearance(table.hour, len(counts))}
+        patterns["peak_hour"] = max(hour_counts.items(), key=lambda x: x[1])[0]
+        bursts = find_bursts(sorted_timestamps(table.timestamp), burst_window, min_burst)
+        return {"hour_distribution": hour_counts, "bursts": bursts, **patterns}
+
+    # Temporal patterns
+    hour_counts = hour_distribution(table.hour)
+
+    # Detect commit bursts (multiple commits within short time windows)
+    bursts = find_bursts(sorted_timestamps(table.timestamp), burst_window, min_burst)
+
+    # Author collaboration
+    human_commits = int(table.is_human.sum())
+    auto_commits = len(table) - human_commits
+
+    # Code impact
+    total_changes = int(table.additions.sum()) + int(table.deletions.sum())
+    avg_change = total_changes / len(table)
+
+    # Find peak activity hour
+    peak_hour = max(hour_counts.items(), key=lambda x: x[1])[0]
+
+    patterns = {
+        "hour_distribution": hour_counts,
+        "bursts": bursts,
+        "human_ratio": human_commits / len(table),
+        "automation_ratio": auto_commits / len(table),
+        "avg_impact": avg_change,
+        "peak_hour": peak_hour,
+        "total_changes": total_changes,
+    }
+    if aggregates:
+        changes = table.changes
+        author_commits, author_changes = author_aggregates(table.author_id, table.authors, changes)
+        day_commits, day_changes = day_aggregates(table.timestamp, changes)
+        patterns.update({
+            "author_commits": author_commits,
+            "author_changes": author_changes,
+            "day_commits": day_commits,
+            "day_changes": day_changes,
+        })
+    return patterns
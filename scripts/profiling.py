@@ -0,0 +1,290 @@
+"""Stage timing and profiling shared by the generators.
+
+Generators wrap their work in named stages::
+
+    with profiling.stage("ingest"):
+        commits = fetch_commit_table(repo_path, days)
+
+While a :class:`Profiler` is active, every stage records its wall time, CPU
+time (of this process plus the worker processes reaped during the stage),
+the peak RSS of this process during the stage, the peak RSS of its largest
+child reaped so far, and counters:
+``subprocesses`` started (via an audit hook on ``subprocess.Popen``) and
+``http_requests`` / ``http_not_modified`` sent by
+:class:`github_fetch.GitHubFetcher`. Stages nest and counters count toward
+every open stage. Without an active profiler a stage does nothing.
+
+The peak RSS of a stage comes from ``VmHWM``, which every stage resets to
+the current RSS by writing ``5`` to ``/proc/self/clear_refs`` on Linux. The
+peak an inner stage resets is folded into the stages around it first. Where
+that file is missing (macOS, old kernels), ``peak_rss_mb`` falls back to
+``ru_maxrss``, the peak of the process so far. Reaped children cannot be
+reset, so ``children_peak_rss_so_far_mb`` is always the largest so far.
+
+Work done in worker processes is measured with :func:`run_profiled`, which
+returns the worker's stages so the parent can :func:`merge` them.
+
+:func:`add_arguments` adds ``--profile [FILE]`` (print a stage table to
+stderr, and with ``FILE`` also dump ``cProfile`` statistics of the main
+process there) and ``--timings-json FILE`` (write the machine-readable
+report) to a generator's parser; :func:`session` runs its ``main`` under
+them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_active: Optional["Profiler"] = None
+_hook_installed = False
+
+_CLEAR_REFS = "/proc/self/clear_refs"
+_STATUS = "/proc/self/status"
+
+
+def _peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Return the peak RSS of this process, or of its largest reaped child, in MB."""
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _reset_peak_rss() -> bool:
+    """Reset ``VmHWM`` of this process to its current RSS; return whether Linux allowed it."""
+    try:
+        with open(_CLEAR_REFS, "w", encoding="ascii") as fh:
+            fh.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _hwm_mb() -> Optional[float]:
+    """Return ``VmHWM`` (peak RSS since the last reset) of this process in MB."""
+    try:
+        with open(_STATUS, "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _snapshot() -> Tuple[float, float]:
+    times = os.times()
+    return time.perf_counter(), time.process_time() + times.children_user + times.children_system
+
+
+def _audit(event: str, args: tuple) -> None:
+    if event == "subprocess.Popen" and _active is not None:
+        _active.count("subprocesses")
+
+
+class Profiler:
+    """Collect stage records and counters for one run."""
+
+    def __init__(self) -> None:
+        global _hook_installed
+        self.stages: List[Dict[str, object]] = []
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._open: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+        self._start = _snapshot()
+        # Peak RSS of the run and of each open stage, tracked across resets
+        self._peak = _peak_rss_mb() or 0.0
+        self._stage_peaks: Dict[int, float] = {}
+        self._resets = _hwm_mb() is not None and _reset_peak_rss()
+        if not _hook_installed:
+            sys.addaudithook(_audit)
+            _hook_installed = True
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        record: Dict[str, object] = {"name": name, "depth": len(self._open)}
+        self.stages.append(record)
+        self._open.append(record)
+        counters: Dict[str, int] = defaultdict(int)
+        record["counters"] = counters
+        if self._resets:
+            self._fold_peak()
+            _reset_peak_rss()
+            self._stage_peaks[id(record)] = 0.0
+        wall, cpu = _snapshot()
+        try:
+            yield
+        finally:
+            end_wall, end_cpu = _snapshot()
+            if self._resets:
+                self._fold_peak()
+                peak = self._stage_peaks.pop(id(record))
+            else:
+                peak = _peak_rss_mb()
+            record.update(wall_s=round(end_wall - wall, 4), cpu_s=round(end_cpu - cpu, 4),
+                          peak_rss_mb=peak, children_peak_rss_so_far_mb=_peak_rss_mb(True))
+            record["counters"] = dict(counters)
+            self._open = [other for other in self._open if other is not record]
+
+    def _fold_peak(self) -> None:
+        """Add ``VmHWM`` since the last reset to the run and the open stages."""
+        peak = _hwm_mb() or 0.0
+        self._peak = max(self._peak, peak)
+        for key, value in self._stage_peaks.items():
+            self._stage_peaks[key] = max(value, peak)
+
+    def peak_rss_mb(self) -> Optional[float]:
+        """Return the peak RSS of this process since before the profiler started."""
+        if not self._resets:
+            return _peak_rss_mb()
+        self._fold_peak()
+        return self._peak
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+            for record in self._open:
+                record["counters"][name] += amount
+
+    def merge(self, stages: List[Dict[str, object]]) -> None:
+        """Add stages recorded in a worker process, nested under the open stages."""
+        depth = len(self._open)
+        for record in stages:
+            self.stages.append(dict(record, depth=depth + record["depth"], worker=True))
+            if record["depth"] == 0:
+                for name, amount in record["counters"].items():
+                    self.count(name, amount)
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        """Return the stages aggregated by name: calls, summed times and counters, peak RSS."""
+        summary: Dict[str, Dict[str, object]] = {}
+        for record in self.stages:
+            entry = summary.setdefault(record["name"], {"depth": record["depth"], "calls": 0,
+                                                        "wall_s": 0.0, "cpu_s": 0.0,
+                                                        "peak_rss_mb": None, "counters": {}})
+            entry["calls"] += 1
+            entry["wall_s"] = round(entry["wall_s"] + record.get("wall_s", 0.0), 4)
+            entry["cpu_s"] = round(entry["cpu_s"] + record.get("cpu_s", 0.0), 4)
+            if record.get("peak_rss_mb") is not None:
+                entry["peak_rss_mb"] = max(entry["peak_rss_mb"] or 0.0, record["peak_rss_mb"])
+            for name, amount in record["counters"].items():
+                entry["counters"][name] = entry["counters"].get(name, 0) + amount
+        return summary
+
+    def report(self) -> Dict[str, object]:
+        end_wall, end_cpu = _snapshot()
+        return {
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total": {"wall_s": round(end_wall - self._start[0], 4),
+                      "cpu_s": round(end_cpu - self._start[1], 4),
+                      "peak_rss_mb": self.peak_rss_mb(),
+                      "children_peak_rss_mb": _peak_rss_mb(True),
+                      "counters": dict(self.counters)},
+            "summary": self.summary(),
+            "stages": self.stages,
+        }
+
+    def table(self) -> List[str]:
+        """Return the report lines printed by ``--profile``."""
+        report = self.report()
+        lines = [f"{'stage':<28} {'calls':>5} {'wall s':>8} {'cpu s':>8} {'peak MB':>8}  counters"]
+        rows = list(report["summary"].items()) + [("total", dict(report["total"], calls=1))]
+        for name, entry in rows:
+            name = "  " * entry.get("depth", 0) + name
+            counters = ", ".join(f"{key}={value}" for key, value in sorted(entry["counters"].items()))
+            peak = "-" if entry["peak_rss_mb"] is None else f"{entry['peak_rss_mb']:.0f}"
+            lines.append(f"{name:<28} {entry['calls']:>5} {entry['wall_s']:>8.3f} "
+                         f"{entry['cpu_s']:>8.3f} {peak:>8}  {counters}")
+        return lines
+
+
+def active() -> bool:
+    return _active is not None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record ``name`` as a stage of the active profiler, if any."""
+    if _active is None:
+        yield
+        return
+    with _active.stage(name):
+        yield
+
+
+def count(name: str, amount: int = 1) -> None:
+    if _active is not None:
+        _active.count(name, amount)
+
+
+def merge(stages: List[Dict[str, object]]) -> None:
+    if _active is not None:
+        _active.merge(stages)
+
+
+def run_profiled(func: Callable, *args, **kwargs) -> Tuple[object, List[Dict[str, object]]]:
+    """Call ``func`` under a fresh profiler and return its result and the recorded stages.
+
+    Meant to be submitted to a process pool in place of ``func`` when the
+    parent is profiling; pass the stages to :func:`merge`.
+    """
+    global _active
+    previous, _active = _active, Profiler()
+    try:
+        return func(*args, **kwargs), _active.stages
+    finally:
+        _active = previous
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="print a stage timing table; with FILE also dump cProfile stats there")
+    parser.add_argument("--timings-json", metavar="FILE",
+                        help="write stage timings, peak memory and counters as JSON")
+
+
+@contextmanager
+def session(args: argparse.Namespace) -> Iterator[Optional[Profiler]]:
+    """Profile the enclosed code as requested by the :func:`add_arguments` flags."""
+    global _active
+    if args.profile is None and not args.timings_json:
+        yield None
+        return
+
+    profiler = _active = Profiler()
+    tracer = cProfile.Profile() if args.profile else None
+    if tracer:
+        tracer.enable()
+    try:
+        yield profiler
+    finally:
+        if tracer:
+            tracer.disable()
+            tracer.dump_stats(args.profile)
+        _active = None
+        if args.profile is not None:
+            print("\n".join(profiler.table()), file=sys.stderr)
+            if args.profile:
+                print(f"cProfile stats written to {args.profile}", file=sys.stderr)
+        if args.timings_json:
+            with open(args.timings_json, "w", encoding="utf-8") as fh:
+                json.dump(profiler.report(), fh, indent=2)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Pre-aggregated commit statistics.
+
+A :class:`Rollups` index holds commit counts and churn (lines added and
+deleted) in buckets instead of per commit:
+
+- a dense cube of UTC day x hour of day x author type (automation or human),
+  from which day, hour, weekday and human/bot totals are summed;
+- a sparse table of (UTC day, author) rows for the days an author committed.
+
+Commits are binned with NumPy ``datetime64`` arithmetic. :meth:`Rollups.add`
+and :meth:`Rollups.remove` only touch the days of the commits passed in and
+merge their (day, author) rows into the sorted author table, so the index
+follows an incremental ingestion commit by commit, and every query takes an
+inclusive date range and reads only the buckets inside it. The hour is the
+one recorded on the commit (local time for git history).
+
+``commit_cache.py`` keeps one index per repository next to its commit store
+and updates it on every run; ``patterns.py`` and both generators read their
+aggregates from it.
+
+Example usage:
+  python rollups.py --repo-path .. --days 365 --since 2024-01-01 --until 2024-03-31
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from commit_table import CommitTable
+
+# Last axis of every bucket array
+METRICS = ("commits", "additions", "deletions")
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+ROLLUP_VERSION = 1
+
+# Up to this many author rows are inserted or deleted by copying the slices
+# between them; more go through np.insert / np.delete
+SPLICE_ROWS = 256
+
+# Anything np.datetime64 accepts as a day: "2024-01-31", a date or a datetime64
+Day = Union[str, datetime.date, np.datetime64]
+
+
+def to_days(timestamps: np.ndarray) -> np.ndarray:
+    """Return the UTC day (days since 1970-01-01) of every Unix timestamp."""
+    seconds = np.asarray(timestamps, dtype=np.int64).astype("datetime64[s]")
+    return seconds.astype("datetime64[D]").astype(np.int64)
+
+
+def _day(value: Day) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def _splice(array: np.ndarray, at: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Return ``array`` with ``rows`` inserted before the sorted positions ``at``."""
+    if len(at) > SPLICE_ROWS:
+        return np.insert(array, at, rows, axis=0)
+    parts, previous = [], 0
+    for i, position in enumerate(at.tolist()):
+        parts += [array[previous:position], rows[i:i + 1]]
+        previous = position
+    parts.append(array[previous:])
+    return np.concatenate(parts)
+
+
+def _cut(array: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """Return ``array`` without the rows at the sorted positions ``at``."""
+    if len(at) > SPLICE_ROWS:
+        return np.delete(array, at, axis=0)
+    bounds = at.tolist()
+    starts, ends = [0] + [b + 1 for b in bounds], bounds + [len(array)]
+    return np.concatenate([array[start:end] for start, end in zip(starts, ends)])
+
+
+class Rollups:
+    """Commit counts and churn bucketed by day, hour, author type and author."""
+
+    def __init__(self) -> None:
+        self.first_day = 0
+        # (days, 24 hours, automation/human, METRICS)
+        self.cube = np.zeros((0, 24, 2, len(METRICS)), dtype=np.int64)
+        self.authors: List[str] = []
+        self._author_index: Dict[str, int] = {}
+        # Sorted (day << 32 | author) keys and their METRICS
+        self.author_key = np.zeros(0, dtype=np.int64)
+        self.author_values = np.zeros((0, len(METRICS)), dtype=np.int64)
+
+    @classmethod
+    def from_table(cls, table: CommitTable) -> "Rollups":
+        rollups = cls()
+        rollups.add(table)
+        return rollups
+
+    @property
+    def first_date(self) -> Optional[np.datetime64]:
+        """First day holding commits, or ``None`` when empty."""
+        return np.datetime64(self.first_day, "D") if len(self.cube) else None
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        """Last day holding commits, or ``None`` when empty."""
+        return np.datetime64(self.first_day + len(self.cube) - 1, "D") if len(self.cube) else None
+
+    def add(self, table: CommitTable, sign: int = 1) -> None:
+        """Add the commits in ``table`` to their buckets (subtract them with ``sign=-1``)."""
+        if not len(table):
+            return
+        days = to_days(table.timestamp)
+        self._cover(int(days.min()), int(days.max()))
+        values = np.column_stack([np.ones(len(table), dtype=np.int64),
+                                  table.additions.astype(np.int64),
+                                  table.deletions.astype(np.int64)]) * sign
+
+        # Only the days spanned by the new commits are touched
+        offset = days - self.first_day
+        lo, hi = int(offset.min()), int(offset.max()) + 1
+        flat = ((offset - lo) * 24 + table.hour.astype(np.int64)) * 2 + table.is_human
+        window = self.cube[lo:hi]
+        for m in range(len(METRICS)):
+            counts = np.bincount(flat, weights=values[:, m], minlength=window[..., m].size)
+            window[..., m] += counts.astype(np.int64).reshape(window.shape[:3])
+
+        remap = np.array([self._author_index.setdefault(name, len(self._author_index))
+                          for name in table.authors], dtype=np.int64)
+        self.authors = list(self._author_index)
+        # Sum the new commits per (day, author) first, then merge only those
+        # rows into the sorted table
+        keys, inverse = np.unique(days << 32 | remap[table.author_id], return_inverse=True)
+        sums = np.column_stack([np.bincount(inverse, weights=values[:, m], minlength=len(keys))
+                                for m in range(len(METRICS))]).astype(np.int64)
+        at = np.searchsorted(self.author_key, keys)
+        found = at < len(self.author_key)
+        found[found] = self.author_key[at[found]] == keys[found]
+        self.author_values[at[found]] += sums[found]
+        if not found.all():
+            missing = ~found
+            self.author_key = _splice(self.author_key, at[missing], keys[missing])
+            self.author_values = _splice(self.author_values, at[missing], sums[missing])
+        if sign < 0:
+            self._trim(np.searchsorted(self.author_key, keys))
+
+    def remove(self, table: CommitTable) -> None:
+        """Subtract commits that were added earlier."""
+        self.add(table, sign=-1)
+
+    def _cover(self, first: int, last: int) -> None:
+        """Grow the cube so that it spans days ``first`` to ``last``."""
+        if not len(self.cube):
+            self.first_day = first
+            self.cube = np.zeros((last - first + 1,) + self.cube.shape[1:], dtype=np.int64)
+            return
+        start = min(first, self.first_day)
+        end = max(last, self.first_day + len(self.cube) - 1)
+        if start == self.first_day and end == self.first_day + len(self.cube) - 1:
+            return
+        cube = np.zeros((end - start + 1,) + self.cube.shape[1:], dtype=np.int64)
+        cube[self.first_day - start:self.first_day - start + len(self.cube)] = self.cube
+        self.first_day, self.cube = start, cube
+
+    def _trim(self, touched: np.ndarray) -> None:
+        """Drop empty days at either end and the ``touched`` author rows left without commits."""
+        commits = self.cube[..., 0]
+        lo, hi = 0, len(commits)
+        while lo < hi and not commits[lo].any():
+            lo += 1
+        while hi > lo and not commits[hi - 1].any():
+            hi -= 1
+        if (lo, hi) != (0, len(commits)):
+            self.cube = self.cube[lo:hi].copy()
+            self.first_day += lo
+        empty = touched[self.author_values[touched, 0] == 0]
+        if len(empty):
+            self.author_key = _cut(self.author_key, empty)
+            self.author_values = _cut(self.author_values, empty)
+
+    def _window(self, start: Optional[Day], end: Optional[Day]) -> np.ndarray:
+        """Return the cube days inside ``[start, end]``."""
+        lo = 0 if start is None else max(0, _day(start) - self.first_day)
+        hi = len(self.cube) if end is None else min(len(self.cube), _day(end) - self.first_day + 1)
+        return self.cube[lo:max(lo, hi)]
+
+    def totals(self, start: Optional[Day] = None, end: Optional[Day] = None) -> np.ndarray:
+        """Return the ``METRICS`` of every commit from ``start`` to ``end`` (inclusive)."""
+        return self._window(start, end).sum(axis=(0, 1, 2))
+
+    def hours(self, start: Optional[Day] = None, end: Optional[Day] = None) -> np.ndarray:
+        """Return a ``(24, 3)`` array of ``METRICS`` per hour of day."""
+        return self._window(start, end).sum(axis=(0, 2))
+
+    def humans(self, start: Optional[Day] = None, end: Optional[Day] = None) -> np.ndarray:
+        """Return a ``(2, 3)`` array of ``METRICS`` for automation (row 0) and humans (row 1)."""
+        return self._window(start, end).sum(axis=(0, 1))
+
+    def days(self, start: Optional[Day] = None,
+             end: Optional[Day] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return every day from ``start`` to ``end`` and a ``(days, 3)`` array of their ``METRICS``.
+
+        Days without commits are included with zeros. ``start`` and ``end``
+        default to the first and last day holding commits.
+        """
+        if not len(self.cube) and (start is None or end is None):
+            return np.zeros(0, dtype="datetime64[D]"), np.zeros((0, len(METRICS)), dtype=np.int64)
+        first = self.first_day if start is None else _day(start)
+        last = self.first_day + len(self.cube) - 1 if end is None else _day(end)
+        dates = np.arange(first, last + 1).astype("datetime64[D]")
+        values = np.zeros((len(dates), len(METRICS)), dtype=np.int64)
+        lo, hi = max(first, self.first_day), min(last, self.first_day + len(self.cube) - 1)
+        if len(self.cube) and lo <= hi:
+            values[lo - first:hi - first + 1] = \
+                self.cube[lo - self.first_day:hi - self.first_day + 1].sum(axis=(1, 2))
+        return dates, values
+
+    def day_counts(self, start: Optional[Day] = None, end: Optional[Day] = None) -> Dict[str, int]:
+        """Return the commit count of every day from ``start`` to ``end``, zeros included."""
+        dates, values = self.days(start, end)
+        return dict(zip(np.datetime_as_string(dates).tolist(), values[:, 0].tolist()))
+
+    def weekdays(self, start: Optional[Day] = None, end: Optional[Day] = None) -> np.ndarray:
+        """Return a ``(7, 3)`` array of ``METRICS`` per weekday, Monday first."""
+        dates, values = self.days(start, end)
+        # 1970-01-01 was a Thursday
+        weekday = (dates.astype(np.int64) + 3) % 7
+        return np.column_stack([np.bincount(weekday, weights=values[:, m], minlength=7)
+                                for m in range(len(METRICS))]).astype(np.int64)
+
+    def by_author(self, start: Optional[Day] = None,
+                  end: Optional[Day] = None) -> Dict[str, np.ndarray]:
+        """Return the ``METRICS`` of every author with commits from ``start`` to ``end``."""
+        lo = 0 if start is None else np.searchsorted(self.author_key, _day(start) << 32)
+        hi = (len(self.author_key) if end is None
+              else np.searchsorted(self.author_key, (_day(end) + 1) << 32))
+        ids = (self.author_key[lo:hi] & 0xFFFFFFFF).astype(np.int64)
+        totals = np.column_stack([
+            np.bincount(ids, weights=self.author_values[lo:hi, m], minlength=len(self.authors))
+            for m in range(len(METRICS))]).astype(np.int64)
+        return {self.authors[i]: totals[i] for i in np.flatnonzero(totals[:, 0])}
+
+    def summary(self, start: Optional[Day] = None, end: Optional[Day] = None) -> Dict[str, object]:
+        """Return the totals and every breakdown from ``start`` to ``end`` as plain Python values."""
+        def table(labels, values: np.ndarray) -> Dict[str, Dict[str, int]]:
+            return {str(label): dict(zip(METRICS, row.tolist()))
+                    for label, row in zip(labels, values) if row[0]}
+
+        dates, day_values = self.days(start, end)
+        return {
+            "totals": dict(zip(METRICS, self.totals(start, end).tolist())),
+            "days": table(np.datetime_as_string(dates), day_values),
+            "hours": table(range(24), self.hours(start, end)),
+            "weekdays": table(WEEKDAYS, self.weekdays(start, end)),
+            "humans": table(("automation", "human"), self.humans(start, end)),
+            "authors": {name: dict(zip(METRICS, row.tolist()))
+                        for name, row in self.by_author(start, end).items()},
+        }
+
+    def save(self, path: str) -> None:
+        """Write the index atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez_compressed(fh, version=ROLLUP_VERSION, first_day=self.first_day,
+                                cube=self.cube, authors=np.array(self.authors, dtype=str),
+                                author_key=self.author_key, author_values=self.author_values)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Rollups"]:
+        """Read an index written by :meth:`save`, or return ``None``."""
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != ROLLUP_VERSION:
+                    return None
+                rollups = cls()
+                rollups.first_day = int(data["first_day"])
+                rollups.cube = data["cube"]
+                rollups.authors = data["authors"].tolist()
+                rollups.author_key = data["author_key"]
+                rollups.author_values = data["author_values"]
+        except (OSError, ValueError, KeyError):
+            return None
+        rollups._author_index = {name: i for i, name in enumerate(rollups.authors)}
+        return rollups
+
+
+def main() -> None:
+    from commit_cache import DEFAULT_CACHE_DIR, load_git_store
+
+    parser = argparse.ArgumentParser(description="Print rolled-up commit statistics for a date range")
+    parser.add_argument("--repo-path", default=".", help="path to git repository")
+    parser.add_argument("--days", type=int, default=30, help="number of days to keep in the cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="cache directory")
+    parser.add_argument("--since", help="first day of the range (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last day of the range (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    rollups = load_git_store(args.repo_path, args.days, args.cache_dir).rollups
+    print(json.dumps(rollups.summary(args.since, args.until), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Single entry point for the sculpture pipeline.
+
+Subcommands:
+
+- ``ingest``: update the incremental commit cache (``commit_cache.py``);
+- ``analyze``: ingest and print the detected patterns, or dump them with
+  ``--json``;
+- ``build``: render sculptures (``generate_enhanced_sculpture.py``);
+- ``github``: render the daily commit bars of a GitHub repository
+  (``generate_commit_sculpture.py``);
+- ``randomize``: create new generations (``commit_randomizer.py``);
+- ``all``: ingest through the cache, analyze and build in one process, then
+  randomize the latest model ``--generations`` times.
+
+Each subcommand takes the options of the script it wraps, including
+``--profile`` and ``--timings-json``. Modules are imported only once their
+subcommand runs, and ``trimesh`` and ``requests`` only when first used, so
+``--help`` and runs whose outputs are up to date skip most of the import
+cost. The script runs from the source tree and can be started from any
+working directory; its own directory is added to ``sys.path`` only if it is
+not there already.
+
+Example usage:
+  python scripts/sculpt.py ingest --repo-path . --days 90
+  python scripts/sculpt.py analyze --repo-path . --json
+  python scripts/sculpt.py build --repo-path . --mode all --cache-dir .sculpture_cache \\
+    --output "models/commit_sculpture_{mode}.glb"
+  python scripts/sculpt.py all --repo-path . --mode all --generations 2
+  python scripts/sculpt.py github --owner USER --repo REPO --cache-dir .sculpture_cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    # Loaded from the source tree by path rather than run as a script
+    sys.path.insert(0, HERE)
+
+import profiling  # noqa: E402
+
+# subcommand -> (module wrapping it, help)
+DELEGATES: Dict[str, Tuple[str, str]] = {
+    "ingest": ("commit_cache", "update the incremental commit cache"),
+    "build": ("generate_enhanced_sculpture", "render sculptures from local history"),
+    "github": ("generate_commit_sculpture", "render daily commit bars from the GitHub API"),
+    "randomize": ("commit_randomizer", "create randomized generations of the latest model"),
+}
+
+
+def analyze_parser(prog: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description="Print the patterns found in the history")
+    parser.add_argument("--repo-path", default=".", help="path to git repository")
+    parser.add_argument("--days", type=int, default=30, help="number of days to scan")
+    parser.add_argument("--cache-dir", help="read through the incremental commit cache in this directory")
+    parser.add_argument("--json", action="store_true", help="print all patterns as JSON")
+    profiling.add_arguments(parser)
+    return parser
+
+
+def _json_value(value):
+    """Convert the NumPy scalars and arrays in the patterns for ``json.dumps``."""
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+def run_analyze(args: argparse.Namespace) -> None:
+    from generate_enhanced_sculpture import describe_patterns, load_history
+    from patterns import detect_patterns
+
+    with profiling.stage("ingest"):
+        commits, rollups = load_history(args.repo_path, args.days, args.cache_dir)
+    with profiling.stage("patterns"):
+        patterns = detect_patterns(commits, rollups=rollups, aggregates=args.json)
+    if args.json:
+        print(json.dumps(dict(patterns, commits=len(commits)), indent=2, default=_json_value))
+        return
+    print(f"Found {len(commits)} commits")
+    for line in describe_patterns(patterns):
+        print(line)
+
+
+def all_parser(prog: str) -> argparse.ArgumentParser:
+    from commit_cache import DEFAULT_CACHE_DIR
+    from generate_enhanced_sculpture import build_parser
+
+    parser = build_parser(prog)
+    parser.description = "Ingest, analyze, build and randomize in one process"
+    parser.set_defaults(cache_dir=DEFAULT_CACHE_DIR)
+    parser.add_argument("--generations", type=int, default=0,
+                        help="randomized generations to create from the latest model afterwards")
+    parser.add_argument("--seed", type=int, help="seed for the generations (default: random)")
+    return parser
+
+
+def run_all(args: argparse.Namespace) -> None:
+    import generate_enhanced_sculpture
+
+    generate_enhanced_sculpture.run(args)
+    if args.generations > 0:
+        import numpy as np
+        from commit_randomizer import find_latest_model, run_generations
+
+        seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % 2**63)
+        print(f"Seed: {seed}")
+        path, number = find_latest_model()
+        run_generations(path, number, args.generations, seed)
+
+
+# subcommand -> (parser factory, runner, help) for the commands defined here
+COMMANDS: Dict[str, Tuple[Callable[[str], argparse.ArgumentParser],
+                          Callable[[argparse.Namespace], None], str]] = {
+    "analyze": (analyze_parser, run_analyze, "print the patterns found in the history"),
+    "all": (all_parser, run_all, "ingest, analyze, build and randomize in one process"),
+}
+
+
+def top_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="sculpt", description="Turn commit history into 3D sculptures",
+        epilog="Run 'sculpt COMMAND --help' for the options of a command.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    for name in ("ingest", "analyze", "build", "github", "randomize", "all"):
+        help_text = DELEGATES[name][1] if name in DELEGATES else COMMANDS[name][2]
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in DELEGATES and argv[0] not in COMMANDS:
+        top_parser().parse_args(argv)
+        return
+    name, rest = argv[0], argv[1:]
+    prog = f"sculpt {name}"
+    if name in DELEGATES:
+        module = importlib.import_module(DELEGATES[name][0])
+        parser, runner = module.build_parser(prog), module.run
+    else:
+        make_parser, runner, _ = COMMANDS[name]
+        parser = make_parser(prog)
+    args = parser.parse_args(rest)
+    with profiling.session(args):
+        runner(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Time-tiled sculpture output.
+
+:func:`write_tiles` splits a commit history into week (Monday-based, UTC)
+or month tiles, builds one sculpture per tile and writes it to
+``<directory>/<label>.glb``. ``index.json`` in the same directory lists every
+tile, oldest first, with its time range, commit statistics, bounding box,
+the X offset at which it sits in the combined layout, and a digest of its
+commits and build settings.
+
+On the next run a tile whose digest is unchanged keeps its GLB, tiles that
+no longer have commits are deleted, and only new or changed tiles are built
+and exported. :func:`tile_days` extends the ``--days`` window back to the
+first day of the tile it starts in, so the oldest tile stays whole and the
+window start only moves when a new week or month begins (dropping the
+oldest tile). With an append-only history the newest tile is then the only
+one rebuilt, so a CI run touches one small file. A viewer can read the
+index and fetch the most recent tiles first.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+
+from commit_table import CommitTable
+from compact_glb import export_scene
+from git_ingest import CommitData
+from lazy import lazy_import
+from patterns import detect_patterns
+
+trimesh = lazy_import("trimesh")
+
+PERIODS = ("week", "month")
+INDEX_NAME = "index.json"
+TILE_GAP = 5.0
+
+
+def tile_starts(timestamps: np.ndarray, period: str) -> np.ndarray:
+    """Return the first UTC day of the week or month of every timestamp."""
+    days = (np.asarray(timestamps) // 86400).astype("datetime64[D]")
+    if period == "week":
+        # 1970-01-01 was a Thursday; shift so that weeks start on Monday
+        return days - (days.astype(np.int64) + 3) % 7
+    if period == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError(f"unknown tile period: {period}")
+
+
+def tile_label(start: np.datetime64, period: str) -> str:
+    """Return the file name stem of the tile starting on ``start``."""
+    return str(start) if period == "week" else str(start)[:7]
+
+
+def tile_end(start: np.datetime64, period: str) -> np.datetime64:
+    """Return the first day after the tile starting on ``start``."""
+    if period == "week":
+        return start + np.timedelta64(7, "D")
+    return (start.astype("datetime64[M]") + 1).astype("datetime64[D]")
+
+
+def tile_days(days: int, period: str) -> int:
+    """Return ``days`` extended back to the first day of the tile the window starts in.
+
+    Matches :func:`git_ingest.since_date`, which counts days back from today
+    in UTC.
+    """
+    today = np.datetime64(datetime.datetime.utcnow().date(), "D")
+    first = (today - days).astype("datetime64[s]").astype(np.int64)
+    start = tile_starts(np.array([first]), period)[0]
+    return int((today - start).astype(np.int64))
+
+
+def load_index(directory: str) -> Dict:
+    try:
+        with open(os.path.join(directory, INDEX_NAME), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def layout(tiles: List[Dict], gap: float = TILE_GAP) -> None:
+    """Set the ``offset`` of every tile so they sit side by side along X, oldest first."""
+    cursor = 0.0
+    for tile in tiles:
+        (min_x, _, _), (max_x, _, _) = tile["bounds"]
+        tile["offset"] = [cursor - min_x, 0.0, 0.0]
+        cursor += (max_x - min_x) + gap
+
+
+def write_tiles(commits: Union[CommitTable, List[CommitData]],
+                build: Callable[[CommitTable, Dict], trimesh.Scene],
+                directory: str, period: str = "month", key: str = "",
+                writer: str = "trimesh") -> Dict[str, int]:
+    """Write one GLB per tile of ``commits`` and the index to ``directory``.
+
+    ``build(table, patterns)`` creates the scene of one tile. ``key`` names
+    everything besides the commits that affects a tile's geometry (mode,
+    options, generator version); tiles are rebuilt whenever it changes.
+    Returns how many tiles there are and how many were exported, reused and
+    removed.
+    """
+    table = CommitTable.coerce(commits).sorted_by_time()
+    os.makedirs(directory, exist_ok=True)
+    previous = {tile["label"]: tile for tile in load_index(directory).get("tiles", [])}
+
+    starts = tile_starts(table.timestamp, period)
+    boundaries = np.flatnonzero(np.diff(starts.astype(np.int64))) + 1
+    ranges = list(zip(np.concatenate(([0], boundaries)).tolist(),
+                      np.append(boundaries, len(table)).tolist())) if len(table) else []
+
+    tiles: List[Dict] = []
+    exported = 0
+    for first, last in ranges:
+        tile = table.take(slice(first, last))
+        start = starts[first]
+        label = tile_label(start, period)
+        digest = tile.digest(key)
+        path = os.path.join(directory, f"{label}.glb")
+
+        old = previous.get(label)
+        if old and old.get("digest") == digest and os.path.exists(path):
+            tiles.append(old)
+            continue
+
+        scene = build(tile, detect_patterns(tile))
+        export_scene(scene, path, writer)
+        exported += 1
+        changes = tile.changes
+        tiles.append({
+            "label": label,
+            "file": os.path.basename(path),
+            "start": str(start),
+            "end": str(tile_end(start, period)),
+            "commits": len(tile),
+            "human_commits": int(tile.is_human.sum()),
+            "changes": int(changes.sum()),
+            "first_timestamp": int(tile.timestamp[0]),
+            "last_timestamp": int(tile.timestamp[-1]),
+            "bounds": scene.bounds.tolist(),
+            "digest": digest,
+        })
+
+    current = {tile["label"] for tile in tiles}
+    removed = 0
+    for label, old in previous.items():
+        if label not in current:
+            removed += 1
+            try:
+                os.remove(os.path.join(directory, old["file"]))
+            except OSError:
+                pass
+
+    layout(tiles)
+    index_path = os.path.join(directory, INDEX_NAME)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump({"period": period, "key": key, "tiles": tiles}, fh, indent=2)
+    os.replace(index_path + ".tmp", index_path)
+    return {"tiles": len(tiles), "exported": exported,
+            "reused": len(tiles) - exported, "removed": removed}
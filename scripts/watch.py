@@ -0,0 +1,210 @@
+"""Keep a repository's commit window in memory and notice when its refs move.
+
+Used by ``generate_enhanced_sculpture.py --watch``, which renders once and
+then waits for new commits instead of exiting.
+
+- :class:`RefWatcher` polls the modification times of ``HEAD``,
+  ``packed-refs``, every file under ``refs/`` and a trigger file in the git
+  directory. A commit, fetch, rebase or branch switch changes at least one
+  of them; the trigger file is touched by the post-commit hook that
+  :func:`install_hook` adds, so a commit is noticed even when the poll
+  interval is long.
+- :class:`LiveHistory` holds a :class:`commit_cache.CommitStore`, its
+  :class:`rollups.Rollups` and the :class:`CommitTable` of its records.
+  :meth:`LiveHistory.refresh` asks git only for commits that are not
+  reachable from the last ref tips, and applies those commits and the ones
+  that left the ``--days`` window to the table and the rollups instead of
+  rebuilding either. Removed commits are matched by their full SHA, kept
+  in :attr:`LiveHistory.full_sha` row for row, since short SHAs can
+  collide. The table keeps the newest-first order of a fresh
+  ingestion, so its digest matches that of a one-shot run. With a tile
+  ``period`` the window is extended to whole tiles as in one-shot runs.
+
+Example usage:
+  python watch.py --repo-path .. --days 30
+  python watch.py --repo-path .. --install-hook
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import stat
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from commit_cache import CommitStore, git_repo_key, records_table, update_git_store
+from commit_table import CommitTable
+from rollups import Rollups
+from tiles import tile_days
+
+# Touched by the post-commit hook, relative to the git directory
+TRIGGER_NAME = "sculpture-watch"
+HOOK_LINE = 'touch "$(git rev-parse --git-dir)/sculpture-watch"'
+DEFAULT_INTERVAL = 0.25
+
+
+def _git_path(repo_path: str, *args: str) -> str:
+    cmd = ["git", "-C", repo_path, "rev-parse", *args]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    path = result.stdout.strip()
+    return path if os.path.isabs(path) else os.path.join(repo_path, path)
+
+
+def install_hook(repo_path: str) -> str:
+    """Add a post-commit hook to ``repo_path`` that touches the trigger file.
+
+    An existing hook is kept and the line appended to it. Returns the path of
+    the hook.
+    """
+    hooks = _git_path(repo_path, "--git-path", "hooks")
+    path = os.path.join(hooks, "post-commit")
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            script = fh.read()
+    except FileNotFoundError:
+        script = "#!/bin/sh\n"
+    if HOOK_LINE not in script:
+        os.makedirs(hooks, exist_ok=True)
+        script += ("" if script.endswith("\n") else "\n")
+        script += f"# Wake up generate_enhanced_sculpture.py --watch\n{HOOK_LINE}\n"
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(script)
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def _full_shas(records: List[dict]) -> np.ndarray:
+    return np.array([record["full_sha"] for record in records], dtype="U40")
+
+
+class RefWatcher:
+    """Poll the files git rewrites when a ref of ``repo_path`` moves."""
+
+    def __init__(self, repo_path: str, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self.git_dir = _git_path(repo_path, "--absolute-git-dir")
+        common_dir = _git_path(repo_path, "--git-common-dir")
+        self._files = [os.path.join(self.git_dir, "HEAD"),
+                       os.path.join(self.git_dir, TRIGGER_NAME),
+                       os.path.join(common_dir, "packed-refs")]
+        self._refs = os.path.join(common_dir, "refs")
+        self._state = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        state: Dict[str, Tuple[int, int]] = {}
+        paths = list(self._files)
+        for root, _, names in os.walk(self._refs):
+            paths.extend(os.path.join(root, name) for name in names)
+        for path in paths:
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (info.st_mtime_ns, info.st_size)
+        return state
+
+    def changed(self) -> bool:
+        """Return whether anything changed since the last call."""
+        state = self._snapshot()
+        if state == self._state:
+            return False
+        self._state = state
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the refs change and stay unchanged for one interval.
+
+        Waiting one quiet interval folds the several files a commit or fetch
+        writes into one wake-up. Returns ``False`` if ``timeout`` seconds
+        pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.changed():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.interval)
+        while True:
+            time.sleep(self.interval)
+            if not self.changed():
+                return True
+
+
+class LiveHistory:
+    """The last ``days`` days of ``repo_path``, kept up to date in memory.
+
+    With ``cache_dir`` the store is read from the commit cache on start and
+    written back by :meth:`save`; without it the history is only kept in
+    memory. ``jobs`` is passed to :func:`commit_cache.update_git_store`.
+    With ``period`` (``"week"`` or ``"month"``) every refresh extends the
+    window back to the first day of its oldest tile, see :func:`tiles.tile_days`.
+    ``full_sha`` holds the full SHA of every row of ``table``.
+    """
+
+    def __init__(self, repo_path: str, days: int, cache_dir: Optional[str] = None,
+                 jobs: int = 1, period: Optional[str] = None) -> None:
+        self.repo_path = repo_path
+        self.days = days
+        self.jobs = jobs
+        self.period = period
+        key = git_repo_key(repo_path)
+        self.store = CommitStore.open(cache_dir, key) if cache_dir else CommitStore("", key)
+        self.table = records_table(self.store.records)
+        self.full_sha = _full_shas(self.store.records)
+        self.refresh()
+
+    @property
+    def rollups(self) -> Rollups:
+        return self.store.rollups
+
+    def refresh(self) -> Tuple[int, int]:
+        """Ingest what changed since the last call; return the commits added and removed."""
+        days = tile_days(self.days, self.period) if self.period else self.days
+        added, removed = update_git_store(self.store, self.repo_path, days, self.jobs)
+        if removed:
+            keep = ~np.isin(self.full_sha, _full_shas(removed))
+            self.table = self.table.take(keep)
+            self.full_sha = self.full_sha[keep]
+        if added:
+            self.table = CommitTable.concat([records_table(added), self.table])
+            self.full_sha = np.concatenate([_full_shas(added), self.full_sha])
+        return len(added), len(removed)
+
+    def save(self) -> None:
+        """Write the store back to the commit cache, if there is one."""
+        if self.store.path:
+            self.store.save()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print the commit window each time the refs move")
+    parser.add_argument("--repo-path", default=".", help="path to git repository")
+    parser.add_argument("--days", type=int, default=30, help="number of days to keep")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between polls of the refs")
+    parser.add_argument("--install-hook", action="store_true",
+                        help="add a post-commit hook that wakes the watcher, then exit")
+    args = parser.parse_args()
+
+    if args.install_hook:
+        print(f"Installed {install_hook(args.repo_path)}")
+        return
+    watcher = RefWatcher(args.repo_path, args.interval)
+    history = LiveHistory(args.repo_path, args.days)
+    print(f"{len(history.table)} commits, watching {watcher.git_dir}")
+    try:
+        while watcher.wait():
+            start = time.perf_counter()
+            added, removed = history.refresh()
+            print(f"+{added} -{removed}: {len(history.table)} commits "
+                  f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()